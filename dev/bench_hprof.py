@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Measures the throughput (MB/s) of the hprof filters on generated outputs of
+hprof.
+
+Usage::
+
+    PYTHONPATH=. python dev/bench_hprof.py [lines per file]
+"""
+from __future__ import division, print_function
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from penchy.jobs.filters import HProfCpuSamples, HProfCpuTimes, HProfHeapSites
+
+
+def cpu(kind, lines):
+    rnd = random.Random(42)
+    yield 'JAVA PROFILE 1.0.1, created Sat Feb 11 10:22:30 2012\n\n'
+    for i in range(lines // 10):
+        yield 'TRACE {0}:\n\tjava.lang.Object.wait(Object.java:Unknown line)\n'\
+              .format(300000 + i)
+    yield 'CPU {0} (ms) BEGIN (total = {1}) Sat Feb 11 10:22:30 2012\n'\
+          .format(kind, lines * 10)
+    yield 'rank   self  accum   count trace method\n'
+    for i in range(lines):
+        yield '{0:5} {1:5.2f}% {2:5.2f}% {3:7} {4} com.example.Class{5}.method\n'\
+              .format(i + 1, rnd.random(), rnd.random() * 100,
+                      rnd.randint(1, 100000), 300000 + i, i)
+    yield 'CPU {0} (ms) END\n'.format(kind)
+
+
+def sites(lines):
+    rnd = random.Random(42)
+    yield 'SITES BEGIN (ordered by live bytes) Sat Feb 11 10:22:30 2012\n'
+    yield '          percent          live          alloc\'ed  stack class\n'
+    yield ' rank   self  accum     bytes objs     bytes  objs trace name\n'
+    for i in range(lines):
+        yield '{0:5} {1:5.2f}% {2:5.2f}% {3:9} {4:4} {5:9} {6:5} {7} byte[]\n'\
+              .format(i + 1, rnd.random(), rnd.random() * 100,
+                      rnd.randint(1, 10 ** 6), rnd.randint(1, 1000),
+                      rnd.randint(1, 10 ** 7), rnd.randint(1, 10000),
+                      300000 + i)
+    yield 'SITES END\n'
+
+
+def bench(name, filter_, content):
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.writelines(content)
+    try:
+        size = os.path.getsize(f.name) / 2 ** 20
+        start = time.time()
+        filter_.run(hprof=[f.name])
+        duration = time.time() - start
+        print('{0:<28} {1:8.1f} MB {2:8.1f} MB/s'.format(name, size,
+                                                         size / duration))
+    finally:
+        os.remove(f.name)
+
+
+def main(lines=10 ** 6):
+    for columnar in (False, True):
+        suffix = ' (columnar)' if columnar else ''
+        bench('HProfCpuTimes' + suffix, HProfCpuTimes(columnar),
+              cpu('TIME', lines))
+        bench('HProfCpuSamples' + suffix, HProfCpuSamples(columnar),
+              cpu('SAMPLE', lines))
+        bench('HProfHeapSites' + suffix, HProfHeapSites(columnar),
+              sites(lines))
+        bench('HProfCpuSamples (traces)' + suffix,
+              HProfCpuSamples(columnar, traces=True), cpu('SAMPLE', lines))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Benchmarks the functions of ``penchy.statistics`` against the former pure
+Python implementations on series of 10^3 to 10^7 samples.
+
+Usage::
+
+    PYTHONPATH=. python dev/bench_statistics.py [max exponent]
+"""
+from __future__ import division, print_function
+
+import math
+import sys
+import timeit
+
+import numpy as np
+
+from penchy import statistics as stats
+
+
+def average(xs):
+    return sum(xs) / len(xs)
+
+
+def standard_deviation(xs, ddof):
+    avg = average(xs)
+    return math.sqrt(sum((x - avg) ** 2 for x in xs) / (len(xs) - ddof))
+
+
+def bench(name, function, repeat=3):
+    best = min(timeit.repeat(function, number=1, repeat=repeat))
+    print('  {0:<36} {1:10.4f} ms'.format(name, best * 1000))
+
+
+def main(max_exponent=7):
+    rnd = np.random.RandomState(42)
+    for exponent in range(3, max_exponent + 1):
+        n = 10 ** exponent
+        array = rnd.random_sample(n) * 1000
+        xs = array.tolist()
+        print('{0} samples'.format(n))
+        bench('average (former, list)', lambda: average(xs))
+        bench('average (list)', lambda: stats.average(xs))
+        bench('average (array)', lambda: stats.average(array))
+        bench('standard_deviation (former, list)',
+              lambda: standard_deviation(xs, 1))
+        bench('standard_deviation (list)',
+              lambda: stats.standard_deviation(xs, 1))
+        bench('standard_deviation (array)',
+              lambda: stats.standard_deviation(array, 1))
+
+        series = array.reshape(-1, 100)
+        bench('{0} x 100 series (former)'.format(len(series)),
+              lambda: [standard_deviation(s, 1) for s in series.tolist()])
+        bench('{0} x 100 series (batched)'.format(len(series)),
+              lambda: stats.standard_deviations(series, 1))
+
+    # catastrophic cancellation: large offset, small variance
+    xs = (1e9 + np.arange(10 ** 5) % 10).tolist()
+    print('variance of 1e9 + (0..9), exact: 8.25')
+    print('  former: {0!r}'.format(standard_deviation(xs, 0) ** 2))
+    print('  single pass: {0!r}'.format(stats.variance(xs, 0)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
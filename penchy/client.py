@@ -11,7 +11,8 @@ import logging
 import xmlrpclib
 import signal
 
-from penchy.util import load_config, load_job
+from penchy.util import load_config, load_job, get_config_attribute
+from penchy.jobs.typecheck import FULL, set_policy
 from penchy.log import configure_logging
 
 
@@ -29,6 +30,7 @@ class Client(object):
         :type args: list
         """
         self.config = load_config(config)
+        set_policy(get_config_attribute(self.config, 'TYPECHECK', FULL))
         job_module = load_job(job)
         self.identifier = identifier
         configure_logging(loglevel, logfile='penchy.log')
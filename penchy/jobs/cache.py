@@ -0,0 +1,338 @@
+"""
+This module provides a persistent cache for the outputs of pipeline elements.
+
+The cache is opt-in, it is used for a :class:`~penchy.jobs.job.Job` by passing
+an :class:`OutputCache` to it::
+
+    job = Job(compositions=[...],
+              server_flow=[...],
+              cache=OutputCache('~/.penchy/cache'))
+
+An element that is run on the same inputs with the same configuration as in a
+previous run is not run again, its outputs are loaded from the cache instead.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import errno
+import logging
+import os
+import pickle
+import threading
+import types
+from hashlib import sha1
+
+from penchy.compat import str, unicode, update_hasher
+from penchy.jobs.elements import PipelineElement, SystemFilter
+from penchy.jobs.table import is_array
+
+
+log = logging.getLogger(__name__)
+
+# attributes of elements that are not part of their configuration
+_STATE_ATTRIBUTES = frozenset(('out', 'hooks', 'check_policy'))
+
+
+class Uncacheable(Exception):
+    """
+    Signals that the outputs of an element can not be cached.
+    """
+    pass
+
+
+def cacheable(element):
+    """
+    Return if the outputs of ``element`` may be cached.
+
+    Elements with side effects (marked with ``SIDE_EFFECTS``), elements that
+    need the environment (:class:`~penchy.jobs.elements.SystemFilter`) and
+    elements with hooks are never cached.
+
+    :param element: element to check
+    :type element: :class:`~penchy.jobs.elements.PipelineElement`
+    :rtype: bool
+    """
+    return not (getattr(element, 'SIDE_EFFECTS', True)
+                or isinstance(element, SystemFilter)
+                or getattr(element, 'hooks', None))
+
+
+def fingerprint(element, kwargs):
+    """
+    Return the key of a run of ``element`` on ``kwargs``.
+
+    The key depends on the class of the element, its configuration (all
+    attributes except ``out``, ``hooks`` and ``check_policy``) and the
+    inputs.
+
+    :raises: :exc:`Uncacheable` if the configuration or the inputs contain
+             values that can not be identified across runs, such as functions
+    :param element: element to run
+    :type element: :class:`~penchy.jobs.elements.PipelineElement`
+    :param kwargs: inputs of the element
+    :type kwargs: dict
+    :returns: sha1 hexdigest
+    :rtype: str
+    """
+    hasher = sha1()
+    _update_element(hasher, element)
+    _update(hasher, kwargs)
+    return hasher.hexdigest()
+
+
+def _update_element(hasher, element):
+    """
+    Update ``hasher`` with the class and configuration of ``element``.
+    """
+    cls = element.__class__
+    update_hasher(hasher, '<{0}.{1}>'.format(cls.__module__, cls.__name__))
+    config = dict((name, value) for name, value in vars(element).items()
+                  if name not in _STATE_ATTRIBUTES)
+    _update(hasher, config)
+
+
+def _update(hasher, value):
+    """
+    Update ``hasher`` with ``value``.
+
+    :raises: :exc:`Uncacheable` if ``value`` can not be identified across runs
+    """
+    if value is None or isinstance(value, (bool, int, float, complex)):
+        update_hasher(hasher, '{0}:{1!r};'.format(type(value).__name__, value))
+    elif isinstance(value, (str, unicode)):
+        update_hasher(hasher, '{0}:{1};'.format(type(value).__name__,
+                                                 len(value)))
+        update_hasher(hasher, value)
+    elif isinstance(value, (list, tuple)):
+        update_hasher(hasher, '{0}:{1}['.format(type(value).__name__,
+                                                 len(value)))
+        for v in value:
+            _update(hasher, v)
+        update_hasher(hasher, ']')
+    elif isinstance(value, (set, frozenset)):
+        _update_unordered(hasher, 'set', (_digest(v) for v in value))
+    elif isinstance(value, dict):
+        _update_unordered(hasher, 'dict', (_digest(k) + _digest(v)
+                                          for k, v in value.items()))
+    elif is_array(value):
+        if value.dtype.kind == 'O':
+            _update(hasher, value.tolist())
+        else:
+            update_hasher(hasher, '<array {0}:{1}>'.format(value.dtype.str,
+                                                         value.shape))
+            update_hasher(hasher, value.tobytes())
+    elif isinstance(value, PipelineElement):
+        _update_element(hasher, value)
+    elif isinstance(value, type):
+        update_hasher(hasher, '<class {0}.{1}>'.format(value.__module__,
+                                                       value.__name__))
+    elif isinstance(value, types.FunctionType):
+        _update_function(hasher, value)
+    elif isinstance(value, (types.MethodType, types.BuiltinFunctionType)):
+        raise Uncacheable('{0!r} can not be identified across runs'
+                          .format(value))
+    elif callable(getattr(value, 'hash', None)):
+        # SystemComposition, JVM, NodeSetting etc.
+        update_hasher(hasher, '<{0}:{1}>'.format(type(value).__name__,
+                                                 value.hash()))
+    elif hasattr(value, 'descriptions'):
+        # Types
+        _update(hasher, value.descriptions)
+    else:
+        r = repr(value)
+        if ' at 0x' in r:
+            raise Uncacheable('{0} can not be identified across runs'
+                              .format(r))
+        update_hasher(hasher, r)
+
+
+def _update_function(hasher, function):
+    """
+    Update ``hasher`` with ``function``.
+
+    Functions are identified by their code, their default arguments and the
+    values they close over.
+    """
+    update_hasher(hasher, '<function {0}.{1}>'.format(function.__module__,
+                                                      function.__name__))
+    _update_code(hasher, function.__code__)
+    _update(hasher, function.__defaults__)
+    if function.__closure__:
+        _update(hasher, [cell.cell_contents for cell in function.__closure__])
+
+
+def _update_code(hasher, code):
+    """
+    Update ``hasher`` with the code object ``code``.
+    """
+    update_hasher(hasher, code.co_code)
+    _update(hasher, code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_code(hasher, const)
+        else:
+            _update(hasher, const)
+
+
+def _update_unordered(hasher, name, digests):
+    """
+    Update ``hasher`` with ``digests`` independent of their order.
+    """
+    digests = sorted(digests)
+    update_hasher(hasher, '{0}:{1}{{'.format(name, len(digests)))
+    for digest in digests:
+        update_hasher(hasher, digest)
+    update_hasher(hasher, '}')
+
+
+def _digest(value):
+    """
+    Return the hexdigest of ``value``.
+    """
+    hasher = sha1()
+    _update(hasher, value)
+    return hasher.hexdigest()
+
+
+class OutputCache(object):
+    """
+    A cache for the outputs of :class:`~penchy.jobs.elements.PipelineElement`
+    that is stored on disk.
+
+    If the size of all entries exceeds ``max_size``, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, directory, max_size=512 * 1024 * 1024):
+        """
+        :param directory: directory to store the cache entries in (will be
+                          created if it does not exist)
+        :type directory: str
+        :param max_size: maximal size of all entries in bytes
+        :type max_size: int
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def run(self, element, kwargs):
+        """
+        Run ``element`` on ``kwargs`` or load its outputs from the cache.
+
+        :param element: element to run
+        :type element: :class:`~penchy.jobs.elements.PipelineElement`
+        :param kwargs: inputs of the element
+        :type kwargs: dict
+        :returns: if the outputs were loaded from the cache
+        :rtype: bool
+        """
+        if not cacheable(element):
+            element.run(**kwargs)
+            return False
+
+        try:
+            key = fingerprint(element, kwargs)
+        except Uncacheable as e:
+            log.debug('Not caching {0}: {1}'.format(element, e))
+            element.run(**kwargs)
+            return False
+
+        out = self._load(key)
+        if out is not None:
+            log.info('Using cached outputs of {0}'.format(element))
+            element.reset()
+            element.out.update(out)
+            return True
+
+        element.run(**kwargs)
+        self._store(key, element)
+        return False
+
+    def _path(self, key):
+        """
+        Return the path of the entry for ``key``.
+        """
+        return os.path.join(self.directory, key)
+
+    def _load(self, key):
+        """
+        Return the cached outputs for ``key`` or ``None``.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                out = pickle.load(f)
+            # mark as recently used
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            log.exception('Dropping corrupted cache entry {0}'.format(path))
+            self._remove(path)
+            return None
+        return out
+
+    def _store(self, key, element):
+        """
+        Store the outputs of ``element`` as entry for ``key``.
+        """
+        path = self._path(key)
+        tmp = '{0}.{1}.tmp'.format(path, threading.current_thread().ident)
+        try:
+            data = pickle.dumps(dict(element.out), pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            log.debug('Outputs of {0} can not be pickled'.format(element))
+            return
+        if len(data) > self.max_size:
+            return
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.rename(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits into
+        ``max_size``.
+        """
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith('.tmp'):
+                    continue
+                path = self._path(name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            size = sum(entry[1] for entry in entries)
+            entries.sort()
+            for _, entry_size, path in entries:
+                if size <= self.max_size:
+                    break
+                self._remove(path)
+                size -= entry_size
+
+    def _remove(self, path):
+        """
+        Remove the entry at ``path``.
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            for name in os.listdir(self.directory):
+                self._remove(self._path(name))
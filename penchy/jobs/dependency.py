@@ -9,6 +9,7 @@ pipeline.
 """
 
 from penchy.compat import str, unicode
+from penchy.jobs.frozen import freeze
 
 
 class Edge(object):
@@ -131,13 +132,53 @@ class Pipeline(object):
         return self._edges
 
 
+#: maximal number of cached topological plans, see :func:`edgesort`
+PLAN_CACHE_SIZE = 128
+_plan_cache = {}
+
+
+def flow_fingerprint(starts, edges):
+    """
+    Return a hashable fingerprint of the flow described by ``starts`` and
+    ``edges``.
+
+    Elements are identified by their identity, the fingerprint therefore is
+    only valid as long as the elements are alive. Only ``starts`` that take
+    part in the flow are relevant for the fingerprint.
+
+    :param starts: Sequence of :class:`~penchy.jobs.elements.PipelineElement`
+                   that have no dependencies
+    :param edges: Sequence of :class:`~penchy.jobs.job.Edge`
+    :returns: fingerprint of the flow
+    :rtype: tuple
+    """
+    edge_print = tuple((id(edge.source), id(edge.sink),
+                        tuple(edge.map_) if edge.map_ is not None else None)
+                       for edge in edges)
+    nodes = set()
+    for source, sink, _ in edge_print:
+        nodes.add(source)
+        nodes.add(sink)
+    start_print = frozenset(id(start) for start in starts
+                            if id(start) in nodes)
+    return start_print, edge_print
+
+
 def edgesort(starts, edges):
     """
     Return the topological sorted elements of ``edges``.
 
     ``starts`` won't be included.
 
-    :raises: :exc:`ValueError` if no topological sort is possible
+    The sort is linear in the number of elements and edges (Kahn's algorithm).
+    The edges of a sink are kept together in the order in which they were
+    passed.  Plans are cached per flow fingerprint (see
+    :func:`flow_fingerprint`), so flows shared by several compositions are only
+    sorted once.
+
+    :raises: :exc:`ValueError` if no topological sort is possible, the message
+             names the elements that are part of a cycle or that are never
+             resolved
     :param starts: Sequence of :class:`~penchy.jobs.elements.PipelineElement`
                    that have no dependencies
     :param edges: Sequence of :class:`~penchy.jobs.job.Edge`
@@ -145,38 +186,220 @@ def edgesort(starts, edges):
               :class:`~penchy.jobs.elements.PipelineElement` and sorted list of
               corresponding :class:`~penchy.jobs.job.Edge`
     """
-    resolved = set(starts)
+    edges = list(edges)
+    key = flow_fingerprint(starts, edges)
+    try:
+        order, edge_order, _ = _plan_cache[key]
+    except KeyError:
+        order, edge_order = _kahn(starts, edges)
+        if len(_plan_cache) >= PLAN_CACHE_SIZE:
+            _plan_cache.clear()
+        # keep starts and edges (and therefore all elements) alive as long
+        # as the plan is cached to keep the identities in the key valid
+        _plan_cache[key] = (order, edge_order, (list(starts), edges))
+
+    return list(order), list(edge_order)
+
+
+def _kahn(starts, edges):
+    """
+    Sort ``edges`` topologically with Kahn's algorithm.
+
+    See :func:`edgesort` for parameters and return values.
+    """
+    resolved = set(id(start) for start in starts)
+    # incoming edges per sink and outgoing sinks per source, both in the order
+    # of ``edges``
+    incoming = {}
+    outgoing = {}
+    elements = {}
+    for edge in edges:
+        source, sink = edge.source, edge.sink
+        elements[id(source)] = source
+        elements[id(sink)] = sink
+        if id(sink) in resolved:
+            # edges to a start are never followed
+            continue
+        incoming.setdefault(id(sink), []).append(edge)
+        outgoing.setdefault(id(source), []).append(sink)
+
+    pending = dict((sink, len(set(id(e.source) for e in sink_edges)))
+                   for sink, sink_edges in incoming.items())
+
     order = []
     edge_order = []
-    edges = list(edges)
-    old_edges = []
-    while True:
-        if not edges:
-            return order, edge_order
+    resolved_starts = set()
+    ready = []
+    for start in starts:
+        if id(start) in outgoing and id(start) not in resolved_starts:
+            resolved_starts.add(id(start))
+            ready.append(start)
+    i = 0
+    while i < len(ready):
+        current = ready[i]
+        i += 1
+        if id(current) not in resolved:
+            resolved.add(id(current))
+            order.append(current)
+            edge_order.extend(incoming[id(current)])
+        seen = set()
+        for sink in outgoing.get(id(current), ()):
+            # a source may be connected several times to the same sink
+            if id(sink) in seen:
+                continue
+            seen.add(id(sink))
+            pending[id(sink)] -= 1
+            if pending[id(sink)] == 0:
+                ready.append(sink)
+
+    if len(order) != len(incoming):
+        cycle = _find_cycle(incoming, resolved)
+        if cycle:
+            msg = 'no topological sort possible, cycle: {0}'.format(
+                ' >> '.join(repr(elements[e]) for e in cycle))
+        else:
+            roots = [elements[e] for e in outgoing
+                     if e not in resolved and e not in incoming]
+            msg = 'no topological sort possible, not resolvable: {0}'.format(
+                ', '.join(repr(e) for e in roots))
+        raise ValueError(msg)
 
-        if edges == old_edges:
-            raise ValueError("no topological sort possible")
+    return order, edge_order
 
-        for target in set(edge.sink for edge in edges):
-            current = [edge for edge in edges if edge.sink is target]
-            if all(edge.source in resolved for edge in current):
-                resolved.add(target)
-                order.append(target)
-                edge_order.extend(current)
 
-        old_edges = list(edges)
-        edges = [edge for edge in edges if edge.sink not in resolved]
+def _find_cycle(incoming, resolved):
+    """
+    Return a cycle among the unresolved elements or ``None``.
 
+    Performs an iterative depth first search along the incoming edges of all
+    unresolved sinks.
 
-def build_keys(edges):
+    :param incoming: mapping of sink ids to their incoming edges
+    :param resolved: ids of resolved elements
+    :returns: ids of elements that form a cycle in flow direction, the first
+              one is repeated at the end
+    :rtype: list or None
+    """
+    visiting, done = 1, 2
+    state = {}
+    for root in incoming:
+        if root in resolved or root in state:
+            continue
+        state[root] = visiting
+        path = [root]
+        stack = [iter(incoming[root])]
+        while stack:
+            for edge in stack[-1]:
+                source = id(edge.source)
+                if source in resolved or source not in incoming:
+                    continue
+                if state.get(source) == visiting:
+                    # the path follows the edges backwards
+                    cycle = path[path.index(source):]
+                    cycle.reverse()
+                    return cycle + [cycle[0]]
+                if source not in state:
+                    state[source] = visiting
+                    path.append(source)
+                    stack.append(iter(incoming[source]))
+                    break
+            else:
+                state[path.pop()] = done
+                stack.pop()
+    return None
+
+
+def has_effects(element):
+    """
+    Return if running ``element`` has effects besides setting its outputs.
+
+    That is the case if the element is marked with ``SIDE_EFFECTS`` or has
+    hooks.
+
+    :param element: element to check
+    :type element: :class:`~penchy.jobs.elements.PipelineElement`
+    :rtype: bool
+    """
+    return bool(getattr(element, 'SIDE_EFFECTS', False)
+                or getattr(element, 'hooks', None))
+
+
+def prune(edges):
+    """
+    Remove the edges whose sinks don't contribute to an element with effects
+    (see :func:`has_effects`).
+
+    The live elements are found by walking backwards from all sinks with
+    effects; the order of ``edges`` is kept.
+
+    :param edges: Sequence of :class:`~penchy.jobs.job.Edge`
+    :returns: pair of the live edges and the pruned sinks
+    :rtype: tuple of lists
+    """
+    incoming = {}
+    for edge in edges:
+        incoming.setdefault(id(edge.sink), []).append(edge)
+
+    live = set()
+    stack = [edge.sink for edge in edges if has_effects(edge.sink)]
+    while stack:
+        element = stack.pop()
+        if id(element) in live:
+            continue
+        live.add(id(element))
+        stack.extend(edge.source for edge in incoming.get(id(element), ()))
+
+    live_edges = []
+    pruned = []
+    seen = set()
+    for edge in edges:
+        if id(edge.sink) in live:
+            live_edges.append(edge)
+        elif id(edge.sink) not in seen:
+            seen.add(id(edge.sink))
+            pruned.append(edge.sink)
+
+    return live_edges, pruned
+
+
+def shared_outputs(edges):
+    """
+    Return the outputs that are passed to more than one input by ``edges``.
+
+    :param edges: edges of a flow
+    :type edges: list of :class:`Edge`
+    :returns: pairs of the id of the source and the name of the output
+    :rtype: set
+    """
+    seen = set()
+    shared = set()
+    for edge in edges:
+        if edge.map_ is None:
+            outputs = edge.source._output_names
+        else:
+            outputs = [output for output, _ in edge.map_]
+        for output in outputs:
+            key = (id(edge.source), output)
+            if key in seen:
+                shared.add(key)
+            seen.add(key)
+    return shared
+
+
+def build_keys(edges, shared=()):
     """
     Return dictionary that maps the the sink's inputs to the outputs of all its
     sources.
 
     All ``edges`` must have the identical sink.
 
+    Outputs in ``shared`` are frozen (see :func:`~penchy.jobs.frozen.freeze`)
+    before they are passed on.
+
     :param edges: iterable of :class:`~penchy.jobs.job.Edge`
-    :param generic: is this sink a :class:`~penchy.jobs.elements.GenericFilter`
+    :param shared: outputs that are passed to more than one input, as
+                   returned by :func:`shared_outputs`
+    :type shared: set
     :returns: dictionary that contains the mapping of sink arguments to all
               wired sources' output
     :rtype: dict of strings to values
@@ -191,10 +414,14 @@ def build_keys(edges):
         sink = edge.sink
 
         if edge.map_ is None:
-            for key in edge.source._output_names:
-                keys[key] = edge.source.out[key]
+            mapping = [(key, key) for key in edge.source._output_names]
         else:
-            for output, input_ in edge.map_:
-                keys[input_] = edge.source.out[output]
+            mapping = edge.map_
+        for output, input_ in mapping:
+            value = edge.source.out[output]
+            if (id(edge.source), output) in shared:
+                # freeze in place, so that all receivers share the frozen value
+                value = edge.source.out[output] = freeze(value)
+            keys[input_] = value
 
     return keys
@@ -37,8 +37,35 @@ class PipelineElement(object):
 
     A :class:`PipelineElement` must call ``PipelineElement.__init__`` on its
     initialization.
+
+    ``THREADSAFE`` marks if the element may run concurrently to other
+    elements in a parallel pipeline execution (see
+    :func:`~penchy.jobs.executor.execute`), elements that are not threadsafe
+    are serialized.
+
+    ``SIDE_EFFECTS`` marks if running the element has effects besides
+    setting ``out`` (such as writing files or sending data); the outputs of
+    those elements are never cached (see :mod:`penchy.jobs.cache`).
+
+    ``DYNAMIC_TYPES`` marks if the outputs of the element may differ from
+    ``outputs`` (e.g. because they are computed by a user-supplied
+    function). The inputs of those elements are always checked at runtime,
+    the inputs of other elements only if the types of their sources do not
+    prove them (see :func:`~penchy.jobs.typecheck.infer`).
+
+    ``MUTATES_INPUT`` marks if the element modifies its inputs. Inputs that
+    are shared with other elements are read-only (see
+    :mod:`penchy.jobs.frozen`), those elements receive copies of them.
+
+    ``check_policy`` is the policy for checking the inputs (see
+    :func:`~penchy.jobs.typecheck.set_policy`), ``None`` for the default.
     """
     DEPENDENCIES = set()
+    THREADSAFE = True
+    SIDE_EFFECTS = False
+    DYNAMIC_TYPES = False
+    MUTATES_INPUT = False
+    check_policy = None
     inputs = Types()
     outputs = Types()
 
@@ -51,7 +78,7 @@ class PipelineElement(object):
         """
         Run element with hooks.
         """
-        self.inputs.check_input(kwargs)
+        self.inputs.check_input(kwargs, self.check_policy)
         for hook in self.hooks:
             hook.setup()
 
@@ -145,6 +172,19 @@ class Tool(NotRunnable, PipelineElement):
         """
         raise NotImplementedError("Tools must implement this")
 
+    def jvm_arguments(self, jvm):
+        """
+        Return the arguments the jvm ``jvm`` has to include to use the tool.
+
+        Tools whose arguments depend on the JVM override this, by default
+        it returns :attr:`arguments`.
+
+        :param jvm: the jvm that runs the tool
+        :type jvm: :class:`~penchy.jobs.jvms.JVM`
+        :rtype: list of str
+        """
+        return self.arguments
+
     def __str__(self):  # pragma: no cover
         return self.name
 
@@ -0,0 +1,161 @@
+"""
+This module provides the execution of sorted pipelines.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import heapq
+import logging
+import sys
+import threading
+from itertools import groupby
+
+
+log = logging.getLogger(__name__)
+
+# serializes all elements that are not marked as ``THREADSAFE``
+_serial_lock = threading.Lock()
+
+
+def group_sinks(edge_order):
+    """
+    Return the sinks of ``edge_order`` together with their incoming edges.
+
+    Sinks are distinguished by identity, not by equality.
+
+    :param edge_order: sorted edges as returned by
+                       :func:`~penchy.jobs.dependency.edgesort`
+    :type edge_order: list of :class:`~penchy.jobs.dependency.Edge`
+    :returns: pairs of sink and its edges in topological order
+    :rtype: list of tuple
+    """
+    groups = [list(edges) for _, edges
+              in groupby(edge_order, lambda edge: id(edge.sink))]
+    return [(edges[0].sink, edges) for edges in groups]
+
+
+def execute(edge_order, run, workers=1):
+    """
+    Execute the sinks of ``edge_order`` by calling ``run(sink, edges)``.
+
+    With more than one worker, every sink is dispatched to a pool of threads
+    as soon as all of its sources have finished.  Elements that are not marked
+    as ``THREADSAFE`` never run concurrently to each other.
+
+    The execution is deterministic with respect to its errors: if sinks fail,
+    the error of the sink that comes first in ``edge_order`` is raised, as it
+    would have been in a sequential execution.  Sinks that come after a
+    failed sink are not started.
+
+    :param edge_order: sorted edges as returned by
+                       :func:`~penchy.jobs.dependency.edgesort`
+    :type edge_order: list of :class:`~penchy.jobs.dependency.Edge`
+    :param run: function that runs a sink with its incoming edges
+    :type run: callable
+    :param workers: maximal count of sinks that run at the same time
+    :type workers: int
+    """
+    plan = group_sinks(edge_order)
+    if workers <= 1 or len(plan) <= 1:
+        for sink, edges in plan:
+            run(sink, edges)
+        return
+
+    _Scheduler(plan, run).execute(min(workers, len(plan)))
+
+
+class _Scheduler(object):
+    """
+    Dispatches the sinks of a plan to worker threads.
+    """
+
+    def __init__(self, plan, run):
+        """
+        :param plan: pairs of sink and incoming edges in topological order
+        :type plan: list of tuple
+        :param run: function that runs a sink with its incoming edges
+        :type run: callable
+        """
+        self.plan = plan
+        self.run = run
+        self.condition = threading.Condition()
+        self.running = 0
+        # index in plan -> exception of failed sinks
+        self.errors = {}
+
+        index = dict((id(sink), i) for i, (sink, _) in enumerate(plan))
+        self.dependents = [[] for _ in plan]
+        self.pending = []
+        for i, (_, edges) in enumerate(plan):
+            sources = set(index[id(edge.source)] for edge in edges
+                          if id(edge.source) in index)
+            self.pending.append(len(sources))
+            for source in sources:
+                self.dependents[source].append(i)
+        self.ready = [i for i, count in enumerate(self.pending) if count == 0]
+        heapq.heapify(self.ready)
+
+    def execute(self, workers):
+        """
+        Execute the plan with ``workers`` threads.
+
+        :param workers: count of threads
+        :type workers: int
+        """
+        threads = [threading.Thread(target=self._work)
+                   for _ in range(workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            raise self.errors[min(self.errors)]
+
+    def _next(self):
+        """
+        Return the index of the next sink to run or ``None`` if there is
+        nothing left to do for this worker.
+        """
+        with self.condition:
+            while True:
+                first_error = min(self.errors) if self.errors else len(self.plan)
+                if self.ready and self.ready[0] < first_error:
+                    self.running += 1
+                    return heapq.heappop(self.ready)
+                if not self.running:
+                    self.condition.notify_all()
+                    return None
+                self.condition.wait()
+
+    def _work(self):
+        """
+        Run sinks until the plan is executed or failed.
+        """
+        while True:
+            i = self._next()
+            if i is None:
+                return
+
+            sink, edges = self.plan[i]
+            error = None
+            try:
+                if getattr(sink, 'THREADSAFE', True):
+                    self.run(sink, edges)
+                else:
+                    with _serial_lock:
+                        self.run(sink, edges)
+            except Exception:
+                error = sys.exc_info()[1]
+
+            with self.condition:
+                self.running -= 1
+                if error is not None:
+                    self.errors[i] = error
+                else:
+                    for dependent in self.dependents[i]:
+                        self.pending[dependent] -= 1
+                        if not self.pending[dependent]:
+                            heapq.heappush(self.ready, dependent)
+                self.condition.notify_all()
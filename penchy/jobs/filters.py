@@ -4,6 +4,11 @@ This module provides filters.
 Inputs are fed to filters via keywords in the ``run`` method.
 Outputs are available via the ``out`` attribute.
 
+Filters that parse large outputs take the parameter ``columnar``, if it is
+set their numeric columns are arrays on the server; on the clients, and so
+after :class:`Send`, they are lists until a :class:`Receive` with
+``columnar=True`` turns them into arrays again (see :mod:`penchy.jobs.table`).
+
  .. moduleauthor:: Michael Markert <markert.michael@googlemail.com>
  .. moduleauthor:: Pascal Wittmann <mail@pascal-wittmann.de>
  .. moduleauthor:: Fabian Hirschmann <fabian@hirschm.net>
@@ -13,6 +18,7 @@ Outputs are available via the ``out`` attribute.
 """
 from __future__ import division
 
+import bisect
 import json
 import logging
 import os
@@ -20,13 +26,19 @@ import re
 import shutil
 import math
 import csv
+import heapq
 import operator
+from multiprocessing import Pool
 from pprint import pprint
 
 from penchy import __version__
-from penchy.compat import str, path, unicode, try_unicode, write, reduce
+from penchy.compat import str, path, unicode, try_unicode, write, reduce, on_python3
 from penchy.jobs.dependency import Pipeline
 from penchy.jobs.elements import Filter, SystemFilter
+from penchy.jobs import heapdump, parsing, valgrind
+from penchy.jobs.frozen import thaw
+from penchy.jobs.table import (column, encode, is_array, sort_order, tocolumns,
+                               tolist)
 from penchy.jobs.typecheck import Types, TypeCheckError
 import penchy.util as util
 import penchy.statistics as stats
@@ -70,6 +82,11 @@ class Tamiflex(Filter):
         tamiflex = filters.Tamiflex()
         composition.flow = [jvm.tool >> tamiflex >> 'kind' > ...]
 
+    The names of classes and methods are repeated many times in a log. If
+    ``interned`` is set, every distinct string of a log is stored once in
+    ``strings`` and the columns are the indices of their values in
+    ``strings`` (arrays on the server, see :mod:`penchy.jobs.table`), i.e.
+    the value of ``name`` in row ``i`` is ``strings[name[i]]``.
 
     Inputs:
 
@@ -86,6 +103,7 @@ class Tamiflex(Filter):
                 took place (maybe empty)
     - ``optional``: optionally additional information, such as
                     the accessibility status of the member in question
+    - ``strings``: the distinct strings of the log (only if ``interned``)
     """
     inputs = Types(('reflection_log', list, path))
     outputs = Types(('kind', list, list, str),
@@ -94,6 +112,20 @@ class Tamiflex(Filter):
                     ('line', list, list, str),
                     ('optional', list, list, str))
 
+    _COLUMNS = ('kind', 'name', 'parent_name', 'line', 'optional')
+
+    def __init__(self, interned=False):
+        """
+        :param interned: output the columns as indices of the distinct
+                         strings of each log
+        :type interned: bool
+        """
+        super(Tamiflex, self).__init__()
+        self.interned = interned
+        if interned:
+            self.outputs = Types(('strings', list, list, str),
+                                 *[(name, list, list, int) for name in self._COLUMNS])
+
     def _run(self, **kwargs):
         files = kwargs['reflection_log']
 
@@ -101,17 +133,86 @@ class Tamiflex(Filter):
             if not os.path.getsize(f):
                 raise WrongInputError("The reflection log is empty")
             with open(f) as fobj:
-                data = {'kind': [], 'name': [], 'parent_name': [],
-                        'line': [], 'optional': []}
-                tamiflex_reader = csv.reader(fobj, delimiter=';')
-                for row in tamiflex_reader:
-                    if len(row) != len(data):
-                        raise WrongInputError("The reflection log is malformed: {0}".format(row))
-                    for value, name in zip(row, data):
-                        data[name].append(value)
+                lines = fobj.read().splitlines()
+
+            rows = [line.split(';') for line in lines]
+            for row in rows:
+                if len(row) != len(self._COLUMNS):
+                    raise WrongInputError("The reflection log is malformed: {0}".format(row))
+            data = zip(*rows)
+
+            if not self.interned:
+                for name, values in zip(self._COLUMNS, data):
+                    self.out[name].append(list(values))
+                continue
+
+            # string -> index in ``strings``
+            table = {}
+            for name, values in zip(self._COLUMNS, data):
+                codes = [table.setdefault(v, len(table)) for v in values]
+                self.out[name].append(column(codes, int))
+            strings = [None] * len(table)
+            for string, index in table.items():
+                strings[index] = string
+            self.out['strings'].append(strings)
+
+
+class ReflectionCallSites(Filter):
+    """
+    Dedupes the reflective call sites of the interned reflection logs of
+    many invocations (see :class:`Tamiflex`).
+
+    A call site is identified by the kind of the call, the name of the
+    called member and the method and line of the call. The call sites are
+    emitted ordered by their values, together with the count of
+    invocations in which they occur.
 
-                for key, val in data.items():
-                    self.out[key].append(val)
+    Example::
+
+        tamiflex = filters.Tamiflex(interned=True)
+        sites = filters.ReflectionCallSites()
+        composition.flow = [jvm.tool >> tamiflex >>
+                            ['strings', 'kind', 'name', 'parent_name', 'line'] >>
+                            sites >> ...]
+
+    Inputs:
+
+    - ``strings``: distinct strings of each log
+    - ``kind``, ``name``, ``parent_name``, ``line``: indices of the values
+      of each log in its ``strings``
+
+    Outputs:
+
+    - ``kind``, ``name``, ``parent_name``, ``line``: values of the call sites
+    - ``invocations``: count of invocations in which a call site occurs
+    """
+    _COLUMNS = ('kind', 'name', 'parent_name', 'line')
+
+    inputs = Types(('strings', list, list, (str, unicode)),
+                   *[(name, list, list, int) for name in _COLUMNS])
+    outputs = Types(('invocations', list, int),
+                    *[(name, list, (str, unicode)) for name in _COLUMNS])
+
+    def _run(self, **kwargs):
+        # string -> index in ``strings`` of all invocations
+        table = {}
+        # call site -> count of invocations
+        counts = {}
+
+        for invocation in zip(kwargs['strings'], *[kwargs[name] for name in self._COLUMNS]):
+            local = [table.setdefault(string, len(table)) for string in invocation[0]]
+            seen = set(zip(*[[local[i] for i in tolist(codes)]
+                             for codes in invocation[1:]]))
+            for site in seen:
+                counts[site] = counts.get(site, 0) + 1
+
+        strings = [None] * len(table)
+        for string, index in table.items():
+            strings[index] = string
+        for site in sorted(counts, key=lambda site: [strings[i] for i in site]):
+            for name, index in zip(self._COLUMNS, site):
+                self.out[name].append(strings[index])
+            self.out['invocations'].append(counts[site])
 
 
 class HProf(Filter):
@@ -148,7 +249,12 @@ class HProf(Filter):
     _PARSED_TYPES = (int, float)
     inputs = Types(('hprof', list, path))
 
-    def __init__(self, outputs, start_marker, end_marker, skip, data_re, start_re=None):
+    # a stack trace and its frames (one per line, indented by a tab)
+    _TRACE_RE = re.compile(parsing.to_bytes(r'^TRACE (\d+):[^\n]*\n((?:\t[^\n]*\n?)*)'),
+                           re.MULTILINE)
+
+    def __init__(self, outputs, start_marker, end_marker, skip, data_re, start_re=None,
+                 columnar=False, traces=False):
         """
         :param outputs: outputs of the filter
         :type outputs: :class:`~penchy.jobs.typecheck.Types`
@@ -162,6 +268,10 @@ class HProf(Filter):
         :type data_re: ``re``
         :param start_re: regular expression to extract information out of the first line
         :type start_re: ``re``
+        :param columnar: output the numeric columns of each file as arrays
+        :type columnar: bool
+        :param traces: parse the stack traces (see :meth:`_traces`)
+        :type traces: bool
         """
         super(HProf, self).__init__()
         self.outputs = outputs
@@ -170,6 +280,10 @@ class HProf(Filter):
         self.start_re = start_re
         self.data_re = data_re
         self.skip = skip
+        self.columnar = columnar
+        self.traces = traces
+        # matches whole lines of the memory-mapped file
+        self._lines_re = parsing.compile_lines(data_re) if data_re is not None else None
 
         # Names of 1 dimensional outputs
         self.names1d = [k for k, d in self.outputs.descriptions.items() if len(d) == 2]
@@ -180,60 +294,99 @@ class HProf(Filter):
         # Names of 2 dimensional outputs
         self.names2d = [k for k, d in self.outputs.descriptions.items() if len(d) == 3]
 
+        if traces:
+            self.outputs = Types(*[(k,) + d for k, d in outputs.descriptions.items()] +
+                                 [('frames', list, list, str),
+                                  ('trace_ids', list, list, int),
+                                  ('trace_frames', list, list, list, int)])
+
     def _run(self, **kwargs):
         files = kwargs['hprof']
+        converters = dict((name, parsing.converter(
+                           self.outputs.descriptions[name][-1]))
+                          for name in self.names2d)
 
         for f in files:
-            data = dict((name, []) for name in self.names2d)
-
-            with open(f) as fobj:
-                for line in fobj:
-                    if line.startswith(self.start_marker):
-                        # Extract information from the start marker
-                        if self.start_re is not None:
-                            s = self.start_re.search(line)
-                            if s is None:
-                                log.error('Received invalid input:\n{0}'.format(line))
-                                raise WrongInputError('Received invalid input.')
-                            start_value = s.groups()[0]
-                            name = self.names1d[0]
-                            type_ = self.outputs.descriptions[name][-1]
-                            value = type_(start_value) \
-                                    if issubclass(type_, HProf._PARSED_TYPES) \
-                                    else start_value
-                            self.out[name].append(value)
-                        break
-                # We did not break, i.e. no begin marker was found
-                else:
-                    raise WrongInputError("Marker {0} not found.".format(self.start_marker))
-
-                # Jump over the heading
-                for _ in range(self.skip):
-                    next(fobj)
-
-                for line in fobj:
-                    if line.startswith(self.end_marker):
-                        break
-                    m = self.data_re.match(line)
-                    if m is None:
-                        log.error('Received invalid input:\n{0}'.format(line))
-                        raise WrongInputError('Received invalid input.')
-                    result = self.data_re.match(line).groupdict()
-
-                    # Cast and save the extracted values
-                    for name in self.names2d:
-                        type_ = self.outputs.descriptions[name][-1]
-                        value = type_(result[name]) \
-                                if issubclass(type_, HProf._PARSED_TYPES) \
-                                else result[name]
-                        data[name].append(value)
-
-                # We did not break, i.e. no end marker was found
-                else:
-                    raise WrongInputError("Marker {0} not found.".format(self.end_marker))
-
-                for key, val in data.items():
-                    self.out[key].append(val)
+            with parsing.mapped(f) as buf:
+                try:
+                    first_line, start, end = parsing.find_section(
+                        buf, self.start_marker, self.end_marker, self.skip)
+                    result = parsing.match_lines(self._lines_re, buf, start, end)
+                    if self.traces:
+                        frames, ids, trace_frames = self._traces(buf)
+                except parsing.MarkerNotFound as e:
+                    raise WrongInputError(e.args[0])
+                except parsing.InvalidLine as e:
+                    log.error(e)
+                    raise WrongInputError('Received invalid input.')
+
+            # Extract information from the start marker
+            if self.start_re is not None:
+                line = parsing.native(first_line)
+                s = self.start_re.search(line)
+                if s is None:
+                    log.error('Received invalid input:\n{0}'.format(line))
+                    raise WrongInputError('Received invalid input.')
+                start_value = s.groups()[0]
+                name = self.names1d[0]
+                type_ = self.outputs.descriptions[name][-1]
+                value = type_(start_value) \
+                        if issubclass(type_, HProf._PARSED_TYPES) \
+                        else start_value
+                self.out[name].append(value)
+
+            # Cast and save the extracted values
+            for name in self.names2d:
+                val = converters[name](result[name])
+                if self.columnar and issubclass(self.outputs.descriptions[name][-1],
+                                                HProf._PARSED_TYPES):
+                    val = column(val)
+                self.out[name].append(val)
+
+            if self.traces:
+                self.out['frames'].append(frames)
+                self.out['trace_ids'].append(ids)
+                self.out['trace_frames'].append(trace_frames)
+
+    def _traces(self, buf):
+        """
+        Parse the stack traces (``TRACE n:`` followed by its frames) of
+        ``buf``.
+
+        The frames are interned: every distinct frame is stored once in the
+        frame table and the traces refer to it by the index of the frame.
+        A trace that is written more than once (e.g. for every dump) is
+        returned only once.
+
+        :param buf: the hprof output
+        :type buf: bytes or :class:`mmap.mmap`
+        :returns: the frame table, the ids of the traces and the indices of
+                  the frames of each trace (innermost frame first)
+        :rtype: tuple of lists
+        """
+        newline, tab = parsing.to_bytes('\n'), parsing.to_bytes('\t')
+        frames, ids, trace_frames = [], [], []
+        # frame -> index in ``frames``
+        table = {}
+        seen = set()
+        for id_, block in self._TRACE_RE.findall(buf):
+            id_ = int(id_)
+            if id_ in seen:
+                continue
+            seen.add(id_)
+            indices = []
+            for frame in block.split(newline):
+                if not frame:
+                    continue
+                frame = frame.lstrip(tab)
+                index = table.get(frame)
+                if index is None:
+                    index = table[frame] = len(frames)
+                    frames.append(parsing.native(frame))
+                indices.append(index)
+            ids.append(id_)
+            trace_frames.append(indices)
+        return frames, ids, trace_frames
 
 
 class HProfCpuTimes(HProf):
@@ -262,6 +415,13 @@ class HProfCpuTimes(HProf):
     - ``count``: How often this method was entered
     - ``trace``: Stack trace number
     - ``method``: Absolute method name
+
+    Outputs if ``traces`` is set (see :class:`TopTraces`):
+
+    - ``frames``: table of the distinct stack frames
+    - ``trace_ids``: stack trace numbers
+    - ``trace_frames``: indices of the frames (in ``frames``) of each stack
+      trace, innermost frame first
     """
     outputs = Types(('total', list, int),
                     ('rank', list, list, int),
@@ -281,13 +441,21 @@ class HProfCpuTimes(HProf):
        \s+(?P<method>[^\s]+)
        """, re.VERBOSE)
 
-    def __init__(self):
+    def __init__(self, columnar=False, traces=False):
+        """
+        :param columnar: output the numeric columns of each file as arrays
+        :type columnar: bool
+        :param traces: parse the stack traces, too
+        :type traces: bool
+        """
         super(HProfCpuTimes, self).__init__(outputs=self.outputs,
                                             start_marker='CPU TIME (ms) BEGIN',
                                             end_marker='CPU TIME (ms) END',
                                             skip=1,
                                             data_re=HProfCpuTimes._DATA_RE,
-                                            start_re=HProfCpuTimes._TOTAL_RE)
+                                            start_re=HProfCpuTimes._TOTAL_RE,
+                                            columnar=columnar,
+                                            traces=traces)
 
 
 class HProfCpuSamples(HProf):
@@ -316,6 +484,13 @@ class HProfCpuSamples(HProf):
     - ``count``: How often a stack trace was active
     - ``trace``: Stack trace number
     - ``method``: Absolute method name
+
+    Outputs if ``traces`` is set (see :class:`TopTraces`):
+
+    - ``frames``: table of the distinct stack frames
+    - ``trace_ids``: stack trace numbers
+    - ``trace_frames``: indices of the frames (in ``frames``) of each stack
+      trace, innermost frame first
     """
     outputs = Types(('total', list, int),
                     ('rank', list, list, int),
@@ -327,7 +502,7 @@ class HProfCpuSamples(HProf):
 
     _TOTAL_RE = re.compile('total = (\d+)')
     _DATA_RE = re.compile("""
-       \s+(?P<rank>\d+)
+       \s*(?P<rank>\d+)
        \s+(?P<selftime>\d+\.\d{2})%
        \s+(?P<accum>\d+\.\d{2})%
        \s+(?P<count>\d+)
@@ -335,13 +510,21 @@ class HProfCpuSamples(HProf):
        \s+(?P<method>[^\s]+)
        """, re.VERBOSE)
 
-    def __init__(self):
+    def __init__(self, columnar=False, traces=False):
+        """
+        :param columnar: output the numeric columns of each file as arrays
+        :type columnar: bool
+        :param traces: parse the stack traces, too
+        :type traces: bool
+        """
         super(HProfCpuSamples, self).__init__(outputs=self.outputs,
                                             start_marker='CPU SAMPLE (ms) BEGIN',
                                             end_marker='CPU SAMPLE (ms) END',
                                             skip=1,
                                             data_re=HProfCpuSamples._DATA_RE,
-                                            start_re=HProfCpuSamples._TOTAL_RE)
+                                            start_re=HProfCpuSamples._TOTAL_RE,
+                                            columnar=columnar,
+                                            traces=traces)
 
 
 class HProfHeapSites(HProf):
@@ -374,6 +557,13 @@ class HProfHeapSites(HProf):
     - ``alloc_objs``: number of allocated objects at the given site
     - ``trace``: stack trace number
     - ``class``: class name
+
+    Outputs if ``traces`` is set (see :class:`TopTraces`):
+
+    - ``frames``: table of the distinct stack frames
+    - ``trace_ids``: stack trace numbers
+    - ``trace_frames``: indices of the frames (in ``frames``) of each stack
+      trace, innermost frame first
     """
     outputs = Types(('rank', list, list, int),
                     ('self', list, list, float),
@@ -386,22 +576,741 @@ class HProfHeapSites(HProf):
                     ('class', list, list, str))
 
     _DATA_RE = re.compile("""
-       \s+(?P<rank>\d+)
+       \s*(?P<rank>\d+)
        \s+(?P<self>\d+\.\d{2})%
        \s+(?P<accum>\d+\.\d{2})%
        \s+(?P<live_bytes>\d+)
        \s+(?P<live_objs>\d+)
        \s+(?P<alloc_bytes>\d+)
        \s+(?P<alloc_objs>\d+)
+       \s+(?P<trace>\d+)
        \s+(?P<class>[^\s]+)
        """, re.VERBOSE)
 
-    def __init__(self):
+    def __init__(self, columnar=False, traces=False):
+        """
+        :param columnar: output the numeric columns of each file as arrays
+        :type columnar: bool
+        :param traces: parse the stack traces, too
+        :type traces: bool
+        """
         super(HProfHeapSites, self).__init__(outputs=self.outputs,
                                             start_marker='SITES BEGIN',
                                             end_marker='SITES END',
                                             skip=2,
-                                            data_re=HProfHeapSites._DATA_RE)
+                                            data_re=HProfHeapSites._DATA_RE,
+                                            columnar=columnar,
+                                            traces=traces)
+
+
+class HProfHeapDump(Filter):
+    """
+    Filters binary heap dumps of hprof (``heap=dump,format=b``) into a
+    histogram of the classes, ordered by the shallow size.
+
+    The dumps are memory-mapped and parsed in bounded memory (see
+    :mod:`penchy.jobs.heapdump`).
+
+    Example::
+
+        # This example shows only the relevant parts.
+        # Assume ``composition`` is a valid SystemComposition.
+        jvm = jvms.JVM('...')
+        jvm.tool = tools.HProf('heap=dump,format=b')
+        dump = filters.HProfHeapDump()
+        composition.flow = [jvm.tool >> dump >> "class" >> ...]
+
+    Inputs:
+
+    - ``hprof``: Path to the heap dump
+
+    Outputs:
+
+    - ``class``: class name (arrays of primitive types are named e.g. ``int[]``)
+    - ``instances``: number of instances of the class
+    - ``shallow_size``: size of the fields or elements of all instances
+      (bytes, without object headers)
+    """
+    inputs = Types(('hprof', list, path))
+    outputs = Types(('class', list, list, str),
+                    ('instances', list, list, int),
+                    ('shallow_size', list, list, int))
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the numeric columns of each file as arrays
+        :type columnar: bool
+        """
+        super(HProfHeapDump, self).__init__()
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs['hprof']:
+            try:
+                names, counts, sizes = heapdump.class_histogram(f)
+            except heapdump.HeapDumpError as e:
+                log.error('Received invalid heap dump {0}: {1}'.format(f, e))
+                raise WrongInputError('Received invalid input.')
+
+            order = sorted(range(len(names)),
+                           key=lambda i: (-sizes[i], names[i]))
+            counts = [counts[i] for i in order]
+            sizes = [sizes[i] for i in order]
+            self.out['class'].append([names[i] for i in order])
+            self.out['instances'].append(column(counts) if self.columnar else counts)
+            self.out['shallow_size'].append(column(sizes) if self.columnar else sizes)
+
+
+class TopTraces(Filter):
+    """
+    Merges the ranked stack traces of hprof of many invocations and emits
+    the ``n`` stack traces (or frames) with the largest counts.
+
+    The samples are aggregated in a hash table keyed by the frames of the
+    stack trace, so the traces of different invocations are merged although
+    their numbers differ.  Frames are interned over all invocations, the
+    memory needed is bounded by the count of distinct frames and traces,
+    not by the count of invocations.
+
+    With ``by='frame'`` every frame of a stack trace is counted once, i.e.
+    the count of a frame is the count of the traces in which it is active.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        hprof = filters.HProfCpuSamples(traces=True)
+        top = filters.TopTraces(10)
+        composition.flow = [jvm.tool >> hprof >>
+                            ['count', 'trace', 'frames', 'trace_ids',
+                             'trace_frames'] >> top >> ...]
+
+    To merge the traces of many compositions, merge their outputs (see
+    :class:`Merge`) and concatenate the invocations with
+    ``Reduce(operator.add)``.
+
+    Inputs (lists with one element per invocation, see
+    :class:`HProfCpuSamples` with ``traces``):
+
+    - ``count``: counts (or other weights) of the ranked traces
+    - ``trace``: stack trace numbers of the ranked traces
+    - ``frames``: table of the stack frames
+    - ``trace_ids``: stack trace numbers of the parsed traces
+    - ``trace_frames``: indices of the frames of each parsed trace
+
+    Outputs:
+
+    - ``stack``: the frames of the top stack traces (innermost first) or
+      the top frames (as singleton lists)
+    - ``count``: merged count of each stack trace or frame
+    - ``share``: share of the merged count in the total count
+    """
+    inputs = Types(('count', list, list, (int, float)),
+                   ('trace', list, list, int),
+                   ('frames', list, list, (str, unicode)),
+                   ('trace_ids', list, list, int),
+                   ('trace_frames', list, list, list, int))
+    outputs = Types(('stack', list, list, (str, unicode)),
+                    ('count', list, (int, float)),
+                    ('share', list, float))
+
+    def __init__(self, n=10, by='trace'):
+        """
+        :param n: count of stack traces or frames to emit
+        :type n: int
+        :param by: aggregate by ``trace`` or by ``frame``
+        :type by: str
+        """
+        super(TopTraces, self).__init__()
+        if n < 1:
+            raise ValueError('At least one stack trace has to be emitted.')
+        if by not in ('trace', 'frame'):
+            raise ValueError('Aggregate by "trace" or "frame", not "{0}".'.format(by))
+        self.n = n
+        self.by = by
+
+    def _run(self, **kwargs):
+        # frame -> index in ``frames`` of all invocations
+        interned = {}
+        frames = []
+        # tuple of frame indices (trace) or frame index -> count
+        counts = {}
+        total = 0
+
+        for invocation in zip(kwargs['count'], kwargs['trace'], kwargs['frames'],
+                              kwargs['trace_ids'], kwargs['trace_frames']):
+            weights, traces, table, ids, trace_frames = [tolist(x) for x in invocation]
+
+            local = []
+            for frame in table:
+                index = interned.get(frame)
+                if index is None:
+                    index = interned[frame] = len(frames)
+                    frames.append(frame)
+                local.append(index)
+            stacks = dict(zip(ids, trace_frames))
+
+            for weight, trace in zip(weights, traces):
+                try:
+                    stack = stacks[trace]
+                except KeyError:
+                    raise WrongInputError('Stack trace {0} is missing.'.format(trace))
+                total += weight
+                if self.by == 'trace':
+                    keys = (tuple(local[i] for i in stack),)
+                else:
+                    keys = set(local[i] for i in stack)
+                for key in keys:
+                    counts[key] = counts.get(key, 0) + weight
+
+        top = heapq.nlargest(self.n, counts.items(), key=operator.itemgetter(1))
+        for key, count in top:
+            if self.by == 'trace':
+                self.out['stack'].append([frames[i] for i in key])
+            else:
+                self.out['stack'].append([frames[key]])
+            self.out['count'].append(count)
+            self.out['share'].append(count / total if total else 0.0)
+
+
+class ValgrindProfile(Filter):
+    """
+    A filter that sums up the costs of the events per function of the
+    profiles of cachegrind and callgrind, ordered by the cost of the first
+    event (see :mod:`penchy.jobs.valgrind`).
+
+    This filter is not intended for direct usage.
+    Use :class:`Cachegrind` or :class:`Callgrind`.
+
+    Outputs:
+
+    - ``events``: names of the events (e.g. ``Ir``)
+    - ``totals``: total cost of each event
+    - ``file``: file of the function
+    - ``function``: name of the function
+    - ``costs``: self costs of the functions, one column per event
+    """
+    outputs = Types(('events', list, list, str),
+                    ('totals', list, list, int),
+                    ('file', list, list, str),
+                    ('function', list, list, str),
+                    ('costs', list, list, list, int))
+
+    def __init__(self, input, columnar=False):
+        """
+        :param input: name of the input
+        :type input: str
+        :param columnar: output the columns of the costs as arrays
+        :type columnar: bool
+        """
+        super(ValgrindProfile, self).__init__()
+        self.input = input
+        self.inputs = Types((input, list, path))
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs[self.input]:
+            try:
+                events, totals, functions = valgrind.function_costs(f)
+            except valgrind.ProfileError as e:
+                log.error('Received invalid profile {0}: {1}'.format(f, e))
+                raise WrongInputError('Received invalid input.')
+
+            keys = sorted(functions, key=lambda k: (-functions[k][0], k))
+            costs = [[functions[k][i] for k in keys] for i in range(len(events))]
+            self.out['events'].append(events)
+            self.out['totals'].append(totals)
+            self.out['file'].append([k[0] for k in keys])
+            self.out['function'].append([k[1] for k in keys])
+            self.out['costs'].append([column(c) for c in costs] if self.columnar
+                                     else costs)
+
+
+class Cachegrind(ValgrindProfile):
+    """
+    Filters the profiles of cachegrind.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        jvm = jvms.CacheGrindJVM('...')
+        cachegrind = filters.Cachegrind()
+        composition.flow = [jvm >> cachegrind >> ('costs', 'values') >> ...]
+
+    Inputs:
+
+    - ``cachegrind``: Path to the profile
+
+    Outputs: see :class:`ValgrindProfile`
+    """
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the columns of the costs as arrays
+        :type columnar: bool
+        """
+        super(Cachegrind, self).__init__('cachegrind', columnar)
+
+
+class Callgrind(ValgrindProfile):
+    """
+    Filters the profiles of callgrind. The costs of the functions are
+    their self costs, the inclusive costs of calls are not added to the
+    callers.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        jvm = jvms.CallGrindJVM('...')
+        callgrind = filters.Callgrind()
+        composition.flow = [jvm >> callgrind >> ('costs', 'values') >> ...]
+
+    Inputs:
+
+    - ``callgrind``: Path to the profile
+
+    Outputs: see :class:`ValgrindProfile`
+    """
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the columns of the costs as arrays
+        :type columnar: bool
+        """
+        super(Callgrind, self).__init__('callgrind', columnar)
+
+
+class Massif(Filter):
+    """
+    Filters the profiles of massif into the heap over time and its peak.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        jvm = jvms.MassifJVM('...')
+        massif = filters.Massif()
+        composition.flow = [jvm >> massif >> ('heap', 'values') >> ...]
+
+    Inputs:
+
+    - ``massif``: Path to the profile
+
+    Outputs:
+
+    - ``time_unit``: unit of the time (``i``, ``ms`` or ``B``)
+    - ``time``: time of the snapshots
+    - ``heap``: useful heap bytes of the snapshots
+    - ``heap_extra``: extra heap bytes (administration and alignment) of the
+      snapshots
+    - ``stacks``: stack bytes of the snapshots (if profiled)
+    - ``peak``: index of the snapshot with the peak of the heap (-1 if there
+      are no snapshots)
+    """
+    inputs = Types(('massif', list, path))
+    outputs = Types(('time_unit', list, str),
+                    ('time', list, list, int),
+                    ('heap', list, list, int),
+                    ('heap_extra', list, list, int),
+                    ('stacks', list, list, int),
+                    ('peak', list, int))
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the series as arrays
+        :type columnar: bool
+        """
+        super(Massif, self).__init__()
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs['massif']:
+            try:
+                time_unit, series, peak = valgrind.massif_snapshots(f)
+            except valgrind.ProfileError as e:
+                log.error('Received invalid profile {0}: {1}'.format(f, e))
+                raise WrongInputError('Received invalid input.')
+
+            self.out['time_unit'].append(time_unit)
+            for name, values in series.items():
+                self.out[name].append(column(values, int) if self.columnar else values)
+            self.out['peak'].append(-1 if peak is None else peak)
+
+
+class Memcheck(Filter):
+    """
+    Filters the xml output of memcheck into the leaks, aggregated by their
+    kind and stack and ordered by the leaked bytes.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        jvm = jvms.MemcheckJVM('...')
+        memcheck = filters.Memcheck()
+        composition.flow = [jvm >> memcheck >> ('bytes', 'values') >> ...]
+
+    Inputs:
+
+    - ``memcheck``: Path to the xml output
+
+    Outputs:
+
+    - ``kind``: kind of the leak (e.g. ``Leak_DefinitelyLost``)
+    - ``stack``: frames of the stack of the allocation (innermost first)
+    - ``bytes``: leaked bytes
+    - ``blocks``: leaked blocks
+    - ``records``: count of loss records
+    - ``errors``: count of errors that are no leaks
+    """
+    inputs = Types(('memcheck', list, path))
+    outputs = Types(('kind', list, list, str),
+                    ('stack', list, list, list, str),
+                    ('bytes', list, list, int),
+                    ('blocks', list, list, int),
+                    ('records', list, list, int),
+                    ('errors', list, int))
+
+    def _run(self, **kwargs):
+        for f in kwargs['memcheck']:
+            try:
+                leaks, errors = valgrind.memcheck_leaks(f)
+            except valgrind.ProfileError as e:
+                log.error('Received invalid output {0}: {1}'.format(f, e))
+                raise WrongInputError('Received invalid input.')
+
+            keys = sorted(leaks, key=lambda k: (-leaks[k][0], k))
+            self.out['kind'].append([k[0] for k in keys])
+            self.out['stack'].append([list(k[1]) for k in keys])
+            for i, name in enumerate(('bytes', 'blocks', 'records')):
+                self.out[name].append([leaks[k][i] for k in keys])
+            self.out['errors'].append(errors)
+
+
+class GCLog(Filter):
+    """
+    Filters the gc logs of :class:`~penchy.jobs.tools.GCLog` into the pauses
+    of the garbage collections.
+
+    Both the classic format of the JVMs up to version 8::
+
+        0.123: [GC (Allocation Failure)  33280K->4864K(125952K), 0.0051234 secs]
+        0.456: [GC pause (G1 Evacuation Pause) (young) 24M->4096K(256M), 0.0051234 secs]
+
+    and the format of the unified logging::
+
+        [0.123s][info][gc] GC(0) Pause Young (Normal) (G1 Evacuation Pause) 24M->4M(256M) 3.456ms
+
+    are parsed (with or without ``-XX:+PrintGCDetails``), concurrent phases
+    are no pauses and are skipped. The marks of CMS log only the occupancy
+    of the heap, it is used as the heap before and after them. The logs are
+    memory-mapped and scanned in one pass, a log with collections of which
+    none is understood raises a :class:`WrongInputError`.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        # Assume ``composition`` is a valid SystemComposition.
+        jvm = jvms.JVM('...')
+        jvm.tool = tools.GCLog()
+        gc = filters.GCLog()
+        composition.flow = [jvm.tool >> gc >> 'total_pause' >> ...]
+
+    Inputs:
+
+    - ``gc_log``: Path to the gc log
+
+    Outputs:
+
+    - ``timestamp``: time since the start of the JVM (s)
+    - ``kind``: kind of the collection (e.g. ``Full GC (Ergonomics)`` or
+      ``Pause Young (Normal) (G1 Evacuation Pause)``)
+    - ``pause``: pause time (ms)
+    - ``heap_before``: used heap before the collection (KiB)
+    - ``heap_after``: used heap after the collection (KiB)
+    - ``heap_total``: size of the heap (KiB)
+    - ``total_pause``: sum of the pause times (ms)
+    - ``percentiles``: the percentiles of the pause times (ms)
+    """
+    inputs = Types(('gc_log', list, path))
+    outputs = Types(('timestamp', list, list, float),
+                    ('kind', list, list, str),
+                    ('pause', list, list, float),
+                    ('heap_before', list, list, int),
+                    ('heap_after', list, list, int),
+                    ('heap_total', list, list, int),
+                    ('total_pause', list, float),
+                    ('percentiles', list, list, float))
+
+    _UNIFIED_RE = re.compile(parsing.to_bytes(
+        r"""
+        \[(?P<timestamp>\d+[.,]\d+)s\][^\n]*?     # uptime decoration
+        \ GC\(\d+\)\ (?P<kind>Pause[^\n]*?)
+        \ (?P<before>\d+)(?P<before_unit>[KMG])->
+        (?P<after>\d+)(?P<after_unit>[KMG])
+        \((?P<total>\d+)(?P<total_unit>[KMG])\)
+        \ (?P<pause>\d+[.,]\d+)ms
+        """), re.VERBOSE)
+
+    # the heap is the last ``N->N(N)`` before the pause, the generations
+    # (with details) precede it and the metaspace may follow it; the marks of
+    # CMS only log the occupancy ``N(N)``
+    _CLASSIC_RE = re.compile(parsing.to_bytes(
+        r"""
+        (?P<timestamp>\d+[.,]\d+):\ \[
+        (?P<kind>(?:Full\ GC|GC\ pause|GC)(?:\ \([^)\n]*\))*)
+        [^\n]*                                     # generations (details)
+        (?<![\d.])
+        (?:(?P<before>\d+(?:\.\d+)?)(?P<before_unit>[KMG])->|(?<!->))
+        (?P<after>\d+(?:\.\d+)?)(?P<after_unit>[KMG])
+        \((?P<total>\d+(?:\.\d+)?)(?P<total_unit>[KMG])\)
+        (?:,\ \[[^]\n]*\])*                        # metaspace (details)
+        ,\ (?P<pause>\d+[.,]\d+)\ secs\]
+        """), re.VERBOSE)
+
+    # a collection of either format, to tell logs without collections from
+    # logs whose collections are not understood
+    _RECORD_RE = re.compile(parsing.to_bytes(r'GC\(\d+\)|\[(?:Full\ )?GC\b'))
+
+    _UNITS = {'K': 1, 'M': 1024, 'G': 1024 ** 2}
+
+    def __init__(self, percentiles=(50, 90, 99), columnar=False):
+        """
+        :param percentiles: percentiles of the pause times to output
+        :type percentiles: tuple of numbers
+        :param columnar: output the numeric columns of each log as arrays
+        :type columnar: bool
+        """
+        super(GCLog, self).__init__()
+        self.percentiles = percentiles
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs['gc_log']:
+            with parsing.mapped(f) as buf:
+                pattern = self._UNIFIED_RE
+                rows = pattern.findall(buf)
+                if not rows:
+                    pattern = self._CLASSIC_RE
+                    rows = pattern.findall(buf)
+                if not rows and self._RECORD_RE.search(buf):
+                    raise WrongInputError('The gc log {0} has no pauses of a '
+                                          'known format'.format(f))
+            group = dict((name, i - 1) for name, i in pattern.groupindex.items())
+
+            def values(name, type_=float):
+                i = group[name]
+                return [type_(row[i].replace(parsing.to_bytes(','),
+                                             parsing.to_bytes('.')))
+                        for row in rows]
+
+            def sizes(name):
+                # in KiB, the marks of CMS log no size before the collection
+                sizes = []
+                for row in rows:
+                    key = name if row[group[name]] else 'after'
+                    unit = parsing.native(row[group[key + '_unit']])
+                    sizes.append(int(round(float(row[group[key]]) *
+                                           self._UNITS[unit])))
+                return sizes
+
+            pauses = values('pause')
+            if pattern is self._CLASSIC_RE:
+                pauses = [p * 1000 for p in pauses]
+
+            self.out['timestamp'].append(self._column(values('timestamp')))
+            self.out['kind'].append([parsing.native(row[group['kind']].strip())
+                                     for row in rows])
+            self.out['pause'].append(self._column(pauses))
+            for name in ('before', 'after', 'total'):
+                self.out['heap_' + name].append(self._column(sizes(name)))
+            self.out['total_pause'].append(float(sum(pauses)))
+            self.out['percentiles'].append(stats.percentiles(pauses, self.percentiles))
+
+    def _column(self, values):
+        return column(values) if self.columnar else values
+
+
+class JITLog(Filter):
+    """
+    Filters the compilation logs of :class:`~penchy.jobs.tools.JITLog`
+    (the format of ``-XX:+PrintCompilation``) into compile events::
+
+        timestamp id attributes tier method                    message
+           45    1       3       java.lang.String::hashCode (55 bytes)
+           51    3  %    4       foo.Bar::loop @ 12 (100 bytes)
+           60    1       3       java.lang.String::hashCode (55 bytes)   made not entrant
+
+    The logs are memory-mapped and scanned in one pass, the xml of the
+    classic log file (``-XX:LogFile``) and the decorations of the unified
+    logging are skipped.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        # Assume ``composition`` is a valid SystemComposition.
+        jvm = jvms.JVM('...')
+        jvm.tool = tools.JITLog()
+        jit = filters.JITLog()
+        composition.flow = [jvm.tool >> jit >> 'timestamp' >> ...]
+
+    Inputs:
+
+    - ``jit_log``: Path to the compilation log
+
+    Outputs:
+
+    - ``timestamp``: time since the start of the JVM (ms)
+    - ``compile_id``: id of the compilation
+    - ``tier``: tier of the compilation (``-1`` without tiered compilation)
+    - ``method``: compiled method
+    - ``osr``: flag that indicates an on-stack replacement
+    - ``event``: ``compiled``, ``made not entrant``, ``made zombie`` or
+      ``skipped``
+    """
+    inputs = Types(('jit_log', list, path))
+    outputs = Types(('timestamp', list, list, int),
+                    ('compile_id', list, list, int),
+                    ('tier', list, list, int),
+                    ('method', list, list, str),
+                    ('osr', list, list, bool),
+                    ('event', list, list, str))
+
+    _EVENT_RE = re.compile(parsing.to_bytes(
+        r"""
+        ^(?:\[[^\]\n]*\])*                          # decorations
+        \ *(?P<timestamp>\d+)\ +(?P<compile_id>\d+)
+        \ (?P<attributes>[%sbn!\ ]{5})[ ]
+        (?:(?P<tier>[\d-])\ )?
+        \ *(?P<method>[^\s(]+)(?:\ @\ \d+)?
+        (?:\ \((?:\d+\ bytes|native)\))?
+        (?P<message>[^\n]*)
+        """), re.VERBOSE | re.MULTILINE)
+
+    _EVENTS = ('made not entrant', 'made zombie')
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the numeric columns of each log as arrays
+        :type columnar: bool
+        """
+        super(JITLog, self).__init__()
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs['jit_log']:
+            with parsing.mapped(f) as buf:
+                rows = self._EVENT_RE.findall(buf)
+            group = dict((name, i - 1) for name, i in self._EVENT_RE.groupindex.items())
+
+            def strings(name):
+                return [_unescape(parsing.native(row[group[name]])) for row in rows]
+
+            tiers = [int(row[group['tier']]) if row[group['tier']] not in
+                     (parsing.to_bytes(''), parsing.to_bytes('-')) else -1
+                     for row in rows]
+            events = []
+            for message in strings('message'):
+                for event in self._EVENTS:
+                    if event in message:
+                        break
+                else:
+                    event = 'skipped' if 'COMPILE SKIPPED' in message else 'compiled'
+                events.append(event)
+
+            for name in ('timestamp', 'compile_id'):
+                values = [int(row[group[name]]) for row in rows]
+                self.out[name].append(column(values) if self.columnar else values)
+            self.out['tier'].append(column(tiers) if self.columnar else tiers)
+            self.out['method'].append(strings('method'))
+            self.out['osr'].append(['%' in a for a in strings('attributes')])
+            self.out['event'].append(events)
+
+
+def _unescape(string):
+    """
+    Return ``string`` with the entities of xml replaced.
+    """
+    if '&' not in string:
+        return string
+    for entity, char in (('&lt;', '<'), ('&gt;', '>'), ('&quot;', '"'),
+                         ('&apos;', "'"), ('&amp;', '&')):
+        string = string.replace(entity, char)
+    return string
+
+
+class CompilationsPerIteration(Filter):
+    """
+    Counts the compilations (see :class:`JITLog`) per iteration of the
+    workload, e.g. to explain the warm-up next to the times of
+    :class:`DacapoHarness`.
+
+    The iterations are assumed to run back to back, starting ``startup``
+    milliseconds after the start of the JVM, so the iteration of a
+    compilation is found by its timestamp and the cumulated times of the
+    iterations. Compilations after the last iteration are not counted.
+
+    The start-up time depends on the JVM, the harness and the machine and
+    has to be measured for them, e.g. as the uptime at which
+    ``-Xlog:class+load`` (``-verbose:class`` before JDK 9) reports that the
+    class of the benchmark is loaded (``org.dacapo.harness.<Benchmark>``
+    for DaCapo).
+
+    Example::
+
+        jit = filters.JITLog()
+        dacapo = filters.DacapoHarness()
+        count = filters.CompilationsPerIteration(startup=350)
+        composition.flow = [jvm.tool >> jit >> ['timestamp', 'event'] >> count,
+                            jvm.workload >> dacapo >> 'times' >> count,
+                            count >> 'compilations' >> ...]
+
+    Inputs:
+
+    - ``timestamp``: timestamps of the compile events (ms)
+    - ``event``: kinds of the compile events
+    - ``times``: times of the iterations (ms)
+
+    Outputs:
+
+    - ``compilations``: count of compilations per iteration
+    - ``startup_compilations``: count of compilations before the first
+      iteration
+    """
+    inputs = Types(('timestamp', list, list, int),
+                   ('event', list, list, (str, unicode)),
+                   ('times', list, list, int))
+    outputs = Types(('compilations', list, list, int),
+                    ('startup_compilations', list, int))
+
+    def __init__(self, startup):
+        """
+        :param startup: time from the start of the JVM to the start of the
+                        first iteration (ms), see above how to measure it
+        :type startup: int
+        """
+        super(CompilationsPerIteration, self).__init__()
+        self.startup = startup
+
+    def _run(self, **kwargs):
+        for timestamps, events, times in zip(kwargs['timestamp'], kwargs['event'],
+                                             kwargs['times']):
+            ends = []
+            end = self.startup
+            for time in tolist(times):
+                end += time
+                ends.append(end)
+
+            counts = [0] * len(ends)
+            startup = 0
+            for timestamp, event in zip(tolist(timestamps), events):
+                if event != 'compiled':
+                    continue
+                if timestamp < self.startup:
+                    startup += 1
+                    continue
+                i = bisect.bisect_right(ends, timestamp)
+                if i < len(ends):
+                    counts[i] += 1
+            self.out['compilations'].append(counts)
+            self.out['startup_compilations'].append(startup)
 
 
 class DacapoHarness(Filter):
@@ -419,6 +1328,10 @@ class DacapoHarness(Filter):
         composition.flow = [jvm.workload >> dacapo >> "times" >> ...
 
 
+    The output files are memory-mapped and scanned in one pass, so they are
+    not read into memory however large they are.  Many invocations can be
+    parsed in parallel by several processes.
+
     Inputs:
 
     - ``stderr``:  List of Paths to stderror output files
@@ -435,39 +1348,172 @@ class DacapoHarness(Filter):
                     ('times', list, list, int),
                     ('valid', list, bool))
 
-    _TIME_RE = re.compile(
+    _TIME_RE = re.compile(parsing.to_bytes(
         r"""
         (?:completed\ warmup\ \d+|        # for iterations
         (?P<success>FAILED|PASSED))       # check if run failed or passed
         \ in\ (?P<time>\d+)\ msec         # time of execution
-        """, re.VERBOSE)
+        """), re.VERBOSE)
+
+    _VALIDITY_RE = re.compile(parsing.to_bytes(
+        r'(?:\r?\n)?={5} DaCapo .*?={5}\r?\n={5} DaCapo'))
 
-    _VALIDITY_RE = re.compile(r'^\n?={5} DaCapo .*?={5}\n={5} DaCapo')
+    def __init__(self, columnar=False, processes=1):
+        """
+        :param columnar: output the times of each invocation as array
+        :type columnar: bool
+        :param processes: count of processes that parse the files
+        :type processes: int
+        """
+        super(DacapoHarness, self).__init__()
+        self.columnar = columnar
+        self.processes = processes
 
     def _run(self, **kwargs):
         stderror = kwargs['stderr']
 
-        for f in stderror:
-            failures = 0
-            times = []
-            with open(f) as fobj:
-                buf = fobj.read()
-
-            if not self._VALIDITY_RE.search(buf):
-                log.error('Received invalid input:\n{0}'.format(buf))
-                raise WrongInputError('Received invalid input')
-
-            for match in DacapoHarness._TIME_RE.finditer(buf):
-                success, time = match.groups()
-                if success is not None and success == 'FAILED':
-                    failures += 1
-                times.append(int(time))
+        if self.processes > 1 and len(stderror) > 1:
+            pool = Pool(self.processes)
+            try:
+                results = pool.map(_dacapo_harness, stderror)
+            finally:
+                pool.terminate()
+        else:
+            results = [_dacapo_harness(f) for f in stderror]
 
+        for failures, times in results:
             self.out['failures'].append(failures)
-            self.out['times'].append(times)
+            self.out['times'].append(column(times) if self.columnar else times)
             self.out['valid'].append(failures == 0)
 
 
+# size of the start of an invalid output that is logged
+_LOGGED_BYTES = 4096
+
+
+def _dacapo_harness(filename):
+    """
+    Return the count of failures and the times of the iterations of the
+    output of the DaCapo harness ``filename``.
+
+    :param filename: path of the stderror output file
+    :type filename: str
+    :returns: failures and times
+    :rtype: tuple of int and list
+    :raises: :exc:`WrongInputError` if the output has no valid header
+    """
+    failed = parsing.to_bytes('FAILED')
+    failures = 0
+    times = []
+    with parsing.mapped(filename) as buf:
+        # the header is matched at the start of the file only
+        if not DacapoHarness._VALIDITY_RE.match(buf):
+            head = buf[:_LOGGED_BYTES]
+            log.error('Received invalid input:\n{0}'
+                      .format(head.decode('utf8', 'replace') if on_python3 else head))
+            raise WrongInputError('Received invalid input')
+
+        for success, time in DacapoHarness._TIME_RE.findall(buf):
+            if success == failed:
+                failures += 1
+            times.append(int(time))
+    return failures, times
+
+
+class JMH(Filter):
+    """
+    Filters the json results of :class:`~penchy.jobs.workloads.JMH` into the
+    scores of the benchmarks.
+
+    Example::
+
+        # This example shows only the relevant parts.
+        # Assume ``composition`` is a valid SystemComposition.
+        jvm = jvms.JVM('...')
+        jvm.workload = workloads.JMH('...')
+        jmh = filters.JMH()
+        composition.flow = [jvm.workload >> jmh >> ('score', 'values') >> ...]
+
+    The results are decoded benchmark by benchmark (see
+    :func:`~penchy.jobs.parsing.json_items`), so only the results of one
+    benchmark are in memory at a time. Benchmarks with parameters are named
+    with their values, e.g. ``org.sample.Hashing.md5:size=1024``.
+
+    Inputs:
+
+    - ``jmh``: Path to the json results
+
+    Outputs:
+
+    - ``benchmark``: name of the benchmark
+    - ``mode``: benchmark mode (e.g. ``thrpt``)
+    - ``unit``: unit of the score (e.g. ``ops/s``)
+    - ``score``: score of the benchmark
+    - ``error``: error of the score (99.9% confidence, ``nan`` if unknown)
+    - ``samples``: scores of the measurement iterations of all forks (all
+      samples in the sample mode)
+    """
+    inputs = Types(('jmh', list, path))
+    outputs = Types(('benchmark', list, list, (str, unicode)),
+                    ('mode', list, list, (str, unicode)),
+                    ('unit', list, list, (str, unicode)),
+                    ('score', list, list, float),
+                    ('error', list, list, float),
+                    ('samples', list, list, list, float))
+
+    def __init__(self, columnar=False):
+        """
+        :param columnar: output the samples of each benchmark as array
+        :type columnar: bool
+        """
+        super(JMH, self).__init__()
+        self.columnar = columnar
+
+    def _run(self, **kwargs):
+        for f in kwargs['jmh']:
+            columns = dict((name, []) for name in self.outputs.names)
+            try:
+                for result in parsing.json_items(f):
+                    metric = result['primaryMetric']
+                    name = result['benchmark']
+                    params = result.get('params')
+                    if params:
+                        name += ':' + ','.join(k + '=' + params[k]
+                                               for k in sorted(params))
+                    samples = self._samples(metric)
+                    columns['benchmark'].append(name)
+                    columns['mode'].append(result['mode'])
+                    columns['unit'].append(metric['scoreUnit'])
+                    columns['score'].append(float(metric['score']))
+                    columns['error'].append(float(metric['scoreError']))
+                    columns['samples'].append(column(samples) if self.columnar
+                                              else samples)
+            except parsing.InvalidJSON as e:
+                log.error('Received invalid results {0}: {1}'.format(f, e))
+                raise WrongInputError('Received invalid input.')
+            except (KeyError, TypeError, ValueError) as e:
+                log.error('Received invalid results {0}: missing or invalid {1}'
+                          .format(f, e))
+                raise WrongInputError('Received invalid input.')
+
+            for name, values in columns.items():
+                self.out[name].append(values)
+
+    def _samples(self, metric):
+        """
+        Return the scores of the iterations of ``metric``, the histograms of
+        the sample mode are expanded (every value as often as it was
+        sampled).
+        """
+        if 'rawData' in metric:
+            return [float(s) for fork in metric['rawData'] for s in fork]
+        if 'rawDataHistogram' in metric:
+            return [float(value) for fork in metric['rawDataHistogram']
+                    for iteration in fork for value, count in iteration
+                    for _ in range(int(count))]
+        raise KeyError('rawData')
+
+
 class Send(SystemFilter):
     """
     Sends all data fed to it to the server.
@@ -484,11 +1530,13 @@ class Send(SystemFilter):
 
     - ``:environment:``: see :meth:`Job._build_environment`
     """
+    SIDE_EFFECTS = True
     inputs = Types()
 
     def _run(self, **kwargs):
         send = kwargs.pop(':environment:')['send']
-        send(kwargs)
+        # xmlrpclib can't marshal arrays and subclasses of list and dict
+        send(dict((name, thaw(tolist(value))) for name, value in kwargs.items()))
 
 
 class Receive(SystemFilter):
@@ -498,6 +1546,10 @@ class Receive(SystemFilter):
     :class:`~penchy.jobs.filters.Extract` filter follow the
     Receive filter.
 
+    The results arrive as lists; with ``columnar`` their lists of numbers
+    (e.g. the columns of filters created with ``columnar=True``) are
+    turned into arrays.
+
     Example::
 
         # This example shows only the relevant parts.
@@ -516,15 +1568,31 @@ class Receive(SystemFilter):
     inputs = Types((':environment:', dict))
     outputs = Types(('results', dict))
 
+    def __init__(self, columnar=False):
+        """
+        :param columnar: turn the lists of numbers of the results into arrays
+        :type columnar: bool
+        """
+        # not super, ExtractingReceive and MergingReceive initialize their
+        # other base themselves
+        SystemFilter.__init__(self)
+        self.columnar = columnar
+
     def _run(self, **kwargs):
         receive = kwargs[':environment:']['receive']
-        self.out['results'] = receive()
+        results = receive()
+        if self.columnar:
+            results = dict((composition, tocolumns(result))
+                           for composition, result in results.items())
+        self.out['results'] = results
 
 
 class Print(Filter):
     """
     Prints everything fed to it on stdout.
     """
+    THREADSAFE = False
+    SIDE_EFFECTS = True
     inputs = Types()
 
     def __init__(self, stream=None):
@@ -559,6 +1627,7 @@ class Evaluation(Filter):
         You should set ``inputs`` and ``outputs`` or no checking will take place.
         If ``inputs`` is set to ``None``, will run evaluator on ``input``.
     """
+    DYNAMIC_TYPES = True
 
     def __init__(self, evaluator, inputs=None, outputs=None):
         """
@@ -604,14 +1673,14 @@ class StatisticRuntimeEvaluation(Evaluation):
     Inputs:
 
     - ``times``: list of invocations of iterations of
-                 the wallclocktime
+                 the wallclocktime, failed iterations may be ``None``
 
     Outputs: see ``evaluate_runtimes``
     """
-    inputs = Types(('times', list, list, int))
+    inputs = Types(('times', list, list, (int, type(None))))
     outputs = Types(('averages', list, float),
-                    ('maximals', list, int),
-                    ('minimals', list, int),
+                    ('maximals', list, (int, float)),
+                    ('minimals', list, (int, float)),
                     ('positive_deviations', list, float),
                     ('negative_deviations', list, float))
 
@@ -633,17 +1702,17 @@ def evaluate_runtimes(times):
 
     per iteration of all times.
 
+    Invocations may have different counts of iterations and failed
+    iterations may be ``None``, the metrics of an iteration cover only the
+    invocations that have a time for it (see
+    :func:`penchy.statistics.column_statistics`).
+
     :param times: runtimes of all iterations of all iterations
-    :type invocation: n*m 2D list
+    :type invocation: n*m 2D list or array
     :returns: the metrics described above in their order
     :rtype: dict
     """
-    grouped_by_iteration = [[invocation[i] for invocation in times]
-                            for i in range(len(times[0]))]
-
-    maxs = [max(iteration) for iteration in grouped_by_iteration]
-    mins = [min(iteration) for iteration in grouped_by_iteration]
-    avgs = [stats.average(iteration) for iteration in grouped_by_iteration]
+    mins, maxs, avgs = stats.column_statistics(times)
     pos_deviations = [abs(max_ - avg) / avg for max_, avg in zip(maxs, avgs)]
     neg_deviations = [abs(min_ - avg) / avg for min_, avg in zip(mins, avgs)]
 
@@ -682,7 +1751,7 @@ class Extract(Filter):
 
     Outputs: The extracted data associated with the names specified in the constructor.
     """
-
+    DYNAMIC_TYPES = True
     inputs = Types(('results', dict))
 
     def __init__(self, *args):
@@ -945,6 +2014,8 @@ class Map(Filter):
         self.outputs = Types((self.output, list) + output_types)
 
         self.filter = filter_
+        # the applied filter is run without checks
+        self.DYNAMIC_TYPES = filter_.DYNAMIC_TYPES
 
     def _run(self, **kwargs):
         for v in kwargs[self.input]:
@@ -962,6 +2033,7 @@ class Upload(Filter):  # pragma: no cover
 
     - ``filename``: The filename of the plot file to upload
     """
+    SIDE_EFFECTS = True
     inputs = Types(('filename', path))
 
     def __init__(self, method, remote_path, *args, **kwargs):
@@ -1065,7 +2137,7 @@ class Dump(SystemFilter):
             'system': system,
             'data': kwargs
         }
-        s = json.dumps(dump, indent=self.indent)
+        s = json.dumps(dump, indent=self.indent, default=encode)
         self.out['dump'] = s
 
 
@@ -1077,6 +2149,7 @@ class Save(SystemFilter):
 
     - ``data``: data to save (encoded, will be utf8 encoded if not encoded)
     """
+    SIDE_EFFECTS = True
     inputs = Types(('data', (str, unicode)))
 
     def __init__(self, target_path):
@@ -1108,6 +2181,7 @@ class BackupFile(SystemFilter):
 
     - ``filename``: path of file to backup
     """
+    SIDE_EFFECTS = True
     inputs = Types(('filename', path))
 
     def __init__(self, target_path):
@@ -1210,8 +2284,7 @@ class Unpack(Filter):
             raise WrongInputError('The list has more than one element.')
         if len(singleton) < 1:
             raise WrongInputError('The list is empty.')
-        value = singleton.pop()
-        self.out[self.output] = value
+        self.out[self.output] = singleton[0]
 
 
 class Mean(Filter):
@@ -1220,13 +2293,14 @@ class Mean(Filter):
 
     Inputs:
 
-    - ``values``: numeric values
+    - ``values``: numeric values or their
+      :class:`~penchy.statistics.Accumulator`
 
     Outputs:
 
     - ``mean``: mean of the numeric values
     """
-    inputs = Types(('values', list, (int, float)))
+    inputs = Types(('values', (list, stats.Accumulator), (int, float)))
     outputs = Types(('mean', float))
 
     def _run(self, **kwargs):
@@ -1245,13 +2319,14 @@ class StandardDeviation(Filter):
 
     Inputs:
 
-    - ``values``: numeric values
+    - ``values``: numeric values or their
+      :class:`~penchy.statistics.Accumulator`
 
     Outputs:
 
     - ``standard_deviation``: mean of the numeric values
     """
-    inputs = Types(('values', list, (int, float)))
+    inputs = Types(('values', (list, stats.Accumulator), (int, float)))
     outputs = Types(('standard_deviation', float))
 
     def __init__(self, ddof=1):
@@ -1269,6 +2344,41 @@ class StandardDeviation(Filter):
         self.out['standard_deviation'] = std
 
 
+class Summarize(Filter):
+    """
+    Summarizes values in a :class:`~penchy.statistics.Accumulator`, which
+    is much smaller than the values and can be sent to the server instead
+    of them.
+
+    Summaries can be summarized again, e.g. to merge the summaries of all
+    invocations. Summaries that are received from clients are dicts (see
+    :meth:`~penchy.statistics.Accumulator.from_dict`) and are summarized as
+    well.
+
+    Example::
+
+        # on the client
+        composition.flow = [... >> ('times', 'values') >> Summarize() >> Send()]
+        # on the server, ``summaries`` is the list of the summaries of
+        # all compositions
+        server_flow = [... >> ('summaries', 'values') >> Summarize() >>
+                       ('summary', 'values') >> Mean() >> ...]
+
+    Inputs:
+
+    - ``values``: numeric values, accumulators or dicts of accumulators
+
+    Outputs:
+
+    - ``summary``: accumulator of all values
+    """
+    inputs = Types(('values', list, (int, float, stats.Accumulator, dict)))
+    outputs = Types(('summary', stats.Accumulator))
+
+    def _run(self, **kwargs):
+        self.out['summary'] = stats.summarize(kwargs['values'])
+
+
 class Sum(Filter):
     """
     Computes the sum of a list of numbers.
@@ -1299,7 +2409,11 @@ class Sum(Filter):
         self.outputs = Types((output, (int, float)))
 
     def _run(self, **kwargs):
-        self.out[self.output] = sum(kwargs[self.input])
+        values = kwargs[self.input]
+        if is_array(values):
+            self.out[self.output] = values.sum().item()
+        else:
+            self.out[self.output] = sum(values)
 
 
 class Enumerate(Filter):
@@ -1381,8 +2495,17 @@ class ConfidenceIntervalMean(Filter):
     .. note::
 
         It is assumed that the samples are statistically independent.
+
+    Inputs:
+
+    - ``values``: numeric values or their
+      :class:`~penchy.statistics.Accumulator`
+
+    Outputs:
+
+    - ``interval``: lower and upper bound of the confidence interval
     """
-    inputs = Types(('values', list, (int, float)))
+    inputs = Types(('values', (list, stats.Accumulator), (int, float)))
     outputs = Types(('interval', tuple, float))
 
     def __init__(self, significance_level):
@@ -1394,11 +2517,6 @@ class ConfidenceIntervalMean(Filter):
         self.sig_level = significance_level
 
     def _run(self, **kwargs):
-        # Gaussian distribution
-        from scipy.stats import norm
-        # Students t-distribution
-        from scipy.stats import t
-
         xs = kwargs['values']
 
         # These computations are common to both of the following two cases
@@ -1408,11 +2526,11 @@ class ConfidenceIntervalMean(Filter):
 
         # If the number of samples is large
         if n > 29:
-            d = norm.ppf(1 - self.sig_level / 2)
+            d = stats.critical_value(self.sig_level)
 
         # If the number of samples is small
         else:
-            d = t.ppf(1 - self.sig_level / 2, n - 1)
+            d = stats.critical_value(self.sig_level, n - 1)
 
         c1 = avg - d * s / math.sqrt(n)
         c2 = avg + d * s / math.sqrt(n)
@@ -1449,11 +2567,6 @@ class CI2Alternatives(Filter):
         self.sig_level = significance_level
 
     def _run(self, **kwargs):
-        # Gaussian distribution
-        from scipy.stats import norm
-        # Students t-distribution
-        from scipy.stats import t
-
         xs = kwargs['xs']
         ys = kwargs['ys']
 
@@ -1468,20 +2581,95 @@ class CI2Alternatives(Filter):
 
         # If the number of samples is large in both samples
         if n1 > 29 and n2 > 29:
-            d = norm.ppf(1 - self.sig_level / 2)
+            d = stats.critical_value(self.sig_level)
 
         # If the number of samples is small in at least one sample
         else:
             numerator = (s1 ** 2 / n1 + s2 ** 2 / n2) ** 2
             denumerator = (s1 ** 2 / n1) ** 2 / (n1 - 1) + (s2 ** 2 / n2) ** 2 / (n2 - 1)
             ndf = numerator / denumerator
-            d = t.ppf(1 - self.sig_level / 2, round(ndf, 0))
+            d = stats.critical_value(self.sig_level, round(ndf, 0))
 
         c1 = avg - d * sx
         c2 = avg + d * sx
         self.out['interval'] = (c1, c2)
 
 
+class BootstrapConfidenceInterval(Filter):
+    """
+    A filter that computes a bootstrap confidence interval for the mean or
+    the median of the samples, or for the ratio of the means or medians of
+    two alternatives (``xs`` to ``ys``).
+
+    Unlike :class:`ConfidenceIntervalMean` and :class:`CI2Alternatives` the
+    interval does not assume normally distributed samples, which suits the
+    often skewed runtimes of a JVM. See
+    :func:`penchy.statistics.bootstrap_interval` for the methods.
+
+    .. note::
+
+        The filter requires numpy and is therefore only available on the
+        server.
+
+    Inputs:
+
+    - ``values``: numeric values (without ``ratio``)
+    - ``xs``, ``ys``: numeric values of the alternatives (with ``ratio``)
+
+    Outputs:
+
+    - ``interval``: lower and upper bound of the confidence interval
+    """
+    inputs = Types(('values', list, (int, float)))
+    outputs = Types(('interval', tuple, float))
+
+    def __init__(self, significance_level, statistic='mean', ratio=False,
+                 method='bca', resamples=10000, seed=None, processes=1):
+        """
+        :param significance_level: the significance level for the confidence interval
+        :type significance_level: float
+        :param statistic: ``'mean'`` or ``'median'``
+        :type statistic: str
+        :param ratio: compute the interval of the ratio of two alternatives
+        :type ratio: bool
+        :param method: ``'bca'`` or ``'percentile'``
+        :type method: str
+        :param resamples: count of resamples
+        :type resamples: int
+        :param seed: seed of the resampling, ``None`` for a random seed
+        :type seed: int
+        :param processes: count of processes that resample
+        :type processes: int
+        """
+        super(BootstrapConfidenceInterval, self).__init__()
+        if statistic not in stats.BOOTSTRAP_STATISTICS:
+            raise ValueError('Unknown statistic "{0}", expected one of {1}'
+                             .format(statistic,
+                                     ', '.join(stats.BOOTSTRAP_STATISTICS)))
+        if method not in stats.BOOTSTRAP_METHODS:
+            raise ValueError('Unknown method "{0}", expected one of {1}'
+                             .format(method, ', '.join(stats.BOOTSTRAP_METHODS)))
+        self.sig_level = significance_level
+        self.statistic = statistic
+        self.ratio = ratio
+        self.method = method
+        self.resamples = resamples
+        self.seed = seed
+        self.processes = processes
+        if ratio:
+            self.inputs = Types(('xs', list, (int, float)),
+                                ('ys', list, (int, float)))
+
+    def _run(self, **kwargs):
+        if self.ratio:
+            samples = [kwargs['xs'], kwargs['ys']]
+        else:
+            samples = [kwargs['values']]
+        self.out['interval'] = stats.bootstrap_interval(
+            samples, self.sig_level, self.statistic, self.method,
+            self.resamples, self.seed, self.processes)
+
+
 class SteadyState(Filter):
     """
     Determines for each invocation the iteration where steady-state performance is
@@ -1489,6 +2677,9 @@ class SteadyState(Filter):
     I.e. once the coefficient of variation of the ``k`` iterations falls below
     ``threshold`` (typically 0.01 or 0.02).
 
+    The windows are moved in linear time and all invocations of equal
+    length are processed at once (see :func:`penchy.statistics.steady_states`).
+
     Inputs:
 
     - ``values``: 2d list of measurements
@@ -1496,29 +2687,40 @@ class SteadyState(Filter):
     Outputs:
 
     - ``values``: 2d list of steady-state iterations
+    - ``indices``: index of the first steady-state iteration of each
+      invocation (only if ``index`` is set)
+
+    Invocations that reach no steady state are left out.
     """
     inputs = Types(('values', list, list, (int, float)))
     outputs = Types(('values', list, list, (int, float)))
 
-    def __init__(self, k, threshold):
+    def __init__(self, k, threshold, index=False):
         """
         :param k: count of measurements
         :type k: int
         :param threshold: threshold for coefficient variation
         :type threshold: float
+        :param index: output the indices of the steady-state iterations
+        :type index: bool
         """
         super(SteadyState, self).__init__()
         self.threshold = threshold
         self.k = k
+        self.index = index
+        if index:
+            self.outputs = Types(('values', list, list, (int, float)),
+                                 ('indices', list, int))
 
     def _run(self, **kwargs):
         xss = kwargs['values']
 
-        for xs in xss:
-            for i in range(0, len(xs) - self.k):
-                if stats.coefficient_of_variation(xs[i:self.k + i]) < self.threshold:
-                    self.out['values'].append(xs[i:self.k + i])
-                    break
+        starts = stats.steady_states(xss, self.k, self.threshold)
+        for xs, i in zip(xss, starts):
+            if i is not None:
+                self.out['values'].append(xs[i:self.k + i])
+                if self.index:
+                    self.out['indices'].append(i)
 
 
 class Sort(Filter):
@@ -1534,6 +2736,7 @@ class Sort(Filter):
         Since this filter is very generic no typechecking will
         take place.
     """
+    DYNAMIC_TYPES = True
     inputs = Types()
     outputs = Types()
 
@@ -1552,8 +2755,12 @@ class Sort(Filter):
         self.reverse = reverse
 
     def _run(self, **kwargs):
-        # Split the dict in its keys and values
         names = list(kwargs)
+        if any(is_array(kwargs[name]) for name in names):
+            self._sort_columns(names, kwargs)
+            return
+
+        # Split the dict in its keys and values
         values = zip(*kwargs.values())
 
         # Get the positions of the columns in ``sort_by``
@@ -1567,6 +2774,16 @@ class Sort(Filter):
         for name, value in zip(names, zip(*values)):
             self.out[name] = list(value)
 
+    def _sort_columns(self, names, kwargs):
+        """
+        Sort the columns vectorized.
+        """
+        columns = [column(kwargs[name]) for name in names]
+        keys = [c for name, c in zip(names, columns) if name in self.sort_by]
+        order = sort_order(keys, len(columns[0]), self.reverse)
+        for name, c in zip(names, columns):
+            self.out[name] = c[order]
+
 
 class Accumulate(Filter):
     """
@@ -1593,6 +2810,9 @@ class Accumulate(Filter):
 
     def _run(self, **kwargs):
         numbers = kwargs[self.name]
+        if is_array(numbers):
+            self.out['accum'] = numbers.cumsum(dtype=float)
+            return
 
         accum = 0
         for n in numbers:
@@ -1630,8 +2850,11 @@ class Normalize(Filter):
         numbers = kwargs['values']
         n = kwargs['norm']
 
-        for number in numbers:
-            self.out['values'].append(number / n)
+        if is_array(numbers):
+            self.out['values'] = numbers / n
+        else:
+            for number in numbers:
+                self.out['values'].append(number / n)
 
         if abs(1.0 - sum(self.out['values'])) < self.epsilon:
             log.warn("The normalized sum differs more than {0} from 1.0".format(self.epsilon))
@@ -1661,7 +2884,11 @@ class Zip(Filter):
     outputs = Types(('values', list, list, object))
 
     def _run(self, **kwargs):
-        self.out['values'] = [list(l) for l in zip(*kwargs['values'])]
+        values = kwargs['values']
+        if is_array(values) and values.ndim == 2:
+            self.out['values'] = values.T
+        else:
+            self.out['values'] = [list(l) for l in zip(*values)]
 
 
 class Slice(Filter):
@@ -1890,6 +3117,7 @@ class Export(Filter):
 
     No outputs.
     """
+    SIDE_EFFECTS = True
 
     inputs = Types(('values', list, object))
 
@@ -0,0 +1,215 @@
+"""
+This module provides read-only values that are handed off between pipeline
+elements.
+
+An output that is passed to more than one input is frozen once and the
+frozen value is shared between all receiving elements, so that no element can
+change the inputs of another one.
+
+The frozen types are subclasses of ``list`` and ``dict`` and pass all type
+checks that the original values pass. Builtin lists and dicts can not be
+made read-only in place, so they are copied shallowly; their items are not
+copied, nested lists and dicts are frozen (again shallowly) when the
+container is read for the first time, so that parts of a large value that
+no receiver reads are never copied. Arrays (e.g. of numpy) are frozen
+without copying by handing off read-only views.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import threading
+
+from penchy.compat import on_python3
+from penchy.jobs.table import np
+
+
+class FrozenError(TypeError):
+    """
+    Signals that a frozen value was about to be modified.
+    """
+    pass
+
+
+# the items of shared values are frozen by the first reader, the sinks of a
+# value may read it in several threads at once (see
+# :func:`~penchy.jobs.executor.execute`)
+_freeze_lock = threading.Lock()
+
+
+def _frozen(self, *args, **kwargs):
+    raise FrozenError('{0} is read-only, mark the element with MUTATES_INPUT '
+                      'to receive a copy'.format(self.__class__.__name__))
+
+
+class FrozenList(list):
+    """
+    A ``list`` that can not be modified.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _frozen
+    append = extend = insert = pop = remove = reverse = sort = _frozen
+    # python2 only
+    __setslice__ = __delslice__ = _frozen
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _LazyFrozenList(FrozenList):
+    """
+    A :class:`FrozenList` whose items are frozen when it is read the first
+    time, it becomes a :class:`FrozenList` then.
+    """
+    __slots__ = ()
+
+    def _freeze_items(self):
+        with _freeze_lock:
+            if self.__class__ is not _LazyFrozenList:
+                # frozen by another thread in the meantime
+                return
+            for i, value in enumerate(list.__iter__(self)):
+                frozen = freeze(value)
+                if frozen is not value:
+                    list.__setitem__(self, i, frozen)
+            self.__class__ = FrozenList
+
+
+class FrozenDict(dict):
+    """
+    A ``dict`` that can not be modified.
+    """
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _frozen
+    clear = pop = popitem = setdefault = update = _frozen
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _LazyFrozenDict(FrozenDict):
+    """
+    A :class:`FrozenDict` whose values are frozen when it is read the first
+    time, it becomes a :class:`FrozenDict` then.
+    """
+    __slots__ = ()
+
+    def _freeze_items(self):
+        with _freeze_lock:
+            if self.__class__ is not _LazyFrozenDict:
+                # frozen by another thread in the meantime
+                return
+            for key, value in list(dict.items(self)):
+                frozen = freeze(value)
+                if frozen is not value:
+                    dict.__setitem__(self, key, frozen)
+            self.__class__ = FrozenDict
+
+
+def _reading(cls, base, names):
+    """
+    Override the methods ``names`` of the lazy class ``cls`` so that they
+    freeze the items before they read them with the method of ``base``.
+    """
+    def reader(name):
+        method = getattr(base, name)
+
+        def read(self, *args, **kwargs):
+            self._freeze_items()
+            return method(self, *args, **kwargs)
+        read.__name__ = name
+        return read
+
+    for name in names:
+        if hasattr(base, name):
+            setattr(cls, name, reader(name))
+
+
+# the methods that return items (or containers of them); ``__iter__`` of
+# dicts is included as ``dict(value)`` does not copy by items otherwise
+_reading(_LazyFrozenList, list, ('__getitem__', '__iter__', '__reversed__',
+                                 '__add__', '__mul__', '__rmul__', 'copy',
+                                 '__getslice__'))
+_reading(_LazyFrozenDict, dict, ('__getitem__', '__iter__', 'get', 'items',
+                                 'values', 'copy', 'itervalues', 'iteritems',
+                                 'viewvalues', 'viewitems'))
+
+
+def freeze(value):
+    """
+    Return a read-only version of ``value``.
+
+    Lists and dicts are copied shallowly, their nested lists and dicts are
+    frozen when they are read the first time (the values of dicts right away
+    on python2). Arrays are frozen as read-only views and all other values
+    are returned as they are. Frozen values are not copied again.
+
+    :param value: value to freeze
+    :returns: the frozen value
+    """
+    if isinstance(value, (FrozenList, FrozenDict)):
+        return value
+    if isinstance(value, list):
+        return _LazyFrozenList(value)
+    if isinstance(value, dict):
+        if on_python3:
+            return _LazyFrozenDict(value)
+        # ``dict(value)`` copies the values of dicts without reading them on
+        # python2, so they are frozen right away
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if callable(getattr(value, 'setflags', None)) and hasattr(value, 'view'):
+        # an array, hand off a view that shares the data of the original
+        view = value.view()
+        view.setflags(write=False)
+        return view
+    return value
+
+
+# values that may contain or be frozen values
+_THAWED = (list, tuple, dict) + ((np.ndarray,) if np is not None else ())
+
+
+def thaw(value):
+    """
+    Return a modifiable copy of ``value`` if it is or contains frozen values,
+    ``value`` itself otherwise.
+
+    Frozen values are copied completely, plain lists, tuples and dicts only
+    if they contain frozen values.
+
+    :param value: value to thaw
+    :returns: the modifiable value
+    """
+    if isinstance(value, FrozenList):
+        return [thaw(v) for v in value]
+    if isinstance(value, FrozenDict):
+        return dict((k, thaw(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        if not any(isinstance(v, _THAWED) for v in value):
+            return value
+        thawed = [thaw(v) for v in value]
+        if all(t is v for t, v in zip(thawed, value)):
+            return value
+        return thawed if isinstance(value, list) else tuple(thawed)
+    if isinstance(value, dict):
+        thawed = dict((k, thaw(v)) for k, v in value.items())
+        if all(thawed[k] is v for k, v in value.items()):
+            return value
+        return thawed
+    flags = getattr(value, 'flags', None)
+    if flags is not None and not getattr(flags, 'writeable', True):
+        return value.copy()
+    return value
@@ -0,0 +1,293 @@
+"""
+This module provides the parsing of binary heap dumps of hprof
+(``heap=dump,format=b``).
+
+A dump is a sequence of records (``tag``, ``time``, ``length``, ``body``),
+the objects are sub-records of heap dump (segment) records. The dump is
+memory-mapped and parsed in two passes over the records, so that only the
+names of classes and the statistics per class are kept in memory, no
+matter how large the dump is:
+
+#. collect the classes (``LOAD CLASS`` records) and the ids of their names
+#. resolve the names (``STRING`` records) and count the instances and
+   arrays of the heap dump records
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import struct
+
+from penchy.jobs.parsing import mapped, native, to_bytes
+
+
+class HeapDumpError(ValueError):
+    """
+    Signals a malformed heap dump.
+    """
+    pass
+
+
+# tags of records
+STRING = 0x01
+LOAD_CLASS = 0x02
+HEAP_DUMP = 0x0C
+HEAP_DUMP_SEGMENT = 0x1C
+
+# tags of heap dump sub-records
+CLASS_DUMP = 0x20
+INSTANCE_DUMP = 0x21
+OBJECT_ARRAY_DUMP = 0x22
+PRIMITIVE_ARRAY_DUMP = 0x23
+
+# basic type -> (name, size), objects have the size of an id
+_BASIC_TYPES = {
+    2: ('object', None),
+    4: ('boolean', 1),
+    5: ('char', 2),
+    6: ('float', 4),
+    7: ('double', 8),
+    8: ('byte', 1),
+    9: ('short', 2),
+    10: ('int', 4),
+    11: ('long', 8),
+}
+
+# roots: tag -> count of ids and count of u4 that follow the object id
+_ROOTS = {
+    0xFF: (1, 0),  # unknown
+    0x01: (2, 0),  # JNI global
+    0x02: (1, 2),  # JNI local
+    0x03: (1, 2),  # java frame
+    0x04: (1, 1),  # native stack
+    0x05: (1, 0),  # sticky class
+    0x06: (1, 1),  # thread block
+    0x07: (1, 0),  # monitor used
+    0x08: (1, 2),  # thread object
+    # extensions of android
+    0x89: (1, 0),  # interned string
+    0x8A: (1, 0),  # finalizing
+    0x8B: (1, 0),  # debugger
+    0x8C: (1, 0),  # reference cleanup
+    0x8D: (1, 0),  # VM internal
+    0x8E: (1, 2),  # JNI monitor
+    0x90: (1, 0),  # unreachable
+    0xFE: (1, 1),  # heap dump info (heap type, name)
+}
+
+_RECORD = struct.Struct('>BII')
+
+
+def _header(buf):
+    """
+    Return the size of ids and the offset of the first record of the dump
+    ``buf``.
+    """
+    end = buf.find(to_bytes('\0'), 0, 64)
+    if not buf[:end].startswith(to_bytes('JAVA PROFILE ')):
+        raise HeapDumpError('No binary hprof heap dump')
+    id_size = struct.unpack_from('>I', buf, end + 1)[0]
+    if id_size not in (4, 8):
+        raise HeapDumpError('Unsupported size of ids: {0}'.format(id_size))
+    # identifier size and timestamp (two u4)
+    return id_size, end + 1 + 12
+
+
+def _records(buf, offset):
+    """
+    Yield tag, offset and length of the body of the records of ``buf``
+    starting at ``offset``.
+    """
+    size = len(buf)
+    header_size = _RECORD.size
+    unpack = _RECORD.unpack_from
+    while offset + header_size <= size:
+        tag, _, length = unpack(buf, offset)
+        offset += header_size
+        if offset + length > size:
+            raise HeapDumpError('Truncated record at {0}'.format(offset))
+        yield tag, offset, length
+        offset += length
+    if offset != size:
+        raise HeapDumpError('Truncated record at {0}'.format(offset))
+
+
+class _Histogram(object):
+    """
+    Counts the instances and their shallow sizes per class of the heap dump
+    records of a dump.
+    """
+
+    def __init__(self, buf, id_size):
+        self.buf = buf
+        self.id_size = id_size
+        id_format = 'I' if id_size == 4 else 'Q'
+        self.instance = struct.Struct('>{0}I{0}I'.format(id_format))
+        self.object_array = struct.Struct('>{0}II{0}'.format(id_format))
+        self.primitive_array = struct.Struct('>{0}IIB'.format(id_format))
+        # class id -> [count, size]
+        self.classes = {}
+        # basic type -> [count, size]
+        self.primitive_arrays = {}
+
+    def add(self, key, counts, size):
+        entry = counts.get(key)
+        if entry is None:
+            counts[key] = [1, size]
+        else:
+            entry[0] += 1
+            entry[1] += size
+
+    def parse(self, offset, end):
+        """
+        Parse the heap dump sub-records in ``buf[offset:end]``.
+        """
+        buf = self.buf
+        id_size = self.id_size
+        instance = self.instance.unpack_from
+        instance_size = self.instance.size
+        object_array = self.object_array.unpack_from
+        object_array_size = self.object_array.size
+        primitive_array = self.primitive_array.unpack_from
+        primitive_array_size = self.primitive_array.size
+        classes = self.classes
+        add = self.add
+
+        while offset < end:
+            tag = ord(buf[offset:offset + 1])
+            offset += 1
+            if tag == INSTANCE_DUMP:
+                _, _, class_id, length = instance(buf, offset)
+                offset += instance_size + length
+                add(class_id, classes, length)
+            elif tag == OBJECT_ARRAY_DUMP:
+                _, _, count, class_id = object_array(buf, offset)
+                offset += object_array_size + count * id_size
+                add(class_id, classes, count * id_size)
+            elif tag == PRIMITIVE_ARRAY_DUMP:
+                _, _, count, type_ = primitive_array(buf, offset)
+                size = count * self._type_size(type_)
+                offset += primitive_array_size + size
+                add(type_, self.primitive_arrays, size)
+            elif tag == CLASS_DUMP:
+                offset = self._skip_class(offset)
+            elif tag in _ROOTS:
+                ids, u4s = _ROOTS[tag]
+                offset += ids * id_size + u4s * 4
+            else:
+                raise HeapDumpError('Unknown heap dump sub-record {0:#x} at {1}'
+                                    .format(tag, offset - 1))
+        if offset != end:
+            raise HeapDumpError('Truncated heap dump sub-record at {0}'
+                                .format(end))
+
+    def _type_size(self, type_):
+        try:
+            size = _BASIC_TYPES[type_][1]
+        except KeyError:
+            raise HeapDumpError('Unknown basic type {0}'.format(type_))
+        return self.id_size if size is None else size
+
+    def _skip_class(self, offset):
+        """
+        Return the offset after the class dump at ``offset``.
+        """
+        buf = self.buf
+        u2 = struct.Struct('>H').unpack_from
+        # class, stack trace, super, loader, signers, protection domain,
+        # two reserved ids and the instance size
+        offset += 7 * self.id_size + 4 + 4
+        for entry in ('constant', 'static', 'instance'):
+            count = u2(buf, offset)[0]
+            offset += 2
+            for _ in range(count):
+                if entry == 'constant':
+                    offset += 2
+                elif entry == 'static':
+                    offset += self.id_size
+                else:
+                    # field name and type only
+                    offset += self.id_size + 1
+                    continue
+                type_ = ord(buf[offset:offset + 1])
+                offset += 1 + self._type_size(type_)
+        return offset
+
+
+def class_histogram(filename):
+    """
+    Return the count of instances and their shallow size per class of the
+    binary heap dump ``filename``.
+
+    The shallow size of an instance is the size of its fields, of an array
+    the size of its elements, as written in the dump (without object
+    headers). Arrays of primitive types are named like ``int[]``, class
+    names are in the notation of java (``java.lang.String``,
+    ``java.lang.Object[]``).
+
+    :param filename: path of the heap dump
+    :type filename: str
+    :returns: names of the classes, counts of instances and shallow sizes
+    :rtype: tuple of lists
+    :raises: :exc:`HeapDumpError` if the dump is malformed
+    """
+    with mapped(filename) as buf:
+        try:
+            id_size, start = _header(buf)
+            id_ = struct.Struct('>I' if id_size == 4 else '>Q').unpack_from
+
+            # class id -> id of the name
+            class_names = {}
+            for tag, offset, _ in _records(buf, start):
+                if tag == LOAD_CLASS:
+                    class_id = id_(buf, offset + 4)[0]
+                    class_names[class_id] = id_(buf, offset + 8 + id_size)[0]
+
+            needed = set(class_names.values())
+            strings = {}
+            histogram = _Histogram(buf, id_size)
+            for tag, offset, length in _records(buf, start):
+                if tag == STRING:
+                    string_id = id_(buf, offset)[0]
+                    if string_id in needed:
+                        strings[string_id] = buf[offset + id_size:
+                                                 offset + length]
+                elif tag in (HEAP_DUMP, HEAP_DUMP_SEGMENT):
+                    histogram.parse(offset, offset + length)
+        except struct.error as e:
+            raise HeapDumpError('Truncated heap dump: {0}'.format(e))
+
+    names, counts, sizes = [], [], []
+    for class_id, (count, size) in histogram.classes.items():
+        name = strings.get(class_names.get(class_id))
+        names.append(java_name(native(name)) if name is not None
+                     else '<unknown class {0:#x}>'.format(class_id))
+        counts.append(count)
+        sizes.append(size)
+    for type_, (count, size) in histogram.primitive_arrays.items():
+        names.append(_BASIC_TYPES[type_][0] + '[]')
+        counts.append(count)
+        sizes.append(size)
+    return names, counts, sizes
+
+
+_PRIMITIVES = {'Z': 'boolean', 'C': 'char', 'F': 'float', 'D': 'double',
+               'B': 'byte', 'S': 'short', 'I': 'int', 'J': 'long'}
+
+
+def java_name(name):
+    """
+    Return the class name ``name`` of the dump (e.g. ``java/lang/String`` or
+    ``[Ljava/lang/Object;``) in the notation of java.
+
+    :param name: internal name of the class
+    :type name: str
+    :rtype: str
+    """
+    dimensions = len(name) - len(name.lstrip('['))
+    if dimensions:
+        name = name[dimensions:]
+        if name.startswith('L') and name.endswith(';'):
+            name = name[1:-1]
+        else:
+            name = _PRIMITIVES.get(name, name)
+    return name.replace('/', '.') + '[]' * dimensions
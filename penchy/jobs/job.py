@@ -13,17 +13,18 @@ import subprocess
 from collections import defaultdict
 from functools import partial
 from hashlib import sha1
-from itertools import groupby, chain
-from operator import attrgetter
+from itertools import chain
 from tempfile import NamedTemporaryFile
 
 from penchy.compat import update_hasher, write
-from penchy.jobs.dependency import build_keys, edgesort
+from penchy.jobs.dependency import build_keys, edgesort, prune, shared_outputs
 from penchy.jobs.elements import PipelineElement, SystemFilter
+from penchy.jobs.executor import execute, group_sinks
 from penchy.jobs.filters import Receive, Send, WrongInputError
+from penchy.jobs.frozen import thaw
 from penchy.jobs.plots import Plot
 from penchy.jobs.hooks import Hook
-from penchy.jobs.typecheck import TypeCheckError
+from penchy.jobs.typecheck import OFF, TypeCheckError, infer
 from penchy.maven import get_classpath, setup_dependencies
 from penchy.util import tempdir, default
 
@@ -275,7 +276,8 @@ class Job(object):
     - ``job.filename`` has to be set to the filename of the job
     """
 
-    def __init__(self, compositions, server_flow, invocations=1):
+    def __init__(self, compositions, server_flow, invocations=1,
+                 server_workers=1, cache=None, prune_dead=True):
         """
         :param compositions: :class:`SystemComposition` to execute jobs on
         :type compositions: List of :class:`SystemComposition`
@@ -285,11 +287,24 @@ class Job(object):
                            :class:`~penchy.jobs.dependency.Pipeline`
         :param invocations: number of times to run job on each configuration
         :type invocations: int
+        :param server_workers: maximal number of elements of the serverside
+                               pipeline that run in parallel
+        :type server_workers: int
+        :param cache: cache for the outputs of the pipeline elements, no
+                      caching takes place if ``None``
+        :type cache: :class:`~penchy.jobs.cache.OutputCache`
+        :param prune_dead: skip the elements whose outputs reach no element with
+                      side effects (see
+                      :func:`~penchy.jobs.dependency.prune`)
+        :type prune_dead: bool
         """
         self.compositions = compositions if isinstance(compositions, list) \
                             else [compositions]
         self.server_flow = list(chain.from_iterable(dep.edges for dep in server_flow))
         self.invocations = invocations
+        self.server_workers = server_workers
+        self.cache = cache
+        self.prune_dead = prune_dead
         self.send = None
         self.timeout = None
         self.receive = None
@@ -317,7 +332,7 @@ class Job(object):
 
         composition.jvm.basepath = composition.node_setting.basepath
 
-        _, edge_order = edgesort(composition.starts, composition.flow)
+        edge_order = self._plan(composition.starts, composition.flow)
 
         for i in range(1, self.invocations + 1):
             log.info('Run invocation {0}'.format(i))
@@ -325,25 +340,8 @@ class Job(object):
                 composition.jvm.run()
 
         log.info('Run pipeline')
-        for sink, group in groupby(edge_order, attrgetter('sink')):
-            kwargs = build_keys(group)
-            if isinstance(sink, SystemFilter):
-                kwargs[':environment:'] = self._build_environment()
-            log.debug('Passing this input to {0}:\n{1}'
-                      .format(sink.__class__.__name__,
-                              kwargs))
-            try:
-                sink.run(**kwargs)
-            except TypeCheckError:
-                log.error('Type check failed on component {0} and arguments {1}'
-                          .format(sink.__class__.__name__, kwargs))
-                raise
-            except WrongInputError:
-                log.error('Run failed on component {0} and arguments {1}'
-                          .format(sink.__class__.__name__, kwargs))
-                raise
-            log.debug('{0} transformed input to:\n{1}'
-                      .format(sink.__class__.__name__, sink.out))
+        execute(edge_order, partial(self._run_sink,
+                                    shared=shared_outputs(edge_order)))
 
         # reset state of filters for running multiple configurations
         composition._reset()
@@ -386,32 +384,104 @@ class Job(object):
             log.error('There is no Receiver in the serverside flow. Aborting.')
             raise ValueError('There is no Receiver in the serverside flow')
 
-        _, edge_order = edgesort(starts, self.server_flow)
+        edge_order = self._plan(starts, self.server_flow)
 
         # all starts are receivers, run them with the environment
         for start in starts:
             start.run(**{':environment:': self._build_environment()})
 
         # run other filters
-        for sink, group in groupby(edge_order, attrgetter('sink')):
-            kwargs = build_keys(group)
+        execute(edge_order,
+                partial(self._run_sink, shared=shared_outputs(edge_order)),
+                self.server_workers)
+
+    def _plan(self, starts, flow):
+        """
+        Return the sorted edges of ``flow`` that have to be executed.
+
+        :param starts: elements of ``flow`` without dependencies
+        :type starts: list of :class:`~penchy.jobs.elements.PipelineElement`
+        :param flow: flow to plan
+        :type flow: list of :class:`~penchy.jobs.dependency.Edge`
+        :returns: sorted edges
+        :rtype: list of :class:`~penchy.jobs.dependency.Edge`
+        """
+        _, edge_order = edgesort(starts, flow)
+        if self.prune_dead:
+            edge_order, pruned = prune(edge_order)
+            if pruned:
+                log.info('Skipping elements without effect: {0}'
+                         .format(', '.join(repr(e) for e in pruned)))
+
+        checked = self._check_statically(edge_order)
+        if checked:
+            log.debug('Inputs are statically checked for: {0}'
+                      .format(', '.join(repr(e) for e in checked)))
+        return edge_order
+
+    def _check_statically(self, edge_order):
+        """
+        Disable the runtime type checks of all sinks of ``edge_order`` whose
+        inputs are proven by the output types of their sources.
+
+        Sinks that are marked with ``DYNAMIC_TYPES`` are always checked at
+        runtime.
+
+        :param edge_order: sorted edges
+        :type edge_order: list of :class:`~penchy.jobs.dependency.Edge`
+        :returns: the sinks that are not checked at runtime
+        :rtype: list of :class:`~penchy.jobs.elements.PipelineElement`
+        """
+        checked = []
+        for sink, edges in group_sinks(edge_order):
+            types = infer(edges)
             if isinstance(sink, SystemFilter):
-                kwargs[':environment:'] = self._build_environment()
-            log.debug('Passing this input to {0}:\n{1}'
-                      .format(sink.__class__.__name__,
-                              kwargs))
-            try:
+                types[':environment:'] = (dict,)
+            if not sink.DYNAMIC_TYPES and sink.inputs.satisfied_by(types):
+                sink.check_policy = OFF
+                checked.append(sink)
+            else:
+                sink.check_policy = None
+        return checked
+
+    def _run_sink(self, sink, edges, shared=()):
+        """
+        Run ``sink`` on the outputs of the sources of ``edges``.
+
+        Outputs that are passed to several inputs are frozen, elements that
+        are marked with ``MUTATES_INPUT`` receive copies of them.
+
+        :param sink: the element to run
+        :type sink: :class:`~penchy.jobs.elements.PipelineElement`
+        :param edges: all edges that end in ``sink``
+        :type edges: list of :class:`~penchy.jobs.dependency.Edge`
+        :param shared: outputs that are passed to more than one input (see
+                       :func:`~penchy.jobs.dependency.shared_outputs`)
+        :type shared: set
+        """
+        kwargs = build_keys(edges, shared)
+        if sink.MUTATES_INPUT:
+            kwargs = dict((name, thaw(value)) for name, value in kwargs.items())
+        if isinstance(sink, SystemFilter):
+            kwargs[':environment:'] = self._build_environment()
+        log.debug('Passing this input to {0}:\n{1}'
+                  .format(sink.__class__.__name__,
+                          kwargs))
+        try:
+            if self.cache is not None:
+                self.cache.run(sink, kwargs)
+            else:
                 sink.run(**kwargs)
-            except TypeCheckError:
-                log.error('Type check failed on component {0} and arguments {1}'
-                          .format(sink.__class__.__name__, kwargs))
-                raise
-            except WrongInputError:
-                log.error('Run failed on component {0} and arguments {1}'
-                          .format(sink.__class__.__name__, kwargs))
-                raise
-            log.debug('{0} transformed input to:\n{1}'
-                      .format(sink.__class__.__name__, sink.out))
+        except TypeCheckError:
+            log.error('Type check failed on component {0} and arguments {1}'
+                      .format(sink.__class__.__name__, kwargs))
+            raise
+        except WrongInputError:
+            log.error('Run failed on component {0} and arguments {1}'
+                      .format(sink.__class__.__name__, kwargs))
+            raise
+        log.debug('{0} transformed input to:\n{1}'
+                  .format(sink.__class__.__name__, sink.out))
 
     def _get_server_dependencies(self):
         """
@@ -6,9 +6,11 @@ This module provides JVMs to run programs.
  :copyright: PenchY Developers 2011-2012, see AUTHORS
  :license: MIT License, see LICENSE
 """
+import glob
 import itertools
 import logging
 import os
+import re
 import shlex
 import subprocess
 from hashlib import sha1
@@ -77,6 +79,8 @@ class JVM(object):
 
         # jvm process
         self.proc = None
+        # major version, see ``version``
+        self._version = None
 
     @property
     def workload(self):
@@ -120,6 +124,29 @@ class JVM(object):
 
         self._tool = tool
 
+    @property
+    def version(self):
+        """
+        The major version of the JVM (e.g. 8 for 1.8.0 and 11 for 11.0.2) or
+        ``None`` if it can not be determined.
+        """
+        if self._version is None:
+            executable = os.path.join(self.basepath, self._path)
+            try:
+                p = subprocess.Popen([executable, '-version'],
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                _, output = p.communicate()
+            except OSError:
+                log.warn('Could not determine the version of {0}'.format(executable))
+                return None
+            match = _VERSION_RE.search(output.decode('utf-8', 'replace'))
+            if match is None:
+                log.warn('Could not determine the version of {0}'.format(executable))
+                return None
+            major, minor = match.groups()
+            self._version = int(minor) if major == '1' and minor else int(major)
+        return self._version
+
     @property
     def timeout(self):
         """
@@ -207,7 +234,7 @@ class JVM(object):
         cp = ['-classpath', os.pathsep.join(self._classpath)] if self._classpath \
              else []
         if self.tool:
-            options = self._options + self.tool.arguments
+            options = self._options + self.tool.jvm_arguments(self)
         else:
             options = self._options
         args = self.workload.arguments if self.workload else []
@@ -362,8 +389,6 @@ class ValgrindJVM(WrappedJVM):
 
         self.hooks.append(Hook(teardown=lambda: self.out['valgrind_log']
                                .append(os.path.abspath(self.log_name))))
-        if hasattr(self, '_hooks'):
-            self.hooks.extend(self._hooks)
 
     @property
     def cmdline(self):
@@ -401,8 +426,20 @@ class MemcheckJVM(ValgrindJVM):
     Outputs:
 
     - ``valgrind_log``: paths to Memcheck log file.
+    - ``memcheck``: paths to the xml output of Memcheck (the largest one if
+      several processes were traced).
     """
-    arguments = ['--tool=memcheck']
+    outputs = Types(('valgrind_log', list, path),
+                    ('memcheck', list, path))
+    _memcheck_file = 'penchy-memcheck.%p.xml'
+    arguments = ['--tool=memcheck',
+                 '--xml=yes',
+                 '--xml-file={0}'.format(_memcheck_file)]
+
+    def __init__(self, *args, **kwargs):
+        super(MemcheckJVM, self).__init__(*args, **kwargs)
+        self.hooks.append(Hook(teardown=lambda: self.out['memcheck']
+                               .append(_process_output(MemcheckJVM._memcheck_file))))
 
 
 class CacheGrindJVM(ValgrindJVM):
@@ -422,8 +459,8 @@ class CacheGrindJVM(ValgrindJVM):
 
     def __init__(self, *args, **kwargs):
         super(CacheGrindJVM, self).__init__(*args, **kwargs)
-        self._hooks = [Hook(teardown=lambda: self.out['cachegrind']
-                            .append(os.path.abspath(CacheGrindJVM._cachegrind_file)))]
+        self.hooks.append(Hook(teardown=lambda: self.out['cachegrind']
+                               .append(os.path.abspath(CacheGrindJVM._cachegrind_file))))
 
 
 class CallGrindJVM(ValgrindJVM):
@@ -443,8 +480,8 @@ class CallGrindJVM(ValgrindJVM):
 
     def __init__(self, *args, **kwargs):
         super(CallGrindJVM, self).__init__(*args, **kwargs)
-        self._hooks = [Hook(teardown=lambda: self.out['callgrind']
-                            .append(os.path.abspath(CallGrindJVM._callgrind_file)))]
+        self.hooks.append(Hook(teardown=lambda: self.out['callgrind']
+                               .append(os.path.abspath(CallGrindJVM._callgrind_file))))
 
 
 class MassifJVM(ValgrindJVM):
@@ -454,8 +491,45 @@ class MassifJVM(ValgrindJVM):
     Outputs:
 
     - ``valgrind_log``: paths to Valgrind log file.
+    - ``massif``: paths to Massif profile (the largest one if several
+      processes were traced).
+    """
+    outputs = Types(('valgrind_log', list, path),
+                    ('massif', list, path))
+    _massif_file = 'penchy-massif.%p'
+    arguments = ['--tool=massif',
+                 '--massif-out-file={0}'.format(_massif_file)]
+
+    def __init__(self, *args, **kwargs):
+        super(MassifJVM, self).__init__(*args, **kwargs)
+        self.hooks.append(Hook(teardown=lambda: self.out['massif']
+                               .append(_process_output(MassifJVM._massif_file))))
+
+
+def _process_output(filename):
+    """
+    Return the absolute path of the largest output of valgrind for the
+    per-process ``filename`` (``%p`` is the pid).
+
+    Valgrind traces the children of the JVM (``--trace-children=yes``) and
+    every process writes its own output, the one of the JVM that ran the
+    workload is the largest, those of launchers and short lived children are
+    small.
+
+    :param filename: name of the output with ``%p`` for the pid
+    :type filename: str
+    :returns: path of the largest output (of ``filename`` if there is none)
+    :rtype: str
     """
-    arguments = ['--tool=massif']
+    outputs = glob.glob(filename.replace('%p', '*'))
+    if not outputs:
+        log.warn('Valgrind wrote no {0}'.format(filename))
+        return os.path.abspath(filename)
+    return os.path.abspath(max(outputs, key=os.path.getsize))
+
+
+# version string of ``java -version``, e.g. ``version "1.8.0_292"``
+_VERSION_RE = re.compile(r'version "(\d+)(?:\.(\d+))?')
 
 
 def _extract_classpath(options):
@@ -0,0 +1,351 @@
+"""
+This module provides the parsing of large text outputs of tools.
+
+Files are memory-mapped, the parsed section is located with ``find`` and all
+of its lines are matched in one pass of a regular expression, so that the
+file is neither read line by line nor copied into strings before it is
+parsed.  The results are typed columns::
+
+    with mapped(filename) as buf:
+        first_line, start, end = find_section(buf, b'SITES BEGIN',
+                                              b'SITES END', skip=2)
+        columns = match_lines(pattern, buf, start, end)
+
+Large json arrays are decoded element by element with :func:`json_items`.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import io
+import json
+import mmap
+import re
+from contextlib import contextmanager
+
+from penchy.compat import on_python3, str, unicode
+
+
+class MarkerNotFound(ValueError):
+    """
+    Signals that a marker of a section is missing.
+    """
+    def __init__(self, marker):
+        super(MarkerNotFound, self).__init__('Marker {0} not found.'
+                                             .format(native(marker)))
+        self.marker = marker
+
+
+class InvalidLine(ValueError):
+    """
+    Signals that a line of a section does not match.
+    """
+    def __init__(self, line):
+        super(InvalidLine, self).__init__('Received invalid input:\n{0}'
+                                          .format(native(line)))
+        self.line = line
+
+
+def native(string):
+    """
+    Return the byte string ``string`` as native string, i.e. as text on
+    python3.
+
+    :param string: string to convert
+    :type string: bytes
+    :rtype: str
+    """
+    if on_python3 and isinstance(string, str):  # pragma: no cover
+        return string.decode('utf8')
+    return string
+
+
+def to_bytes(string):
+    """
+    Return ``string`` encoded as bytes.
+
+    :param string: string to convert
+    :type string: str, unicode, bytes
+    :rtype: bytes
+    """
+    if isinstance(string, unicode):
+        return string.encode('utf8')
+    return string
+
+
+@contextmanager
+def mapped(filename):
+    """
+    Memory-map the file ``filename`` read-only.
+
+    :param filename: file to map
+    :type filename: str
+    :returns: the mapped file (empty bytes for empty files)
+    :rtype: :class:`mmap.mmap`
+    """
+    with open(filename, 'rb') as fobj:
+        try:
+            buf = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can not be mapped
+            yield to_bytes('')
+            return
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+
+def find_line(buf, marker, start=0, end=None):
+    """
+    Return the offsets of the first line of ``buf[start:end]`` that starts
+    with ``marker`` or ``None`` if there is none.
+
+    :param buf: buffer to search
+    :type buf: bytes or :class:`mmap.mmap`
+    :param marker: start of the line
+    :type marker: bytes
+    :param start: offset to start the search at
+    :type start: int
+    :param end: offset to end the search at, ``None`` for the end of ``buf``
+    :type end: int
+    :returns: offsets of the start and the end (after the newline) of the line
+    :rtype: tuple of int
+    """
+    end = len(buf) if end is None else end
+    newline = to_bytes('\n')
+    pos = start
+    while True:
+        pos = buf.find(marker, pos, end)
+        if pos < 0:
+            return None
+        if pos == 0 or buf[pos - 1:pos] == newline:
+            eol = buf.find(newline, pos, end)
+            return pos, end if eol < 0 else eol + 1
+        pos += 1
+
+
+def find_section(buf, start_marker, end_marker, skip=0):
+    """
+    Return the section of ``buf`` that is enclosed by the lines that start
+    with ``start_marker`` and ``end_marker``, without its first ``skip``
+    lines.
+
+    :param buf: buffer to search
+    :type buf: bytes or :class:`mmap.mmap`
+    :param start_marker: start of the first line of the section
+    :type start_marker: str
+    :param end_marker: start of the line after the section
+    :type end_marker: str
+    :param skip: count of lines to skip after the first line
+    :type skip: int
+    :returns: the first line and the offsets of the section
+    :rtype: tuple of bytes, int, int
+    :raises: :exc:`MarkerNotFound` if a marker is missing
+    """
+    start_marker, end_marker = to_bytes(start_marker), to_bytes(end_marker)
+    found = find_line(buf, start_marker)
+    if found is None:
+        raise MarkerNotFound(start_marker)
+    first_line = buf[found[0]:found[1]]
+
+    start = found[1]
+    newline = to_bytes('\n')
+    for _ in range(skip):
+        eol = buf.find(newline, start)
+        if eol < 0:
+            raise MarkerNotFound(end_marker)
+        start = eol + 1
+
+    found = find_line(buf, end_marker, start)
+    if found is None:
+        raise MarkerNotFound(end_marker)
+    return first_line, start, found[0]
+
+
+def compile_lines(regex):
+    """
+    Compile the regular expression of a line ``regex`` (text or compiled)
+    to a bytes pattern that matches whole lines, see :func:`match_lines`.
+
+    :param regex: regular expression that matches the start of a line
+    :type regex: str or compiled regular expression
+    :rtype: compiled regular expression
+    """
+    flags = 0
+    if not isinstance(regex, (str, unicode)):
+        regex, flags = regex.pattern, regex.flags
+    flags = (flags & ~re.UNICODE) | re.MULTILINE
+    # the closing newline ends comments in verbose patterns
+    pattern = to_bytes('^(?:') + to_bytes(regex) + \
+        to_bytes('\n)' if flags & re.VERBOSE else ')') + to_bytes(r'[^\n]*\n?')
+    return re.compile(pattern, flags)
+
+
+# size of the chunks in which newlines are counted
+_CHUNK = 2 ** 24
+
+
+def count_lines(buf, start=0, end=None):
+    """
+    Return the count of lines in ``buf[start:end]``.
+
+    :param buf: buffer to search
+    :type buf: bytes or :class:`mmap.mmap`
+    :rtype: int
+    """
+    end = len(buf) if end is None else end
+    newline = to_bytes('\n')
+    count = 0
+    for pos in range(start, end, _CHUNK):
+        count += buf[pos:min(pos + _CHUNK, end)].count(newline)
+    if end > start and buf[end - 1:end] != newline:
+        count += 1
+    return count
+
+
+def match_lines(pattern, buf, start=0, end=None):
+    """
+    Match all lines of ``buf[start:end]`` with ``pattern`` in one pass.
+
+    Every match starts at the start of a line and ends after its newline,
+    so all lines match if there are as many matches as lines.
+
+    :param pattern: pattern as returned by :func:`compile_lines`
+    :type pattern: compiled regular expression
+    :param buf: buffer to parse
+    :type buf: bytes or :class:`mmap.mmap`
+    :param start: offset of the first line
+    :type start: int
+    :param end: offset after the last line, ``None`` for the end of ``buf``
+    :type end: int
+    :returns: the matched strings of each named group of ``pattern``
+    :rtype: dict of lists of bytes
+    :raises: :exc:`InvalidLine` if a line does not match
+    """
+    end = len(buf) if end is None else end
+    rows = pattern.findall(buf, start, end)
+    if len(rows) != count_lines(buf, start, end):
+        raise InvalidLine(_invalid_line(pattern, buf, start, end))
+
+    if pattern.groups == 1:
+        return dict((name, rows) for name in pattern.groupindex)
+    return dict((name, [row[i - 1] for row in rows])
+                for name, i in pattern.groupindex.items())
+
+
+def _invalid_line(pattern, buf, start, end):
+    """
+    Return the first line of ``buf[start:end]`` that ``pattern`` does not
+    match.
+    """
+    pos = start
+    for match in pattern.finditer(buf, start, end):
+        if match.start() != pos or match.group().count(to_bytes('\n')) > 1:
+            break
+        pos = match.end()
+    eol = buf.find(to_bytes('\n'), pos, end)
+    return buf[pos:end if eol < 0 else eol]
+
+
+def converter(type_):
+    """
+    Return a function that converts a column of matched strings to values
+    of ``type_``: ints and floats are parsed, strings are returned as
+    native strings.
+
+    :param type_: type of the column
+    :type type_: type
+    :rtype: function
+    """
+    if issubclass(type_, (int, float)):
+        return lambda values: [type_(v) for v in values]
+    if on_python3:  # pragma: no cover
+        return lambda values: [v.decode('utf8') for v in values]
+    return lambda values: values
+
+
+# size of the chunks in which json is read
+_JSON_CHUNK = 2 ** 16
+
+# whitespace between the tokens of json
+_WHITESPACE_RE = re.compile(r'\s*')
+
+
+class InvalidJSON(ValueError):
+    """
+    Signals that a file is no json array.
+    """
+    pass
+
+
+def json_items(filename, chunk=_JSON_CHUNK):
+    """
+    Yield the decoded elements of the json array in the file ``filename``.
+
+    The file is read in chunks and every element is decoded as soon as it
+    is complete, so only one element (and one chunk) is kept in memory at a
+    time.
+
+    :param filename: path of the file
+    :type filename: str
+    :param chunk: count of characters that are read at once
+    :type chunk: int
+    :raises: :exc:`InvalidJSON` if the file is no json array
+    """
+    decoder = json.JSONDecoder()
+    whitespace = _WHITESPACE_RE.match
+    text = ''
+    pos = 0
+    eof = need_more = False
+    # the next token: the opening bracket, the first element (or the closing
+    # bracket), an element, a separator (or the closing bracket)
+    expected = '['
+    with io.open(filename, encoding='utf8') as fobj:
+        while True:
+            if need_more:
+                if eof:
+                    raise InvalidJSON('Unexpected end of json in {0}'.format(filename))
+                # read at least as much again as is buffered, so that large
+                # elements are decoded in linear time
+                more = fobj.read(max(chunk, len(text) - pos))
+                eof = not more
+                text = text[pos:] + more
+                pos = 0
+                need_more = False
+            pos = whitespace(text, pos).end()
+            if pos == len(text):
+                need_more = True
+                continue
+
+            char = text[pos]
+            if expected == '[':
+                if char != '[':
+                    raise InvalidJSON('No json array in {0}'.format(filename))
+                pos += 1
+                expected = 'first'
+            elif expected == ',':
+                if char == ']':
+                    return
+                if char != ',':
+                    raise InvalidJSON('Missing separator in {0} at {1!r}'
+                                      .format(filename, text[pos:pos + 20]))
+                pos += 1
+                expected = 'element'
+            elif expected == 'first' and char == ']':
+                return
+            else:
+                try:
+                    item, end = decoder.raw_decode(text, pos)
+                except ValueError as e:
+                    if eof:
+                        raise InvalidJSON('Invalid json in {0}: {1}'.format(filename, e))
+                    need_more = True
+                    continue
+                # an element that ends with the buffer may be incomplete
+                # (numbers)
+                if end == len(text) and not eof:
+                    need_more = True
+                    continue
+                pos = end
+                expected = ','
+                yield item
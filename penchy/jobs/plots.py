@@ -33,7 +33,11 @@ class Plot(Filter):
 
     Notice: It is possible to set ``x_max`` < ``x_min`` and
     ``y_max`` < ``y_min``.
+
+    Plots are not threadsafe because matplotlib's pyplot is not.
     """
+    THREADSAFE = False
+    SIDE_EFFECTS = True
     outputs = Types(('filename', path))
 
     def __init__(self, filename, title="", xlabel="", ylabel="",
@@ -267,6 +271,8 @@ class ScatterPlot(Plot):
 
     - ``filename``: Filename of the generated image
     """
+    # consumes the labels of its inputs
+    MUTATES_INPUT = True
 
     def __init__(self, labels=True, markers=False, colors=False, *arg, **kwarg):
         """
@@ -381,6 +387,8 @@ class LinePlot(Plot):
 
     - ``filename``: Filename of the generated image
     """
+    # consumes the error bars of its inputs
+    MUTATES_INPUT = True
 
     def __init__(self, xerror_bars=False, yerror_bars=False,
                  xecolor='red', yecolor='red', *arg, **kwarg):
@@ -0,0 +1,141 @@
+"""
+This module provides columnar data for the pipeline.
+
+On the server columns are numpy arrays, so that filters can process them
+vectorized; on the clients, where numpy may not be available, they are
+plain lists. Filters that accept lists accept arrays as well::
+
+    Types(('values', list, int))
+
+is satisfied by a list of ints and by a one-dimensional integer array; the
+array is checked by its dtype instead of element by element (see
+:mod:`penchy.jobs.typecheck`).
+
+The filters that parse large outputs of tools and workloads (e.g.
+:class:`~penchy.jobs.filters.DacapoHarness` and the hprof, valgrind and log
+filters) output their numeric columns as columns if they are created with
+``columnar=True``. This is opt-in, because code that follows a filter may
+rely on the semantics of lists (e.g. ``+`` concatenates lists but adds
+arrays). The parsers run on the clients, so their columns are lists there;
+columns are converted to lists anyway before they are sent to the server
+and when they are dumped. :class:`~penchy.jobs.filters.Receive` with
+``columnar=True`` turns the received lists of numbers into arrays again, so
+that the filters of the server process them vectorized.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import numbers
+
+from penchy import is_server
+
+if is_server:
+    import numpy as np
+else:  # pragma: no cover
+    np = None
+
+
+def is_array(value):
+    """
+    Return if ``value`` is an array.
+
+    :rtype: bool
+    """
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def column(values, dtype=None):
+    """
+    Return ``values`` as column, i.e. an array on the server and a list
+    elsewhere.
+
+    :param values: values of the column
+    :type values: iterable
+    :param dtype: type of the values (e.g. ``int`` or ``float``)
+    :type dtype: type
+    :returns: the column
+    :rtype: :class:`numpy.ndarray` or list
+    """
+    if np is None:
+        if dtype is not None:
+            return [dtype(v) for v in values]
+        return values if isinstance(values, list) else list(values)
+    if not isinstance(values, (list, tuple)) and not is_array(values):
+        values = list(values)
+    return np.asarray(values, dtype=dtype)
+
+
+def tolist(value):
+    """
+    Return ``value`` with arrays converted to lists.
+
+    :param value: value to convert
+    :returns: the converted value
+    """
+    if is_array(value):
+        return value.tolist()
+    return value
+
+
+def tocolumns(value):
+    """
+    Return ``value`` with its (nested) lists of numbers converted to
+    columns.
+
+    :param value: value to convert, e.g. received results
+    :returns: the converted value
+    """
+    if isinstance(value, list):
+        if value and all(isinstance(v, numbers.Real) and not isinstance(v, bool)
+                         for v in value):
+            return column(value)
+        return [tocolumns(v) for v in value]
+    if isinstance(value, dict):
+        return dict((k, tocolumns(v)) for k, v in value.items())
+    return value
+
+
+def encode(value):
+    """
+    Encode arrays for :func:`json.dumps`, use as its ``default``.
+
+    :raises: :exc:`TypeError` if ``value`` is no array
+    """
+    if is_array(value):
+        return tolist(value)
+    raise TypeError('{0!r} is not JSON serializable'.format(value))
+
+
+def sort_order(keys, length, reverse=False):
+    """
+    Return the indices that sort rows by the columns ``keys`` stably.
+
+    The first column of ``keys`` is the primary key. Rows with equal keys
+    keep their order, also if sorted in descending order.
+
+    :param keys: columns to sort by
+    :type keys: list of columns
+    :param length: count of rows
+    :type length: int
+    :param reverse: sort in descending order
+    :type reverse: bool
+    :returns: indices of the rows in sorted order
+    :rtype: sequence of int
+    """
+    if np is None:
+        order = list(range(length))
+        for key in reversed(keys):
+            order = sorted(order, key=key.__getitem__, reverse=reverse)
+        return order
+
+    order = np.arange(length)
+    for key in reversed(keys):
+        key = np.asarray(key)[order]
+        if reverse:
+            # a stable descending sort is the reversed stable ascending sort
+            # of the reversed keys
+            indices = length - 1 - np.argsort(key[::-1], kind='mergesort')[::-1]
+        else:
+            indices = np.argsort(key, kind='mergesort')
+        order = order[indices]
+    return order
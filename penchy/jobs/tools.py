@@ -9,6 +9,7 @@ This module provides tools.
 """
 import os.path
 
+from penchy.compat import path
 from penchy.jobs.elements import Tool
 from penchy.jobs.hooks import Hook
 from penchy.jobs.typecheck import Types
@@ -74,6 +75,8 @@ class HProf(Tool):
     Outputs:
 
     - ``hprof``: HProf output, i.e. the path to the java.hprof.txt file
+      (java.hprof for binary heap dumps with ``format=b``, the value of
+      ``file`` if given)
     """
 
     DEPENDENCIES = set()
@@ -90,9 +93,113 @@ class HProf(Tool):
         # chooses always the right file because a new directory
         # is generated for each invocation
         self.hooks.append(Hook(teardown=lambda: self.out['hprof']
-                                          .append(os.path.abspath('java.hprof.txt'))))
+                                          .append(os.path.abspath(self.filename))))
         self.option = option
 
+    @property
+    def filename(self):
+        """
+        The name of the file hprof writes to.
+        """
+        options = dict(o.partition('=')[::2] for o in self.option.split(','))
+        if 'file' in options:
+            return options['file']
+        return 'java.hprof' if options.get('format') == 'b' else 'java.hprof.txt'
+
     @property
     def arguments(self):
         return ["-agentlib:hprof={0}".format(self.option)]
+
+
+class JVMLog(Tool):
+    """
+    A tool that makes the JVM log to a file.
+
+    The JVMs up to version 8 log with their classic options, later JVMs with
+    the unified logging (``-Xlog``). By default the options are chosen by
+    the version of the JVM that runs the tool.
+
+    This tool is not intended for direct usage.
+    Use :class:`GCLog` or :class:`JITLog`.
+    """
+
+    DEPENDENCIES = set()
+
+    # name of the output, the log file and the options of both formats
+    # (``{0}`` is replaced by the log file)
+    _OUTPUT = None
+    _FILENAME = None
+    _CLASSIC = []
+    _UNIFIED = []
+
+    def __init__(self, unified=None, name=None):
+        """
+        :param unified: use the unified logging, ``None`` to choose by the
+                        version of the JVM
+        :type unified: bool
+        :param name: descriptive name of this tool
+        :type name: str
+        """
+        super(JVMLog, self).__init__(name)
+        self.unified = unified
+        # chooses always the right file because a new directory
+        # is generated for each invocation
+        self.hooks.append(Hook(teardown=lambda: self.out[self._OUTPUT]
+                                          .append(os.path.abspath(self._FILENAME))))
+
+    @property
+    def arguments(self):
+        return self._arguments(self.unified is not False)
+
+    def jvm_arguments(self, jvm):
+        unified = self.unified
+        if unified is None:
+            version = jvm.version
+            unified = version is None or version >= 9
+        return self._arguments(unified)
+
+    def _arguments(self, unified):
+        options = self._UNIFIED if unified else self._CLASSIC
+        return [o.format(self._FILENAME) for o in options]
+
+
+class GCLog(JVMLog):
+    """
+    This tool logs the garbage collections of the JVM (``-Xloggc`` or
+    ``-Xlog:gc``), see :class:`JVMLog`.
+
+    Outputs:
+
+    - ``gc_log``: path to the gc log
+    """
+
+    outputs = Types(('gc_log', list, path))
+
+    _OUTPUT = 'gc_log'
+    _FILENAME = 'penchy-gc.log'
+    _CLASSIC = ['-Xloggc:{0}']
+    _UNIFIED = ['-Xlog:gc:file={0}:uptime,level,tags']
+
+
+class JITLog(JVMLog):
+    """
+    This tool logs the compilations of the JIT compiler of the JVM
+    (``-XX:+PrintCompilation`` or ``-Xlog:jit+compilation``), see
+    :class:`JVMLog`. The log is written to a file, not to the output of the
+    workload.
+
+    Outputs:
+
+    - ``jit_log``: path to the compilation log
+    """
+
+    outputs = Types(('jit_log', list, path))
+
+    _OUTPUT = 'jit_log'
+    _FILENAME = 'penchy-jit.log'
+    _CLASSIC = ['-XX:+UnlockDiagnosticVMOptions',
+                '-XX:+PrintCompilation',
+                '-XX:+LogVMOutput',
+                '-XX:-DisplayVMOutput',
+                '-XX:LogFile={0}']
+    _UNIFIED = ['-Xlog:jit+compilation=debug:file={0}:none']
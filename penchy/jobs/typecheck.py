@@ -8,12 +8,35 @@ outputs in the pipeline.
  :license: MIT License, see LICENSE
 """
 import logging
-from itertools import chain
+import random
+from itertools import islice
 from collections import defaultdict
 
+from penchy import compat
+
 
 log = logging.getLogger(__name__)
 
+#: check every element of the inputs
+FULL = 'full'
+#: check the first and some randomly chosen elements of containers
+SAMPLED = 'sampled'
+#: check only that the inputs are present
+OFF = 'off'
+
+POLICIES = (FULL, SAMPLED, OFF)
+
+# types whose instances are descended into if they are part of a sum type
+_CONTAINERS = (list, tuple, dict, set, frozenset)
+
+# kinds of array dtypes (see ``numpy.dtype.kind``) whose values are instances
+# of a type
+_KINDS = {bool: 'b', int: 'biu', float: 'f', complex: 'c',
+          compat.str: 'S', compat.unicode: 'U'}
+
+# own generator to leave the state of the global one untouched
+_random = random.Random()
+
 
 class TypeCheckError(Exception):
     """
@@ -22,11 +45,234 @@ class TypeCheckError(Exception):
     pass
 
 
+def set_policy(policy, sample_size=None):
+    """
+    Set the policy that :meth:`Types.check_input` uses by default.
+
+    - :data:`FULL` checks every element of the inputs (default)
+    - :data:`SAMPLED` checks the first and ``sample_size`` randomly chosen
+      elements of each container
+    - :data:`OFF` checks only that all inputs are present
+
+    :raises: :exc:`ValueError` if ``policy`` is unknown
+    :param policy: one of :data:`POLICIES`
+    :type policy: str
+    :param sample_size: count of random elements to check per container
+    :type sample_size: int
+    """
+    if policy not in POLICIES:
+        raise ValueError('Unknown type check policy "{0}", expected one of {1}'
+                         .format(policy, ', '.join(POLICIES)))
+    Types.policy = policy
+    if sample_size is not None:
+        Types.sample_size = sample_size
+
+
+def _compile(types):
+    """
+    Return a validator for the type description ``types``.
+
+    The validator is called with the value and the count of elements to
+    sample from each container (``None`` to check all elements) and returns
+    if the value satisfies ``types``. It iterates the value in place and
+    does not build intermediate lists.
+
+    :param types: types of a description (without name)
+    :type types: tuple
+    :rtype: function
+    """
+    type_ = types[0]
+    if isinstance(type_, list):
+        type_ = tuple(type_)
+
+    check_element = _compile(types[1:]) if len(types) > 1 else None
+    check_array = _compile_array(types, check_element)
+
+    if len(types) == 1:
+        def check(value, sample):
+            if isinstance(value, type_):
+                return True
+            return check_array is not None and _is_array(value) and \
+                check_array(value, sample)
+        return check
+
+    if isinstance(type_, tuple):
+        # only descend into the containers of sum types
+        containers = tuple(t for t in type_ if issubclass(t, _CONTAINERS))
+        mappings = tuple(t for t in type_ if issubclass(t, dict))
+    else:
+        containers = type_
+        mappings = type_ if issubclass(type_, dict) else ()
+
+    def check(value, sample):
+        if not isinstance(value, type_):
+            return check_array is not None and _is_array(value) and \
+                check_array(value, sample)
+        if not isinstance(value, containers):
+            return True
+        if mappings and isinstance(value, mappings):
+            value = getattr(value, 'itervalues', value.values)()
+        for v in _elements(value, sample):
+            if not check_element(v, sample):
+                return False
+        return True
+    return check
+
+
+def _is_array(value):
+    """
+    Return if ``value`` is an array (e.g. of numpy).
+    """
+    return hasattr(value, 'dtype') and hasattr(value, 'ndim')
+
+
+def _members(type_):
+    """
+    Return the types of the (sum) type ``type_``.
+    """
+    return tuple(type_) if isinstance(type_, (list, tuple)) else (type_,)
+
+
+def _compile_array(types, check_element):
+    """
+    Return a validator for arrays for the type description ``types`` or
+    ``None`` if no array satisfies ``types``.
+
+    Arrays stand in for (nested) sequences: each dimension satisfies a
+    ``list`` or ``tuple`` of ``types`` and the values are checked by the kind
+    of the dtype of the array instead of one by one. Arrays of objects are
+    checked element by element.
+
+    :param types: types of a description (without name)
+    :type types: tuple
+    :param check_element: validator for ``types[1:]``
+    :type check_element: function
+    :rtype: function
+    """
+    depth = 0
+    for type_ in types:
+        if not any(issubclass(t, (list, tuple)) for t in _members(type_)):
+            break
+        depth += 1
+    if not depth:
+        return None
+
+    if depth < len(types):
+        members = _members(types[depth])
+        any_kind = object in members
+        kinds = ''.join(_KINDS.get(t, '') for t in members)
+        # the values of an array are not containers
+        scalar = depth + 1 == len(types)
+
+    def check(value, sample):
+        if value.dtype.kind == 'O' and check_element is not None:
+            for v in _elements(value, sample):
+                if not check_element(v, sample):
+                    return False
+            return True
+
+        ndim = value.ndim
+        if ndim < 1 or ndim < depth:
+            return False
+        if depth == len(types):
+            return True
+        if ndim > depth:
+            # the elements on level ``depth`` are arrays
+            return any_kind
+        return any_kind or (scalar and value.dtype.kind in kinds)
+    return check
+
+
+def _elements(value, sample):
+    """
+    Return the elements of ``value`` that are checked.
+
+    :param value: container to check
+    :param sample: count of random elements to check, ``None`` for all
+    :type sample: int
+    :rtype: iterable
+    """
+    if sample is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        if len(value) > sample + 1:
+            return _sample(value, sample)
+        return value
+    return islice(value, sample + 1)
+
+
+def _sample(sequence, sample):
+    """
+    Yield the first and ``sample`` randomly chosen elements of ``sequence``.
+    """
+    yield sequence[0]
+    n = len(sequence)
+    for _ in range(sample):
+        yield sequence[_random.randrange(1, n)]
+
+
+def subsumes(expected, actual):
+    """
+    Return if all values described by ``actual`` satisfy ``expected``.
+
+    That is the case if ``actual`` is at least as deep as ``expected`` and
+    each of its types is a subclass of one of the types of ``expected`` on
+    the same level.
+
+    :param expected: types of an input (without name)
+    :type expected: tuple
+    :param actual: types of an output (without name)
+    :type actual: tuple
+    :rtype: bool
+    """
+    if len(actual) < len(expected):
+        return False
+    for e, a in zip(expected, actual):
+        e = tuple(e) if isinstance(e, (list, tuple)) else (e,)
+        a = a if isinstance(a, (list, tuple)) else (a,)
+        if not all(issubclass(t, e) for t in a):
+            return False
+    return True
+
+
+def infer(edges):
+    """
+    Return the types of the inputs that ``edges`` pass to their sink.
+
+    The output types of the sources are propagated along the mappings of the
+    edges. Inputs whose types are unknown map to ``None``, that is the case if
+    the source does not describe its outputs or is marked with
+    ``DYNAMIC_TYPES``.
+
+    :param edges: edges that end in the same sink
+    :type edges: list of :class:`~penchy.jobs.dependency.Edge`
+    :returns: input name -> types (without name)
+    :rtype: dict
+    """
+    types = {}
+    for edge in edges:
+        source = edge.source
+        descriptions = source.outputs.descriptions or {}
+        if getattr(source, 'DYNAMIC_TYPES', False):
+            descriptions = {}
+        mapping = edge.map_
+        if mapping is None:
+            mapping = [(name, name) for name in source.outputs.names]
+        for output, input_ in mapping:
+            types[input_] = descriptions.get(output)
+    return types
+
+
 class Types(object):
     """
     This class models the typing of input and outputs of
     :class:`~penchy.jobs.elements.PipelineElement`.
+
+    ``policy`` and ``sample_size`` are the defaults for
+    :meth:`check_input`, see :func:`set_policy`.
     """
+    policy = FULL
+    sample_size = 8
 
     def __init__(self, *type_descriptions):
         """
@@ -53,6 +299,7 @@ class Types(object):
         :type type_descriptions: tuple
         """
 
+        self._validators = {}
         if not type_descriptions:
             self.descriptions = None
         else:
@@ -78,6 +325,7 @@ class Types(object):
                     log.warn('Overring types of name {0} from {1} to {2}'
                              .format(name, self.descriptions[name], types))
                 self.descriptions[name] = types
+                self._validators[name] = _compile(types)
 
     def __eq__(self, other):
         return self.descriptions == other.descriptions
@@ -89,7 +337,7 @@ class Types(object):
         """
         return set(self.descriptions) if self.descriptions is not None else set()
 
-    def check_input(self, kwargs):
+    def check_input(self, kwargs, policy=None):
         """
         Check if ``kwargs`` satisfies the descriptions .
         That is:
@@ -99,10 +347,16 @@ class Types(object):
 
         Logs warnings if there are more arguments than the required.
 
+        The values are checked by validators that are compiled once per
+        description.  How thoroughly they are checked depends on ``policy``
+        (see :func:`set_policy`).
+
         :raises: :class:`TypeCheckError` if a name is missing or has the wrong type.
 
         :param kwargs: arguments for run of a :class:`PipelineElement`
         :type kwargs: dict
+        :param policy: one of :data:`POLICIES`, defaults to ``self.policy``
+        :type policy: str
         :returns: count of unused inputs
         :rtype: int
         """
@@ -110,26 +364,17 @@ class Types(object):
         if self.descriptions is None:
             return 0
 
+        policy = policy or self.policy
+        sample = self.sample_size if policy == SAMPLED else None
         for name, types in self.descriptions.items():
-            count = len(types)
             if name not in kwargs:
                 raise TypeCheckError('Argument {0} is missing'.format(name))
+            if policy == OFF:
+                continue
 
-            value = [kwargs[name]]  # pack start value in list to reuse loop
-            for i, type_ in enumerate(types):
-                if any(not isinstance(v, type_) for v in value):
-                    raise TypeCheckError('Argument {0} is not of type {1}'
-                                         .format(name, types))
-                # don't reinitialize for last type
-                if i == count - 1:
-                    break
-
-                if issubclass(type_, dict):
-                    value = list(chain.from_iterable(subvalue.values() for subvalue in value))
-                elif len(value) > 1:
-                    value = list(chain.from_iterable(value))
-                else:
-                    value = value[0]
+            if not self._validators[name](kwargs[name], sample):
+                raise TypeCheckError('Argument {0} is not of type {1}'
+                                     .format(name, types))
 
         unused_inputs = 0
         for name in set(kwargs) - set(self.descriptions):
@@ -138,6 +383,21 @@ class Types(object):
 
         return unused_inputs
 
+    def satisfied_by(self, types):
+        """
+        Return if inputs of ``types`` always satisfy the descriptions, i.e.
+        if :meth:`check_input` is bound to succeed on them.
+
+        :param types: input name -> types (without name) or ``None`` if
+                      unknown, as returned by :func:`infer`
+        :type types: dict
+        :rtype: bool
+        """
+        if self.descriptions is None:
+            return True
+        return all(types.get(name) is not None and subsumes(expected, types[name])
+                   for name, expected in self.descriptions.items())
+
     def check_pipe(self, other, mapping):
         """
         Check the validity of the pipe of ``self`` to ``other`` with given
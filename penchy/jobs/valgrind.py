@@ -0,0 +1,322 @@
+"""
+This module provides the parsing of the outputs of the valgrind tools
+cachegrind, callgrind, massif and memcheck.
+
+Both tools write the same line based format (callgrind's is a superset):
+a header (``events: Ir Dr ...``), specifications of the current file and
+function (``fl=``, ``fn=``) and cost lines, i.e. positions followed by
+the costs of the events. Callgrind compresses names: ``fn=(12) main``
+defines the name of id 12, later ``fn=(12)`` refers to it.
+
+The profiles are memory-mapped, the specifications are found by a regular
+expression and the cost lines between them are summed up at once, so only
+the costs per function are kept in memory, no matter how large the
+profile is.
+
+Furthermore the heap over time of massif profiles and the leaks of the xml
+output of memcheck are parsed.
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import itertools
+import re
+from xml.etree.ElementTree import iterparse
+try:
+    from xml.etree.ElementTree import ParseError
+except ImportError:  # pragma: no cover
+    # python 2.6
+    from xml.parsers.expat import ExpatError as ParseError
+
+from penchy.jobs.parsing import mapped, native, to_bytes
+
+
+class ProfileError(ValueError):
+    """
+    Signals a malformed profile.
+    """
+    pass
+
+
+# specification -> table of the compressed names
+_FILES = ('fl', 'fi', 'fe', 'cfi', 'cfl')
+_FUNCTIONS = ('fn', 'cfn')
+_OBJECTS = ('ob', 'cob')
+
+_COMPRESSED_RE = re.compile(to_bytes(r'\((\d+)\)\s*(.*)'))
+
+
+def _name(table, value):
+    """
+    Return the name of the (maybe compressed) name specification ``value``
+    and define its id in ``table``.
+    """
+    match = _COMPRESSED_RE.match(value)
+    if match is None:
+        return value.strip()
+    id_, name = match.groups()
+    name = name.strip()
+    if name:
+        table[id_] = name
+        return name
+    try:
+        return table[id_]
+    except KeyError:
+        raise ProfileError('Undefined name id ({0})'.format(native(id_)))
+
+
+# lines that are no cost lines (specifications, header lines and comments)
+_SPEC_RE = re.compile(to_bytes(r'^[^0-9+\-*\r\n][^\n]*'), re.MULTILINE)
+
+
+def _add_costs(costs, lines, positions):
+    """
+    Add the costs of the cost ``lines`` (one string) with ``positions``
+    positions to ``costs``.
+
+    If all lines have costs for all events, the costs are summed per event
+    over the tokens of all lines at once, otherwise line by line (missing
+    costs are zero).
+    """
+    count = len(costs)
+    width = positions + count
+    tokens = lines.split()
+    rows = lines.count(to_bytes('\n'))
+    if not lines.endswith(to_bytes('\n')):
+        rows += 1
+    try:
+        if len(tokens) == rows * width:
+            for i in range(count):
+                costs[i] += sum(map(int, tokens[positions + i::width]))
+            return
+        for line in lines.splitlines():
+            values = line.split()[positions:]
+            if len(values) > count:
+                raise ValueError
+            for i, value in enumerate(values):
+                costs[i] += int(value)
+    except ValueError:
+        for line in lines.splitlines():
+            values = line.split()[positions:]
+            if len(values) > count or not all(v.isdigit() for v in values):
+                raise ProfileError('Invalid cost line: {0}'
+                                   .format(native(line.strip())))
+
+
+def function_costs(filename):
+    """
+    Return the events, the totals of the events and the self costs of the
+    events per function of the cachegrind or callgrind profile
+    ``filename``.
+
+    The costs of calls (the cost lines after ``calls=``) are inclusive
+    costs of the called function and are not added to the caller.
+
+    :param filename: path of the profile
+    :type filename: str
+    :returns: names of the events, their totals (as given by ``summary:`` or
+              ``totals:``, the sum of all costs otherwise) and a dict of
+              (file, function) -> list of costs
+    :rtype: tuple of list, list, dict
+    :raises: :exc:`ProfileError` if the profile is malformed
+    """
+    events = None
+    totals = None
+    positions = 1
+    # kind of specification -> id -> name
+    tables = {}
+    for kinds in (_FILES, _FUNCTIONS, _OBJECTS):
+        table = {}
+        for kind in kinds:
+            tables[kind] = table
+
+    # (file, function) -> costs
+    functions = {}
+    file_ = function = to_bytes('???')
+    skip = False
+    newline, comment = to_bytes('\n'), to_bytes('#')
+    equals, colon = to_bytes('='), to_bytes(':')
+
+    with mapped(filename) as buf:
+        pos = 0
+        # the cost lines between the specifications are added at once
+        for match in itertools.chain(_SPEC_RE.finditer(buf), [None]):
+            end = len(buf) if match is None else match.start()
+            if skip and pos < end:
+                eol = buf.find(newline, pos, end)
+                pos = end if eol < 0 else eol + 1
+                skip = False
+            if buf[pos:end].strip():
+                if not events:
+                    raise ProfileError('Costs before the events')
+                key = (file_, function)
+                costs = functions.get(key)
+                if costs is None:
+                    costs = functions[key] = [0] * len(events)
+                _add_costs(costs, buf[pos:end], positions)
+            if match is None:
+                break
+            pos = match.end() + 1
+
+            line = match.group()
+            if line.startswith(comment):
+                continue
+            key, sep, value = line.partition(equals)
+            if sep and colon not in key:
+                key = native(key)
+                if key == 'fl':
+                    file_ = _name(tables[key], value)
+                elif key == 'fn':
+                    function = _name(tables[key], value)
+                elif key in tables:
+                    _name(tables[key], value)
+                elif key == 'calls':
+                    # the next line is the inclusive cost of the call
+                    skip = True
+                continue
+
+            key, sep, value = line.partition(colon)
+            if not sep:
+                raise ProfileError('Invalid line: {0}'.format(native(line.strip())))
+            key = native(key.strip())
+            if key == 'events':
+                events = [native(e) for e in value.split()]
+            elif key == 'positions':
+                positions = len(value.split())
+            elif key in ('summary', 'totals'):
+                try:
+                    totals = [int(v) for v in value.split()]
+                except ValueError:
+                    raise ProfileError('Invalid totals: {0}'.format(native(value.strip())))
+
+    if not events:
+        raise ProfileError('No events in the profile')
+    if totals is None:
+        totals = [sum(c[i] for c in functions.values())
+                  for i in range(len(events))]
+    totals.extend([0] * (len(events) - len(totals)))
+    return events, totals, dict(((native(f), native(fn)), c)
+                                for (f, fn), c in functions.items())
+
+
+_SNAPSHOT_RE = re.compile(to_bytes(r'^(snapshot|time|mem_heap_B|mem_heap_extra_B|'
+                                   r'mem_stacks_B|heap_tree)=(\w+)'), re.MULTILINE)
+_TIME_UNIT_RE = re.compile(to_bytes(r'^time_unit:\s*(\S+)'), re.MULTILINE)
+
+
+def massif_snapshots(filename):
+    """
+    Return the heap over time of the massif profile ``filename``.
+
+    The heap trees of the snapshots are skipped. The peak is the snapshot
+    that massif marked as peak (``heap_tree=peak``), if there is none the
+    snapshot with the largest heap (including the extra bytes).
+
+    :param filename: path of the profile
+    :type filename: str
+    :returns: the unit of time, a dict of the series of the snapshots
+              (``time``, ``heap``, ``heap_extra`` and ``stacks``) and the
+              index of the peak snapshot (``None`` if there are no
+              snapshots)
+    :rtype: tuple of str, dict, int
+    :raises: :exc:`ProfileError` if the profile is malformed
+    """
+    names = {'time': 'time', 'mem_heap_B': 'heap',
+             'mem_heap_extra_B': 'heap_extra', 'mem_stacks_B': 'stacks'}
+    series = dict((name, []) for name in names.values())
+    peak = None
+    with mapped(filename) as buf:
+        match = _TIME_UNIT_RE.search(buf)
+        if match is None:
+            raise ProfileError('No massif profile')
+        time_unit = native(match.group(1))
+
+        count = 0
+        for key, value in _SNAPSHOT_RE.findall(buf):
+            key = native(key)
+            if key == 'snapshot':
+                count += 1
+            elif key == 'heap_tree':
+                if value == to_bytes('peak'):
+                    peak = count - 1
+            else:
+                try:
+                    series[names[key]].append(int(value))
+                except ValueError:
+                    raise ProfileError('Invalid value {0}={1}'
+                                       .format(key, native(value)))
+
+    if any(len(values) != count for values in series.values()):
+        raise ProfileError('Incomplete snapshots')
+    if peak is None and count:
+        total = [h + e for h, e in zip(series['heap'], series['heap_extra'])]
+        peak = total.index(max(total))
+    return time_unit, series, peak
+
+
+def _frame(frame):
+    """
+    Return the description of the ``frame`` element of a memcheck stack,
+    e.g. ``main (a.c:5)``.
+    """
+    fn = frame.findtext('fn')
+    if fn is None:
+        return frame.findtext('ip', '???')
+    if frame.findtext('file') is not None:
+        return '{0} ({1}:{2})'.format(fn, frame.findtext('file'),
+                                      frame.findtext('line', '?'))
+    return '{0} ({1})'.format(fn, frame.findtext('obj', '???'))
+
+
+def memcheck_leaks(filename):
+    """
+    Return the leaks of the memcheck xml output (``--xml=yes``) ``filename``
+    aggregated by their kind and stack.
+
+    The output is parsed incrementally and every error is discarded after
+    it is aggregated, so the memory needed is bounded by the count of
+    distinct leaks.
+
+    :param filename: path of the xml output
+    :type filename: str
+    :returns: a dict of (kind, stack) -> [bytes, blocks, count of records],
+              where stack is a tuple of frames (innermost first), and the
+              count of errors that are no leaks
+    :rtype: tuple of dict and int
+    :raises: :exc:`ProfileError` if the output is malformed
+    """
+    leaks = {}
+    errors = 0
+    try:
+        context = iterparse(filename, events=('start', 'end'))
+        root = None
+        for event, element in context:
+            if root is None:
+                root = element
+                if root.tag != 'valgrindoutput':
+                    raise ProfileError('No memcheck xml output')
+            if event != 'end' or element.tag != 'error':
+                continue
+
+            kind = element.findtext('kind', '')
+            if kind.startswith('Leak_'):
+                stack = tuple(_frame(f) for f in element.iterfind('stack/frame'))
+                try:
+                    size = int(element.findtext('xwhat/leakedbytes', 0))
+                    blocks = int(element.findtext('xwhat/leakedblocks', 0))
+                except ValueError:
+                    raise ProfileError('Invalid leak record')
+                leak = leaks.get((kind, stack))
+                if leak is None:
+                    leaks[(kind, stack)] = [size, blocks, 1]
+                else:
+                    leak[0] += size
+                    leak[1] += blocks
+                    leak[2] += 1
+            else:
+                errors += 1
+            # keep the tree flat
+            root.clear()
+    except ParseError as e:
+        raise ProfileError('Invalid xml: {0}'.format(e))
+    return leaks, errors
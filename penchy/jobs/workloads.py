@@ -8,9 +8,13 @@ This module provides configured workloads.
 """
 
 import logging
+import os.path
 import shlex
 
+from penchy.compat import path
 from penchy.jobs.elements import Workload
+from penchy.jobs.hooks import Hook
+from penchy.jobs.typecheck import Types
 from penchy.maven import MavenDependency
 
 
@@ -131,3 +135,105 @@ class ScalaBench(Dacapo):
                       , 'scalaxb'
                       , 'specs'
                       , 'tmt'))
+
+
+class JMH(Workload):
+    """
+    This class represents a workload of microbenchmarks of the `Java
+    Microbenchmark Harness <http://openjdk.java.net/projects/code-tools/jmh/>`_.
+
+    The benchmarks (and JMH) are not provided by this workload, the jar of
+    the benchmarks has to be in the classpath of the JVM. For example::
+
+        jvm = jvms.JVM('java', '-cp benchmarks.jar')
+        jvm.workload = workloads.JMH('.*Hashing.*', forks=2, iterations=10)
+
+    JMH writes its results as json (see :class:`~penchy.jobs.filters.JMH`).
+    The forks of JMH are started with the options of the JVM, with
+    ``forks=0`` the benchmarks run in the JVM itself (e.g. for tools).
+
+    Outputs (besides those of every workload):
+
+    - ``jmh``: the path to the json results
+    """
+    outputs = Types(('stdout', list, path),
+                    ('stderr', list, path),
+                    ('exit_code', list, int),
+                    ('jmh', list, path))
+
+    RESULTS = 'penchy-jmh.json'
+
+    def __init__(self, benchmark='.*', forks=1, warmup_iterations=None,
+                 iterations=None, warmup_time=None, time=None, mode=None,
+                 args='', timeout=0, name=None):
+        """
+        :param benchmark: regular expression of the benchmarks to execute
+        :type benchmark: str
+        :param forks: count of forks of each benchmark
+        :type forks: int
+        :param warmup_iterations: count of warm-up iterations
+                                  (``None`` for the default of JMH)
+        :type warmup_iterations: int
+        :param iterations: count of measurement iterations
+                           (``None`` for the default of JMH)
+        :type iterations: int
+        :param warmup_time: time of a warm-up iteration, e.g. ``'500ms'``
+                            (``None`` for the default of JMH)
+        :type warmup_time: str
+        :param time: time of a measurement iteration, e.g. ``'1s'``
+                     (``None`` for the default of JMH)
+        :type time: str
+        :param mode: benchmark mode, e.g. ``'thrpt'`` or ``'avgt'``
+                     (``None`` for the modes of the benchmarks)
+        :type mode: str
+        :param args: additional arguments for JMH (shell escaped)
+        :type args: str
+        :param timeout: timeout (in seconds) after which this workload should
+                        be terminated
+        :type timeout: int
+        :param name: descriptive name of this workload (defaults to benchmark)
+        :type name: str
+        """
+        super(JMH, self).__init__(timeout, name)
+
+        self.benchmark = benchmark
+        self.forks = forks
+        self.warmup_iterations = warmup_iterations
+        self.iterations = iterations
+        self.warmup_time = warmup_time
+        self.time = time
+        self.mode = mode
+
+        self.args = args
+
+        # chooses always the right file because a new directory
+        # is generated for each invocation
+        self.hooks.append(Hook(teardown=lambda: self.out['jmh']
+                                          .append(os.path.abspath(self.RESULTS))))
+
+    @property
+    def arguments(self):
+        """
+        The arguments to call the workload in the current configuration.
+
+        :returns: the arguments for executing
+        :rtype: list
+        """
+        options = [('-f', self.forks),
+                   ('-wi', self.warmup_iterations),
+                   ('-i', self.iterations),
+                   ('-w', self.warmup_time),
+                   ('-r', self.time),
+                   ('-bm', self.mode)]
+        args = ['org.openjdk.jmh.Main']
+        for option, value in options:
+            if value is not None:
+                args.extend([option, str(value)])
+        return args + shlex.split(self.args) + \
+               ['-rf', 'json', '-rff', self.RESULTS, self.benchmark]
+
+    def __repr__(self):  # pragma: no cover
+        return '{0}({1})'.format(self.__class__.__name__, self.benchmark)
+
+    def __str__(self):  # pragma: no cover
+        return self.name or self.benchmark
@@ -0,0 +1,159 @@
+"""
+This module provides the offline replay of the serverside pipeline.
+
+Results that the server received can be archived in a result journal (see
+:class:`ResultJournal` and the ``RESULT_JOURNAL`` option of the
+configuration) or as output of the :class:`~penchy.jobs.filters.Dump` filter.
+Both can be fed to the serverside pipeline without running the job on the
+nodes again::
+
+    penchy --replay results.journal job.py
+
+ :copyright: PenchY Developers 2011-2012, see AUTHORS
+ :license: MIT License, see LICENSE
+"""
+import json
+import logging
+import os
+import threading
+
+
+log = logging.getLogger(__name__)
+
+
+class ResultJournal(object):
+    """
+    Appends received results to a file, one JSON object per line.
+
+    Each line contains the hash and the name of the
+    :class:`~penchy.jobs.job.SystemComposition` and its result.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: path of the journal
+        :type filename: str
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def write(self, composition, result):
+        """
+        Append ``result`` of ``composition`` to the journal.
+
+        :param composition: composition the result belongs to
+        :type composition: :class:`~penchy.jobs.job.SystemComposition`
+        :param result: the received result
+        :type result: dict
+        """
+        line = json.dumps({'composition': composition.hash(),
+                           'name': str(composition),
+                           'result': result})
+        with self._lock:
+            with open(self.filename, 'a') as f:
+                f.write(line)
+                f.write('\n')
+
+
+def read_archive(path):
+    """
+    Yield the entries of the archive ``path`` one by one.
+
+    ``path`` may be a result journal, a file that contains the output of a
+    :class:`~penchy.jobs.filters.Dump` or a directory of such files.
+
+    Journals are read line by line, so only one result is in memory at a time.
+
+    :param path: path to the archive
+    :type path: str
+    :returns: pairs of composition identifier (hash or name) and result
+    :rtype: iterator of tuples
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            for entry in read_archive(os.path.join(path, name)):
+                yield entry
+        return
+
+    with open(path) as f:
+        first = f.readline()
+        try:
+            ob = json.loads(first)
+        except ValueError:
+            # not line based, e.g. an indented dump
+            f.seek(0)
+            yield _entry(json.load(f), path)
+            return
+
+        yield _entry(ob, path)
+        for line in f:
+            if line.strip():
+                yield _entry(json.loads(line), path)
+
+
+def _entry(ob, path):
+    """
+    Return the composition identifier and result of an archive entry.
+
+    :raises: :exc:`ValueError` if ``ob`` is neither a journal nor a dump entry
+    """
+    if 'composition' in ob and 'result' in ob:
+        return ob['composition'], ob['result']
+    if 'system' in ob and 'data' in ob:
+        name = ob['system'].get('composition')
+        if isinstance(name, list):
+            name = name[0]
+        return name, ob['data']
+    raise ValueError('{0} is not a result journal or dump'.format(path))
+
+
+def load_results(path, compositions):
+    """
+    Return the results of the archive ``path`` keyed by their compositions.
+
+    Entries are matched by the hash of the composition (journals) or its name
+    (dumps); entries that match no composition are skipped. If a composition
+    occurs several times, its last entry is used.
+
+    :param path: path to the archive, see :func:`read_archive`
+    :type path: str
+    :param compositions: compositions of the job
+    :type compositions: list of :class:`~penchy.jobs.job.SystemComposition`
+    :returns: results as received by the server
+    :rtype: dict
+    """
+    by_id = {}
+    for composition in compositions:
+        by_id[str(composition)] = composition
+    for composition in compositions:
+        by_id[composition.hash()] = composition
+
+    results = {}
+    for identifier, result in read_archive(path):
+        composition = by_id.get(identifier)
+        if composition is None:
+            log.warn('Skipping result of unknown composition "{0}"'
+                     .format(identifier))
+            continue
+        results[composition] = result
+
+    missing = [c for c in compositions if c not in results]
+    if missing:
+        log.warn('No results for {0}'.format(', '.join(str(c) for c in missing)))
+    return results
+
+
+def replay(job, path):
+    """
+    Run the serverside pipeline of ``job`` on the results archived in
+    ``path``.
+
+    :param job: job to replay
+    :type job: :class:`~penchy.jobs.job.Job`
+    :param path: path to the archive, see :func:`read_archive`
+    :type path: str
+    """
+    results = load_results(path, job.compositions)
+    log.info('Replaying {0} results from {1}'.format(len(results), path))
+    job.receive = lambda: results
+    job.run_server_pipeline()
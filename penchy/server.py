@@ -13,8 +13,9 @@ import threading
 from penchy.compat import SimpleXMLRPCServer, nested
 
 from penchy.maven import make_bootstrap_pom
-from penchy.util import make_bootstrap_client
+from penchy.util import make_bootstrap_client, get_config_attribute
 from penchy.node import Node
+from penchy.replay import ResultJournal
 
 
 log = logging.getLogger(__name__)
@@ -40,6 +41,10 @@ class Server(object):
         # The dict of results we will receive (SystemComposition : result)
         self.results = {}
 
+        # The journal to archive received results in
+        journal = get_config_attribute(config, 'RESULT_JOURNAL', None)
+        self.journal = ResultJournal(journal) if journal else None
+
         # The dict of Timers which implement timeouts
         self.timers = {}
 
@@ -145,6 +150,8 @@ class Server(object):
             node = self.node_for(composition.node_setting)
             node.received(composition)
             self.results[composition] = result
+            if self.journal is not None:
+                self.journal.write(composition, result)
             log.info('Received result. Waiting for %s more.' %
                     self.remaining_compositions)
 
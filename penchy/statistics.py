@@ -1,6 +1,27 @@
 """
 This module provides common statistical functions.
 
+All functions accept lists (or other iterables) of numbers and arrays. Arrays
+are processed vectorized with numpy, which is only available on the server.
+
+The batched variants (:func:`averages`, :func:`standard_deviations` and
+:func:`coefficients_of_variation`) process many series at once, e.g. the
+times of all invocations.
+
+An :class:`Accumulator` summarizes samples without keeping them, summaries
+of several invocations or compositions are merged with
+:meth:`Accumulator.merge` or :func:`summarize`. :func:`average`,
+:func:`variance`, :func:`standard_deviation` and
+:func:`coefficient_of_variation` accept accumulators in place of samples.
+
+The quantiles of the normal and Student's t distribution
+(:func:`normal_quantile`, :func:`t_quantile` and the memoized
+:func:`critical_value`) are computed without scipy, so that confidence
+intervals can be computed on every node.
+
+:func:`bootstrap_interval` computes bootstrap confidence intervals, which do
+not assume normally distributed samples (numpy only).
+
  .. moduleauthor:: Pascal Wittmann <mail@pascal-wittmann.de>
 
  :copyright: PenchY Developers 2011-2012, see AUTHORS
@@ -9,6 +30,22 @@ This module provides common statistical functions.
 from __future__ import division
 
 import math
+from multiprocessing import Pool
+
+from penchy import is_server
+from penchy.util import memoized
+
+if is_server:
+    import numpy as np
+else:  # pragma: no cover
+    np = None
+
+
+def _is_array(xs):
+    """
+    Return if ``xs`` is an array.
+    """
+    return np is not None and isinstance(xs, np.ndarray)
 
 
 def average(xs):
@@ -20,9 +57,49 @@ def average(xs):
     :returns: averaged numbers
     :rtype: float
     """
+    if isinstance(xs, Accumulator):
+        return xs.mean
+    if _is_array(xs):
+        return float(xs.mean())
     return sum(xs) / len(xs)
 
 
+def variance(xs, ddof):
+    """
+    Computes the sample variance of the samples ``xs``.
+
+    Iterables that are not arrays are processed in a single pass with
+    Welford's algorithm, which is numerically stable. The samples are
+    shifted by the first sample to keep the intermediate values small.
+
+    :param xs: sample values
+    :type xs: iterable of numbers
+    :param ddof: Delta Degrees of Freedom (ddof): ``ddof``
+                 is substracted from the divisor.
+    :type ddof: integer
+    :returns: sample variance
+    :rtype: float
+    """
+    if isinstance(xs, Accumulator):
+        return xs.variance(ddof)
+    if _is_array(xs):
+        return float(xs.var(ddof=ddof))
+
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    shift = None
+    for x in xs:
+        if shift is None:
+            shift = x
+        x -= shift
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+    return m2 / (n - ddof)
+
+
 def standard_deviation(xs, ddof):
     """
     Computes the sample standard deviation of the samples ``xs``.
@@ -35,8 +112,7 @@ def standard_deviation(xs, ddof):
     :returns: sample standard deviation
     :rtype: float
     """
-    avg = average(xs)
-    return math.sqrt(sum((x - avg) ** 2 for x in xs) / (len(xs) - ddof))
+    return math.sqrt(variance(xs, ddof))
 
 
 def coefficient_of_variation(xs):
@@ -50,3 +126,949 @@ def coefficient_of_variation(xs):
     :rtype: float
     """
     return standard_deviation(xs, ddof=1) / average(xs)
+
+
+def percentiles(xs, qs):
+    """
+    Computes the percentiles ``qs`` of the samples ``xs``, interpolated
+    linearly between the closest ranks (as :func:`numpy.percentile`).
+
+    :param xs: sample values
+    :type xs: list of numbers
+    :param qs: percentiles (between 0 and 100)
+    :type qs: list of numbers
+    :returns: the percentiles
+    :rtype: list of floats
+    """
+    if not len(xs):
+        return [float('nan')] * len(qs)
+    if _is_array(xs):
+        return [float(p) for p in np.percentile(xs, qs)]
+
+    xs = sorted(xs)
+    result = []
+    for q in qs:
+        rank = (len(xs) - 1) * q / 100
+        lower = int(math.floor(rank))
+        upper = min(lower + 1, len(xs) - 1)
+        result.append(xs[lower] + (xs[upper] - xs[lower]) * (rank - lower))
+    return [float(p) for p in result]
+
+
+def _batch(xss):
+    """
+    Return ``xss`` as two-dimensional array or ``None`` if that is not
+    possible (no numpy or series of different lengths).
+    """
+    if np is None:
+        return None
+    if _is_array(xss):
+        return xss if xss.ndim == 2 else None
+    if not all(isinstance(xs, (list, tuple)) for xs in xss) or \
+       len(set(len(xs) for xs in xss)) != 1:
+        return None
+    return np.asarray(xss, dtype=float)
+
+
+def averages(xss):
+    """
+    Average each series of ``xss``.
+
+    :param xss: series of numbers
+    :type xss: list of lists of numbers or two-dimensional array
+    :returns: the average of each series
+    :rtype: list of floats
+    """
+    batch = _batch(xss)
+    if batch is None:
+        return [average(xs) for xs in xss]
+    return batch.mean(axis=1).tolist()
+
+
+def standard_deviations(xss, ddof):
+    """
+    Computes the sample standard deviation of each series of ``xss``.
+
+    :param xss: series of sample values
+    :type xss: list of lists of numbers or two-dimensional array
+    :param ddof: Delta Degrees of Freedom (ddof): ``ddof``
+                 is substracted from the divisor.
+    :type ddof: integer
+    :returns: the standard deviation of each series
+    :rtype: list of floats
+    """
+    batch = _batch(xss)
+    if batch is None:
+        return [standard_deviation(xs, ddof) for xs in xss]
+    return batch.std(axis=1, ddof=ddof).tolist()
+
+
+def coefficients_of_variation(xss):
+    """
+    Computes the coefficient of variation of each series of ``xss``.
+
+    :param xss: series of sample values
+    :type xss: list of lists of numbers or two-dimensional array
+    :returns: the coefficient of variation of each series
+    :rtype: list of floats
+    """
+    batch = _batch(xss)
+    if batch is None:
+        return [coefficient_of_variation(xs) for xs in xss]
+    return (batch.std(axis=1, ddof=1) / batch.mean(axis=1)).tolist()
+
+
+def column_statistics(xss):
+    """
+    Computes the minimum, maximum and average of each column of ``xss``,
+    e.g. of each iteration of the times of all invocations.
+
+    Missing values are masked: rows may have different lengths and may
+    contain ``None`` (as may masked arrays contain masked values), the
+    statistics of a column only cover the values that are present. Columns
+    without any value yield ``nan``.
+
+    :param xss: rows of values
+    :type xss: list of lists of numbers or two-dimensional (masked) array
+    :returns: minimals, maximals and averages of the columns
+    :rtype: tuple of lists
+    """
+    if np is None:
+        return _column_statistics(xss)
+
+    values, present = _masked_batch(xss)
+    counts = present.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avgs = np.where(present, values, 0).sum(axis=0) / counts
+    empty = counts == 0
+    mins = np.where(present, values, np.inf).min(axis=0)
+    maxs = np.where(present, values, -np.inf).max(axis=0)
+    if values.dtype.kind in 'iu' and not empty.any():
+        mins, maxs = mins.astype(values.dtype), maxs.astype(values.dtype)
+    else:
+        mins[empty] = maxs[empty] = np.nan
+    return mins.tolist(), maxs.tolist(), avgs.tolist()
+
+
+def _masked_batch(xss):
+    """
+    Return the values of the rows ``xss`` as two-dimensional array together
+    with a boolean array that marks the present values.
+    """
+    if isinstance(xss, np.ma.MaskedArray):
+        return xss.data, ~np.ma.getmaskarray(xss)
+    if _is_array(xss) and xss.dtype.kind != 'O':
+        present = ~np.isnan(xss) if xss.dtype.kind == 'f' else \
+            np.ones(xss.shape, dtype=bool)
+        return xss, present
+
+    rows = []
+    for xs in xss:
+        if isinstance(xs, np.ma.MaskedArray):
+            rows.append((xs.filled(0), ~np.ma.getmaskarray(xs)))
+            continue
+        row = np.asarray(xs)
+        if row.dtype.kind == 'O':
+            mask = np.array([x is not None for x in xs], dtype=bool)
+            row = np.zeros(len(row)) if not mask.any() else \
+                np.asarray(row[mask].tolist())
+            rows.append((row, mask))
+        elif row.dtype.kind == 'f':
+            rows.append((row, ~np.isnan(row)))
+        else:
+            rows.append((row, None))
+
+    width = max(len(mask) if mask is not None else len(row)
+                for row, mask in rows) if rows else 0
+    integral = all(row.dtype.kind in 'iub' for row, _ in rows if len(row))
+    values = np.zeros((len(rows), width), dtype=np.int64 if integral else float)
+    present = np.zeros((len(rows), width), dtype=bool)
+    for i, (row, mask) in enumerate(rows):
+        if mask is None:
+            values[i, :len(row)] = row
+            present[i, :len(row)] = True
+        elif len(row) == len(mask):
+            values[i, :len(mask)] = row
+            present[i, :len(mask)] = mask
+        else:
+            # only the present values of rows with ``None``
+            values[i, :len(mask)][mask] = row
+            present[i, :len(mask)] = mask
+    return values, present
+
+
+def _column_statistics(xss):
+    """
+    Pure Python version of :func:`column_statistics` in a single pass.
+    """
+    mins, maxs, sums, counts = [], [], [], []
+    for xs in xss:
+        for i, x in enumerate(xs):
+            if i == len(counts):
+                mins.append(None)
+                maxs.append(None)
+                sums.append(0)
+                counts.append(0)
+            if x is None or x != x:
+                continue
+            if not counts[i]:
+                mins[i] = maxs[i] = x
+            elif x < mins[i]:
+                mins[i] = x
+            elif x > maxs[i]:
+                maxs[i] = x
+            sums[i] += x
+            counts[i] += 1
+    nan = float('nan')
+    avgs = [s / n if n else nan for s, n in zip(sums, counts)]
+    mins = [nan if x is None else x for x in mins]
+    maxs = [nan if x is None else x for x in maxs]
+    return mins, maxs, avgs
+
+
+def rolling_coefficients_of_variation(xs, k):
+    """
+    Yield the coefficients of variation of the windows ``xs[i:i + k]`` for
+    ``i`` in ``range(len(xs) - k + 1)``.
+
+    The mean and the sum of squared differences of the window are updated
+    incrementally when it moves, so that all windows take linear time.
+
+    :param xs: sample values
+    :type xs: list of numbers
+    :param k: width of the windows, ``k > 1``
+    :type k: int
+    :returns: the coefficient of variation of each window
+    :rtype: iterator of floats
+    """
+    if len(xs) < k:
+        return
+    # shift the values to keep the sums small
+    shift = xs[0]
+    mean = sum(x - shift for x in xs[:k]) / k
+    m2 = sum((x - shift - mean) ** 2 for x in xs[:k])
+    yield math.sqrt(max(m2, 0) / (k - 1)) / (mean + shift)
+    for i in range(k, len(xs)):
+        new, old = xs[i] - shift, xs[i - k] - shift
+        new_mean = mean + (new - old) / k
+        m2 += (new - old) * (new - new_mean + old - mean)
+        mean = new_mean
+        yield math.sqrt(max(m2, 0) / (k - 1)) / (mean + shift)
+
+
+def steady_states(xss, k, threshold):
+    """
+    Return for each series of ``xss`` the index of the first window of ``k``
+    values whose coefficient of variation falls below ``threshold``, i.e.
+    where steady-state performance is reached.
+
+    Only the windows ``xs[i:i + k]`` for ``i`` in ``range(len(xs) - k)``
+    are considered. Series of equal length are processed at once with
+    numpy.
+
+    :param xss: series of sample values
+    :type xss: list of lists of numbers or two-dimensional array
+    :param k: width of the windows, ``k > 1``
+    :type k: int
+    :param threshold: threshold for the coefficient of variation
+    :type threshold: float
+    :returns: the index of the steady-state window of each series or
+              ``None`` if the series reaches no steady state
+    :rtype: list
+    """
+    batch = _batch(xss)
+    if batch is None:
+        starts = []
+        for xs in xss:
+            windows = rolling_coefficients_of_variation(xs, k)
+            starts.append(next((i for i, cv in zip(range(len(xs) - k), windows)
+                                if cv < threshold), None))
+        return starts
+
+    count = batch.shape[1] - k
+    if count <= 0:
+        return [None] * len(batch)
+    shifted = batch - batch[:, :1]
+    zero = np.zeros((len(batch), 1))
+    sums = np.hstack((zero, shifted.cumsum(axis=1)))
+    squares = np.hstack((zero, (shifted ** 2).cumsum(axis=1)))
+    window_sums = sums[:, k:k + count] - sums[:, :count]
+    window_squares = squares[:, k:k + count] - squares[:, :count]
+    means = window_sums / k
+    m2 = np.maximum(window_squares - window_sums * means, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cvs = np.sqrt(m2 / (k - 1)) / (means + batch[:, :1])
+    steady = cvs < threshold
+    found = steady.any(axis=1)
+    return [int(i) if f else None
+            for i, f in zip(steady.argmax(axis=1), found)]
+
+
+class Accumulator(object):
+    """
+    Summarizes samples by their count, mean, sum of squared differences from
+    the mean (``m2``), minimum and maximum without keeping them.
+
+    Samples are added one by one with Welford's algorithm, accumulators are
+    merged with the algorithm of Chan et al., both are numerically stable.
+    ``len(accumulator)`` is the count of samples, so that an accumulator can
+    be used in place of the samples by the functions of this module.
+
+    Clients send accumulators as dicts of their attributes, see
+    :meth:`from_dict`.
+    """
+
+    def __init__(self, xs=()):
+        """
+        :param xs: initial samples
+        :type xs: iterable of numbers
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.extend(xs)
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Return the accumulator that is described by the dict ``d``, e.g. as
+        returned by :meth:`as_dict`.
+
+        :param d: attributes of the accumulator
+        :type d: dict
+        :rtype: :class:`Accumulator`
+        """
+        acc = cls()
+        acc.count = d['count']
+        acc.mean = d['mean']
+        acc.m2 = d['m2']
+        acc.min = d['min']
+        acc.max = d['max']
+        return acc
+
+    def as_dict(self):
+        """
+        Return the attributes of the accumulator.
+
+        :rtype: dict
+        """
+        return dict(count=self.count, mean=self.mean, m2=self.m2,
+                    min=self.min, max=self.max)
+
+    def add(self, x):
+        """
+        Add the sample ``x``.
+
+        :param x: sample value
+        :type x: number
+        """
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.count == 1:
+            self.min = self.max = x
+        else:
+            self.min = min(self.min, x)
+            self.max = max(self.max, x)
+
+    def extend(self, xs):
+        """
+        Add the samples ``xs``.
+
+        :param xs: sample values
+        :type xs: iterable of numbers
+        """
+        if _is_array(xs):
+            if len(xs):
+                mean = xs.mean()
+                other = Accumulator.from_dict(dict(
+                    count=len(xs), mean=float(mean),
+                    m2=float(((xs - mean) ** 2).sum()),
+                    min=xs.min().item(), max=xs.max().item()))
+                self.merge(other)
+            return
+        for x in xs:
+            self.add(x)
+
+    def merge(self, other):
+        """
+        Add the samples that are summarized by ``other``.
+
+        :param other: accumulator to merge
+        :type other: :class:`Accumulator`
+        :returns: this accumulator
+        :rtype: :class:`Accumulator`
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __add__(self, other):
+        return Accumulator().merge(self).merge(other)
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        return isinstance(other, Accumulator) and \
+            self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Accumulator(count={0!r}, mean={1!r}, m2={2!r}, min={3!r}, ' \
+               'max={4!r})'.format(self.count, self.mean, self.m2,
+                                   self.min, self.max)
+
+    def variance(self, ddof):
+        """
+        Return the sample variance of the samples.
+
+        :param ddof: Delta Degrees of Freedom (ddof): ``ddof``
+                     is substracted from the divisor.
+        :type ddof: integer
+        :rtype: float
+        """
+        return self.m2 / (self.count - ddof)
+
+    def standard_deviation(self, ddof):
+        """
+        Return the sample standard deviation of the samples.
+
+        :param ddof: Delta Degrees of Freedom (ddof): ``ddof``
+                     is substracted from the divisor.
+        :type ddof: integer
+        :rtype: float
+        """
+        return math.sqrt(self.variance(ddof))
+
+
+def summarize(values):
+    """
+    Summarize ``values`` in one accumulator.
+
+    :param values: samples, accumulators and dicts of accumulators (as sent
+                   by clients), in any combination
+    :type values: iterable
+    :rtype: :class:`Accumulator`
+    """
+    if _is_array(values):
+        return Accumulator(values)
+    acc = Accumulator()
+    for value in values:
+        if isinstance(value, Accumulator):
+            acc.merge(value)
+        elif isinstance(value, dict):
+            acc.merge(Accumulator.from_dict(value))
+        else:
+            acc.add(value)
+    return acc
+
+
+def normal_quantile(p):
+    """
+    Return the ``p``-quantile of the standard normal distribution.
+
+    Uses algorithm AS 241 of Wichura, which is accurate to about 1e-16.
+
+    :param p: probability, ``0 < p < 1``
+    :type p: float
+    :rtype: float
+    :raises: :exc:`ValueError` if ``p`` is not in (0, 1)
+    """
+    if not 0 < p < 1:
+        raise ValueError('p must be in (0, 1), got {0}'.format(p))
+
+    q = p - 0.5
+    if abs(q) <= 0.425:
+        r = 0.180625 - q * q
+        return q * (((((((2509.0809287301226727 * r +
+                          33430.575583588128105) * r +
+                         67265.770927008700853) * r +
+                        45921.953931549871457) * r +
+                       13731.693765509461125) * r +
+                      1971.5909503065514427) * r +
+                     133.14166789178437745) * r +
+                    3.387132872796366608) / \
+                   (((((((5226.495278852545925 * r +
+                          28729.085735721942674) * r +
+                         39307.89580009271061) * r +
+                        21213.794301586595867) * r +
+                       5394.1960214247511077) * r +
+                      687.1870074920579083) * r +
+                     42.313330701600911252) * r + 1.0)
+
+    r = math.sqrt(-math.log(p if q < 0 else 1 - p))
+    if r <= 5:
+        r -= 1.6
+        x = (((((((7.7454501427834140764e-4 * r +
+                  0.0227238449892691845833) * r +
+                 0.24178072517745061177) * r +
+                1.27045825245236838258) * r +
+               3.64784832476320460504) * r +
+              5.7694972214606914055) * r +
+             4.6303378461565452959) * r +
+            1.42343711074968357734) / \
+            (((((((1.05075007164441684324e-9 * r +
+                   5.475938084995344946e-4) * r +
+                  0.0151986665636164571966) * r +
+                 0.14810397642748007459) * r +
+                0.68976733498510000455) * r +
+               1.6763848301838038494) * r +
+              2.05319162663775882187) * r + 1.0)
+    else:
+        r -= 5
+        x = (((((((2.01033439929228813265e-7 * r +
+                  2.71155556874348757815e-5) * r +
+                 0.0012426609473880784386) * r +
+                0.026532189526576123093) * r +
+               0.29656057182850489123) * r +
+              1.7848265399172913358) * r +
+             5.4637849111641143699) * r +
+            6.6579046435011037772) / \
+            (((((((2.04426310338993978564e-15 * r +
+                   1.4215117583164458887e-7) * r +
+                  1.8463183175100546818e-5) * r +
+                 7.868691311456132591e-4) * r +
+                0.0148753612908506148525) * r +
+               0.13692988092273580531) * r +
+              0.59983220655588793769) * r + 1.0)
+    return -x if q < 0 else x
+
+
+# coefficients of the Lanczos approximation (g = 7, n = 9)
+_LANCZOS = (0.99999999999980993, 676.5203681218851, -1259.1392167224028,
+            771.32342877765313, -176.61502916214059, 12.507343278686905,
+            -0.13857109526572012, 9.9843695780195716e-6,
+            1.5056327351493116e-7)
+
+
+def _log_gamma(x):
+    """
+    Return the natural logarithm of the gamma function for ``x > 0``.
+    """
+    if x < 0.5:
+        # reflection formula
+        return math.log(math.pi / math.sin(math.pi * x)) - _log_gamma(1 - x)
+    x -= 1
+    a = _LANCZOS[0]
+    t = x + 7.5
+    for i, c in enumerate(_LANCZOS[1:]):
+        a += c / (x + i + 1)
+    return 0.5 * math.log(2 * math.pi) + (x + 0.5) * math.log(t) - t + \
+        math.log(a)
+
+
+def _beta_fraction(a, b, x):
+    """
+    Evaluate the continued fraction of the incomplete beta function with
+    the modified Lentz's method.
+    """
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x /
+                          ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            delta = c * d
+            h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return h
+
+
+def _log_beta_half(a):
+    """
+    Return the natural logarithm of the beta function B(a, 1/2) for
+    ``a > 0``.
+    """
+    if a < 10:
+        return _log_gamma(a) + 0.5 * math.log(math.pi) - _log_gamma(a + 0.5)
+
+    # the difference of Stirling's series for ln Gamma(a + 1/2) and
+    # ln Gamma(a), the log-gamma values themselves are too large to be
+    # subtracted without losing precision
+    def series(z):
+        r = 1 / (z * z)
+        return (((((((1 / 156.0 * r - 691 / 360360.0) * r + 1 / 1188.0) * r -
+                    1 / 1680.0) * r + 1 / 1260.0) * r - 1 / 360.0) * r +
+                 1 / 12.0) / z)
+    difference = 0.5 * math.log(a) + a * math.log1p(0.5 / a) - 0.5 + \
+        series(a + 0.5) - series(a)
+    return 0.5 * math.log(math.pi) - difference
+
+
+def _t_probabilities(x, df):
+    """
+    Return the probabilities that a variable of Student's t distribution
+    with ``df`` degrees of freedom is greater than ``x > 0`` and that it is
+    between 0 and ``x``.
+
+    The smaller one of both is computed directly from the continued fraction
+    of the incomplete beta function, so it keeps its relative precision.
+    """
+    a = df / 2
+    # ln(df / (df + x^2)) and ln(x^2 / (df + x^2)), without overflow of x^2
+    log_ratio = 2 * math.log(x) - math.log(df)
+    if log_ratio < 0:
+        log_w = -math.log1p(math.exp(log_ratio))
+        log_z = log_ratio + log_w
+    else:
+        log_z = -math.log1p(math.exp(-log_ratio))
+        log_w = log_z - log_ratio
+    front = math.exp(a * log_w + 0.5 * log_z - _log_beta_half(a))
+    w = math.exp(log_w)
+    if w < (a + 1) / (a + 2.5):
+        tail = 0.5 * front * _beta_fraction(a, 0.5, w) / a
+        return tail, 0.5 - tail
+    central = front * _beta_fraction(0.5, a, math.exp(log_z))
+    return 0.5 - central, central
+
+
+def _t_pdf(x, df):
+    """
+    Return the probability density function of Student's t distribution
+    with ``df`` degrees of freedom at ``x``.
+    """
+    return math.exp(-_log_beta_half(df / 2) - 0.5 * math.log(df) -
+                    (df + 1) / 2 * math.log1p(x * x / df))
+
+
+def t_quantile(p, df):
+    """
+    Return the ``p``-quantile of Student's t distribution with ``df`` degrees
+    of freedom.
+
+    The quantile is solved from the distribution function with Newton's
+    method (safeguarded by bisection), starting at the Cornish-Fisher
+    expansion around the normal quantile; near ``p = 0.5`` it is solved from
+    the probability between 0 and the quantile instead, for ``df > 1e5``
+    the expansion is used as it is. Its relative error is below 1e-12 (at
+    most 5e-13 measured), quantiles beyond the range of floats are infinite.
+
+    :param p: probability, ``0 < p < 1``
+    :type p: float
+    :param df: degrees of freedom, ``df > 0``
+    :type df: float
+    :rtype: float
+    :raises: :exc:`ValueError` if ``p`` is not in (0, 1) or ``df <= 0``
+    """
+    if not 0 < p < 1:
+        raise ValueError('p must be in (0, 1), got {0}'.format(p))
+    if df <= 0:
+        raise ValueError('df must be positive, got {0}'.format(df))
+    if p == 0.5:
+        return 0.0
+    # the distribution is symmetric, solve for the smaller tail to keep
+    # the precision of small probabilities
+    if p < 0.5:
+        return -_t_upper_quantile(p, df)
+    return _t_upper_quantile(1 - p, df)
+
+
+def _t_upper_quantile(q, df):
+    """
+    Return ``x`` such that the tail of Student's t distribution with ``df``
+    degrees of freedom above ``x`` has the probability ``0 < q < 0.5``.
+    """
+    # near the centre the quantile is solved from the probability between 0
+    # and the quantile, 0.5 - q is exact there
+    central = q > 0.25
+    # closed forms
+    if df == 1:
+        return math.tan(math.pi * (0.5 - q)) if central else \
+            1 / math.tan(math.pi * q)
+    if df == 2:
+        return (1 - 2 * q) / math.sqrt(2 * q * (1 - q))
+
+    # Cornish-Fisher expansion, see Abramowitz and Stegun 26.7.5
+    z = -normal_quantile(q)
+    z2 = z * z
+    x = z + z * (z2 + 1) / (4 * df) + \
+        z * ((5 * z2 + 16) * z2 + 3) / (96 * df ** 2) + \
+        z * (((3 * z2 + 19) * z2 + 17) * z2 - 15) / (384 * df ** 3) + \
+        z * ((((79 * z2 + 776) * z2 + 1482) * z2 - 1920) * z2 - 945) / \
+        (92160 * df ** 4)
+    if df > 1e5:
+        # the expansion is exact to the precision of floats
+        return x
+
+    def excess(x):
+        # the probability above x that exceeds q, decreasing in x
+        tail, between = _t_probabilities(x, df)
+        return (0.5 - q) - between if central else tail - q
+
+    # the quantile is greater than the normal quantile, find an upper bound
+    lower, upper = z, max(x, z) * 2 + 1
+    while excess(upper) > 0:
+        lower, upper = upper, upper * 2
+
+    if not lower < x < upper:
+        x = (lower + upper) / 2
+    for _ in range(100):
+        error = excess(x)
+        if error > 0:
+            lower = x
+        else:
+            upper = x
+        pdf = _t_pdf(x, df)
+        next_x = x + error / pdf if pdf else lower
+        if not lower < next_x < upper:
+            next_x = (lower + upper) / 2
+        if abs(next_x - x) <= 1e-14 * abs(x):
+            return next_x
+        x = next_x
+    return x
+
+
+@memoized
+def critical_value(significance_level, df=None):
+    """
+    Return the critical value of a two-sided confidence interval, i.e. the
+    ``1 - significance_level / 2``-quantile of Student's t distribution with
+    ``df`` degrees of freedom or of the standard normal distribution if
+    ``df`` is ``None``.
+
+    The values are memoized by ``(significance_level, df)``.
+
+    :param significance_level: significance level of the interval
+    :type significance_level: float
+    :param df: degrees of freedom or ``None``
+    :type df: float
+    :rtype: float
+    """
+    p = 1 - significance_level / 2
+    if df is None:
+        return normal_quantile(p)
+    return t_quantile(p, df)
+
+
+def normal_cdf(x):
+    """
+    Return the cumulative distribution function of the standard normal
+    distribution at ``x``.
+
+    :param x: value
+    :type x: float
+    :rtype: float
+    """
+    return 0.5 * math.erfc(-x / math.sqrt(2))
+
+
+#: statistics that :func:`bootstrap_interval` supports
+BOOTSTRAP_STATISTICS = ('mean', 'median')
+#: methods that :func:`bootstrap_interval` supports
+BOOTSTRAP_METHODS = ('percentile', 'bca')
+
+# count of values that are resampled at once
+_BATCH_VALUES = 2 ** 20
+
+
+def _statistic(statistic, values, axis=None):
+    """
+    Return ``statistic`` of ``values`` along ``axis``.
+    """
+    if statistic == 'median':
+        return np.median(values, axis=axis)
+    return values.mean(axis=axis)
+
+
+def _bootstrap_batch(task):
+    """
+    Return the bootstrap replicates of a batch.
+
+    :param task: statistic, samples, count of resamples and seed
+    :type task: tuple
+    :rtype: :class:`numpy.ndarray`
+    """
+    statistic, samples, count, seed = task
+    if hasattr(np.random, 'default_rng'):
+        # the generators of numpy 1.17 draw integers much faster
+        draw = np.random.default_rng(seed).integers
+    else:  # pragma: no cover
+        draw = np.random.RandomState(seed).randint
+    replicates = []
+    for xs in samples:
+        indices = draw(0, len(xs), (count, len(xs)))
+        replicates.append(_statistic(statistic, xs[indices], axis=1))
+    if len(replicates) == 2:
+        return replicates[0] / replicates[1]
+    return replicates[0]
+
+
+def _jackknife(statistic, xs):
+    """
+    Return the values of ``statistic`` of ``xs`` leaving out each sample in
+    turn.
+    """
+    n = len(xs)
+    if statistic == 'mean':
+        return (xs.sum() - xs) / (n - 1)
+
+    # leaving out the sample of rank r shifts all greater samples down
+    order = np.argsort(xs, kind='mergesort')
+    sorted_ = xs[order]
+    ranks = np.empty(n, dtype=int)
+    ranks[order] = np.arange(n)
+
+    def nth(j):
+        return np.where(j < ranks, sorted_[j], sorted_[np.minimum(j + 1, n - 1)])
+
+    half = (n - 1) // 2
+    if (n - 1) % 2:
+        return nth(half)
+    return (nth(half - 1) + nth(half)) / 2
+
+
+def bootstrap_replicates(samples, statistic='mean', resamples=10000,
+                         seed=None, processes=1):
+    """
+    Return the bootstrap replicates of ``statistic`` of ``samples``, i.e.
+    ``statistic`` of samples that are drawn with replacement.
+
+    With two samples the replicates are the ratios of ``statistic`` of the
+    first to ``statistic`` of the second sample, which are resampled
+    independently.
+
+    The resamples are drawn in vectorized batches, each batch has its own
+    seed that is derived from ``seed``. Therefore the replicates only
+    depend on ``seed``, not on ``processes``.
+
+    :param samples: one or two samples
+    :type samples: list of lists of numbers
+    :param statistic: one of :data:`BOOTSTRAP_STATISTICS`
+    :type statistic: str
+    :param resamples: count of resamples
+    :type resamples: int
+    :param seed: seed of the random numbers, ``None`` for a random seed
+    :type seed: int
+    :param processes: count of processes that draw the resamples
+    :type processes: int
+    :returns: the replicates
+    :rtype: :class:`numpy.ndarray`
+    :raises: :exc:`ValueError` for an unknown statistic or more than two
+             samples
+    """
+    if statistic not in BOOTSTRAP_STATISTICS:
+        raise ValueError('Unknown statistic "{0}", expected one of {1}'
+                         .format(statistic, ', '.join(BOOTSTRAP_STATISTICS)))
+    if not 1 <= len(samples) <= 2:
+        raise ValueError('Expected one or two samples, got {0}'
+                         .format(len(samples)))
+    samples = [np.asarray(xs, dtype=float) for xs in samples]
+
+    batch = max(1, _BATCH_VALUES // sum(len(xs) for xs in samples))
+    counts = [min(batch, resamples - i) for i in range(0, resamples, batch)]
+    seeds = np.random.RandomState(seed).randint(0, 2 ** 31 - 1, len(counts))
+    tasks = [(statistic, samples, count, int(s))
+             for count, s in zip(counts, seeds)]
+
+    if processes > 1 and len(tasks) > 1:
+        pool = Pool(processes)
+        try:
+            batches = pool.map(_bootstrap_batch, tasks)
+        finally:
+            pool.terminate()
+    else:
+        batches = [_bootstrap_batch(task) for task in tasks]
+    return np.concatenate(batches)
+
+
+def bootstrap_interval(samples, significance_level, statistic='mean',
+                       method='bca', resamples=10000, seed=None, processes=1):
+    """
+    Computes the bootstrap confidence interval of ``statistic`` of
+    ``samples`` or of the ratio of ``statistic`` of two samples.
+
+    ``method`` is either ``'percentile'`` for the percentiles of the
+    replicates or ``'bca'`` for the bias-corrected and accelerated
+    percentiles (Efron 1987), which are corrected for the bias and the
+    skewness of the replicates; the acceleration is estimated with the
+    jackknife.
+
+    :param samples: one or two samples
+    :type samples: list of lists of numbers
+    :param significance_level: the significance level of the interval
+    :type significance_level: float
+    :param statistic: one of :data:`BOOTSTRAP_STATISTICS`
+    :type statistic: str
+    :param method: one of :data:`BOOTSTRAP_METHODS`
+    :type method: str
+    :param resamples: count of resamples
+    :type resamples: int
+    :param seed: seed of the random numbers, ``None`` for a random seed
+    :type seed: int
+    :param processes: count of processes that draw the resamples
+    :type processes: int
+    :returns: lower and upper bound of the interval
+    :rtype: tuple of floats
+    :raises: :exc:`ValueError` for an unknown method, see also
+             :func:`bootstrap_replicates`
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError('Unknown method "{0}", expected one of {1}'
+                         .format(method, ', '.join(BOOTSTRAP_METHODS)))
+    replicates = bootstrap_replicates(samples, statistic, resamples, seed,
+                                      processes)
+    alphas = [significance_level / 2, 1 - significance_level / 2]
+    if method == 'bca':
+        alphas = _bca_alphas([np.asarray(xs, dtype=float) for xs in samples],
+                             statistic, replicates, alphas)
+    lower, upper = np.percentile(replicates, [100 * a for a in alphas])
+    return float(lower), float(upper)
+
+
+def _bca_alphas(samples, statistic, replicates, alphas):
+    """
+    Return the bias-corrected and accelerated levels of the percentiles
+    ``alphas``.
+    """
+    estimates = [_statistic(statistic, xs) for xs in samples]
+    if len(samples) == 2:
+        estimate = estimates[0] / estimates[1]
+        jackknife = np.concatenate(
+            (_jackknife(statistic, samples[0]) / estimates[1],
+             estimates[0] / _jackknife(statistic, samples[1])))
+    else:
+        estimate = estimates[0]
+        jackknife = _jackknife(statistic, samples[0])
+
+    # bias correction, bounded to keep the quantile finite
+    count = len(replicates)
+    below = min(max((replicates < estimate).sum(), 1), count - 1)
+    z0 = normal_quantile(below / count)
+
+    deviations = jackknife.mean() - jackknife
+    denominator = 6 * (deviations ** 2).sum() ** 1.5
+    acceleration = (deviations ** 3).sum() / denominator if denominator else 0
+
+    corrected = []
+    for alpha in alphas:
+        z = z0 + normal_quantile(alpha)
+        corrected.append(normal_cdf(z0 + z / (1 - acceleration * z)))
+    return corrected
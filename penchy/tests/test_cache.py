@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from penchy.compat import unittest
+from penchy.jobs.cache import OutputCache, Uncacheable, cacheable, fingerprint
+from penchy.jobs.elements import Filter
+from penchy.jobs.filters import Evaluation, Print, Save, Send, Mean
+from penchy.jobs.typecheck import Types
+
+
+class CountingFilter(Filter):
+    inputs = Types(('values', list, int))
+    outputs = Types(('sum', int))
+    # not an attribute of the instance, would be part of the configuration
+    runs = 0
+
+    def __init__(self, offset=0):
+        super(CountingFilter, self).__init__()
+        self.offset = offset
+        CountingFilter.runs = 0
+
+    def _run(self, **kwargs):
+        CountingFilter.runs += 1
+        self.out['sum'] = sum(kwargs['values']) + self.offset
+
+
+class FingerprintTest(unittest.TestCase):
+    def test_configuration(self):
+        kwargs = {'values': [1, 2]}
+        self.assertEqual(fingerprint(CountingFilter(1), kwargs),
+                         fingerprint(CountingFilter(1), kwargs))
+        self.assertNotEqual(fingerprint(CountingFilter(1), kwargs),
+                            fingerprint(CountingFilter(2), kwargs))
+
+    def test_inputs(self):
+        f = CountingFilter()
+        self.assertNotEqual(fingerprint(f, {'values': [1, 2]}),
+                            fingerprint(f, {'values': [2, 1]}))
+        self.assertNotEqual(fingerprint(f, {'values': [1]}),
+                            fingerprint(f, {'values': ['1']}))
+        self.assertEqual(fingerprint(f, {'a': {'x': 1, 'y': 2}}),
+                         fingerprint(f, {'a': {'y': 2, 'x': 1}}))
+
+    def test_functions(self):
+        def make(n):
+            return Evaluation(lambda input: {'x': input + n})
+        self.assertEqual(fingerprint(make(1), {'input': 1}),
+                         fingerprint(make(1), {'input': 1}))
+        self.assertNotEqual(fingerprint(make(1), {'input': 1}),
+                            fingerprint(make(2), {'input': 1}))
+
+    def test_unidentifiable(self):
+        with self.assertRaises(Uncacheable):
+            fingerprint(CountingFilter(), {'values': object()})
+
+    def test_side_effects(self):
+        self.assertTrue(cacheable(Mean()))
+        for element in (Print(), Save('foo'), Send()):
+            self.assertFalse(cacheable(element))
+
+
+class OutputCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='penchy-cache')
+        self.cache = OutputCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit(self):
+        f = CountingFilter()
+        self.assertFalse(self.cache.run(f, {'values': [1, 2]}))
+        f.reset()
+        self.assertTrue(self.cache.run(f, {'values': [1, 2]}))
+        self.assertEqual(f.runs, 1)
+        self.assertEqual(f.out['sum'], 3)
+
+    def test_persistent(self):
+        self.cache.run(CountingFilter(), {'values': [1, 2]})
+        f = CountingFilter()
+        self.assertTrue(OutputCache(self.directory).run(f, {'values': [1, 2]}))
+        self.assertEqual(f.runs, 0)
+
+    def test_miss(self):
+        f = CountingFilter()
+        self.cache.run(f, {'values': [1, 2]})
+        self.assertFalse(self.cache.run(f, {'values': [1, 3]}))
+        self.assertEqual(f.runs, 2)
+        self.assertEqual(f.out['sum'], 4)
+
+    def test_uncached_side_effects(self):
+        stream = tempfile.TemporaryFile(mode='w+')
+        p = Print(stream)
+        self.cache.run(p, {'x': 1})
+        self.assertEqual(os.listdir(self.directory), [])
+        stream.close()
+
+    def test_eviction(self):
+        cache = OutputCache(self.directory, max_size=1)
+        self.assertFalse(cache.run(CountingFilter(), {'values': [1]}))
+        self.assertEqual(os.listdir(self.directory), [])
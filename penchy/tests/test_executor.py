@@ -0,0 +1,78 @@
+import threading
+import time
+
+from penchy.compat import unittest
+from penchy.jobs.dependency import Edge, edgesort
+from penchy.jobs.executor import execute, group_sinks
+
+
+class Recorder(object):
+    def __init__(self, fail=(), delay=0):
+        self.finished = []
+        self.fail = fail
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, sink, edges):
+        time.sleep(self.delay)
+        if sink in self.fail:
+            raise ValueError(sink)
+        with self.lock:
+            self.finished.append(sink)
+
+
+class UnsafeElement(object):
+    THREADSAFE = False
+    active = 0
+    overlap = False
+
+    def __init__(self, name):
+        self.name = name
+
+
+class ExecuteTest(unittest.TestCase):
+    def setUp(self):
+        # 0 feeds three independent branches that are joined in 5
+        self.edges = [Edge(0, 1), Edge(0, 2), Edge(0, 3),
+                      Edge(1, 4), Edge(2, 5), Edge(3, 5), Edge(4, 5)]
+        _, self.edge_order = edgesort([0], self.edges)
+
+    def test_group_sinks(self):
+        plan = group_sinks(self.edge_order)
+        self.assertEqual([sink for sink, _ in plan], [1, 2, 3, 4, 5])
+        self.assertEqual(plan[-1][1], self.edges[4:])
+
+    def test_sequential(self):
+        r = Recorder()
+        execute(self.edge_order, r)
+        self.assertEqual(r.finished, [1, 2, 3, 4, 5])
+
+    def test_parallel_respects_dependencies(self):
+        r = Recorder(delay=0.01)
+        execute(self.edge_order, r, workers=4)
+        self.assertItemsEqual(r.finished, [1, 2, 3, 4, 5])
+        self.assertLess(r.finished.index(1), r.finished.index(4))
+        self.assertEqual(r.finished[-1], 5)
+
+    def test_first_error_is_raised(self):
+        for workers in (1, 4):
+            r = Recorder(fail=(3, 2))
+            with self.assertRaises(ValueError) as cm:
+                execute(self.edge_order, r, workers=workers)
+            self.assertEqual(cm.exception.args, (2,))
+            self.assertNotIn(5, r.finished)
+
+    def test_unsafe_elements_serialized(self):
+        elements = [UnsafeElement(i) for i in range(6)]
+        edges = [Edge(0, e) for e in elements]
+        _, edge_order = edgesort([0], edges)
+
+        def run(sink, edges):
+            UnsafeElement.active += 1
+            if UnsafeElement.active > 1:
+                UnsafeElement.overlap = True
+            time.sleep(0.005)
+            UnsafeElement.active -= 1
+
+        execute(edge_order, run, workers=6)
+        self.assertFalse(UnsafeElement.overlap)
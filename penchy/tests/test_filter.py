@@ -2,13 +2,14 @@ import itertools
 import json
 import os
 import tempfile
-from numpy import average, std
+from numpy import arange, array, average, std
 from numpy.random import random_integers, random_sample
 from tempfile import NamedTemporaryFile
 
 from penchy.compat import unittest, write
 from penchy.jobs.filters import *
 from penchy.jobs.typecheck import Types
+from penchy.statistics import Accumulator
 from penchy.util import tempdir
 from penchy.tests.util import get_json_data, make_system_composition
 
@@ -50,6 +51,25 @@ class DacapoHarnessTest(unittest.TestCase):
         self.d.run(stderr=stderr)
         self._assert_correct_out(invocations)
 
+    def test_columnar(self):
+        stderr = [i.name for i in self.mi]
+        self.d.run(stderr=stderr)
+        d = DacapoHarness(columnar=True)
+        d.run(stderr=stderr)
+        self.assertEqual([t.tolist() for t in d.out['times']], self.d.out['times'])
+
+    def test_parallel(self):
+        stderr = [i.name for i in itertools.chain(self.mi, self.si, self.failed)]
+        self.d.run(stderr=stderr)
+        d = DacapoHarness(processes=2)
+        d.run(stderr=stderr)
+        self.assertEqual(d.out, self.d.out)
+
+    def test_parallel_wrong_input(self):
+        d = DacapoHarness(processes=2)
+        with self.assertRaises(WrongInputError):
+            d.run(stderr=[i.name for i in itertools.chain(self.si, self.wrong_input)])
+
     def test_failed(self):
         invocations = len(self.failed)
         stderr = [i.name for i in self.failed]
@@ -106,6 +126,287 @@ class HProfCpuTimesTest(unittest.TestCase):
             self.assertEqual(len(self.h.out[k]), invocations)
 
 
+class HProfHeapSitesTest(unittest.TestCase):
+    def test_sites(self):
+        f = NamedTemporaryFile(prefix='penchy')
+        write(f, 'SITES BEGIN (ordered by live bytes) Sat Feb 11 10:22:30 2012\n'
+                 '          percent          live          alloc\'ed  stack class\n'
+                 ' rank   self  accum     bytes objs     bytes  objs trace name\n'
+                 '    1 20.29% 20.29%   1048592    1   1048592     1 300000 byte[]\n'
+                 '10000  0.01% 99.99%        16    1        16     1 301234 java.lang.String\n'
+                 'SITES END\n')
+        f.flush()
+        h = HProfHeapSites(columnar=True)
+        h.run(hprof=[f.name])
+        f.close()
+        self.assertEqual(list(h.out['rank'][0]), [1, 10000])
+        self.assertEqual(list(h.out['trace'][0]), [300000, 301234])
+        self.assertEqual(h.out['class'], [['byte[]', 'java.lang.String']])
+
+
+class HProfTracesTest(unittest.TestCase):
+    def setUp(self):
+        self.files = []
+        # the trace numbers differ between the invocations
+        for first, counts in ((300000, (5, 3)), (301000, (4, 2))):
+            f = NamedTemporaryFile(prefix='penchy')
+            write(f, 'JAVA PROFILE 1.0.1, created Sat Feb 11 10:22:30 2012\n\n'
+                     'TRACE {0}:\n'
+                     '\tjava.lang.Object.wait(Object.java:Unknown line)\n'
+                     '\tFoo.run(Foo.java:10)\n'
+                     'TRACE {1}:\n'
+                     '\tBar.compute(Bar.java:3)\n'
+                     '\tFoo.run(Foo.java:10)\n'
+                     'TRACE {2}: <empty>\n'
+                     'CPU SAMPLE (ms) BEGIN (total = {3}) Sat Feb 11 10:22:30 2012\n'
+                     'rank   self  accum   count trace method\n'
+                     '   1 50.00% 50.00%       {4} {1} Bar.compute\n'
+                     '   2 30.00% 80.00%       {5} {0} java.lang.Object.wait\n'
+                     'CPU SAMPLE (ms) END\n'
+                     .format(first, first + 1, first + 2, sum(counts), *counts))
+            f.flush()
+            self.files.append(f)
+        self.h = HProfCpuSamples(traces=True)
+        self.h.run(hprof=[f.name for f in self.files])
+
+    def tearDown(self):
+        for f in self.files:
+            f.close()
+
+    def test_traces(self):
+        self.assertEqual(self.h.out['frames'][0],
+                         ['java.lang.Object.wait(Object.java:Unknown line)',
+                          'Foo.run(Foo.java:10)', 'Bar.compute(Bar.java:3)'])
+        self.assertEqual(self.h.out['trace_ids'][0], [300000, 300001, 300002])
+        self.assertEqual(self.h.out['trace_frames'][0], [[0, 1], [2, 1], []])
+        self.assertEqual(self.h.out['trace'][0], [300001, 300000])
+
+    def test_without_traces(self):
+        h = HProfCpuSamples()
+        h.run(hprof=[self.files[0].name])
+        self.assertNotIn('frames', h.out)
+        self.assertNotIn('frames', h.outputs.descriptions)
+
+    def test_top_traces(self):
+        top = TopTraces(n=1)
+        top.run(**dict((name, self.h.out[name]) for name in
+                       ('count', 'trace', 'frames', 'trace_ids', 'trace_frames')))
+        self.assertEqual(top.out['stack'], [['Bar.compute(Bar.java:3)',
+                                             'Foo.run(Foo.java:10)']])
+        self.assertEqual(top.out['count'], [9])
+        self.assertAlmostEqual(top.out['share'][0], 9 / 14.0)
+
+    def test_top_frames(self):
+        top = TopTraces(n=2, by='frame')
+        top.run(**dict((name, self.h.out[name]) for name in
+                       ('count', 'trace', 'frames', 'trace_ids', 'trace_frames')))
+        self.assertEqual(top.out['stack'], [['Foo.run(Foo.java:10)'],
+                                            ['Bar.compute(Bar.java:3)']])
+        self.assertEqual(top.out['count'], [14, 9])
+        self.assertEqual(top.out['share'], [1.0, 9 / 14.0])
+
+    def test_missing_trace(self):
+        top = TopTraces()
+        with self.assertRaises(WrongInputError):
+            top.run(count=[[1]], trace=[[1]], frames=[[]], trace_ids=[[]],
+                    trace_frames=[[]])
+
+    def test_wrong_arguments(self):
+        with self.assertRaises(ValueError):
+            TopTraces(n=0)
+        with self.assertRaises(ValueError):
+            TopTraces(by='method')
+
+
+class GCLogTest(unittest.TestCase):
+    def run_filter(self, log, **kwargs):
+        return run_on_tempfiles(GCLog(**kwargs), 'gc_log', [log])
+
+    def test_classic(self):
+        gc = self.run_filter(
+            '0.123: [GC (Allocation Failure)  33280K->4864K(125952K), 0.0050000 secs]\n'
+            '0.500: [GC (Allocation Failure) [PSYoungGen: 38144K->4848K(38400K)] '
+            '38144K->9648K(125952K), 0.0150000 secs] '
+            '[Times: user=0.01 sys=0.00, real=0.01 secs]\n'
+            '1.234: [Full GC (Ergonomics)  9648K->4692K(125952K), 0.0300000 secs]\n',
+            percentiles=(0, 50, 100))
+        self.assertEqual(gc.out['timestamp'], [[0.123, 0.5, 1.234]])
+        self.assertEqual(gc.out['kind'], [['GC (Allocation Failure)',
+                                           'GC (Allocation Failure)',
+                                           'Full GC (Ergonomics)']])
+        self.assertEqual(gc.out['heap_before'], [[33280, 38144, 9648]])
+        self.assertEqual(gc.out['heap_after'], [[4864, 9648, 4692]])
+        self.assertEqual(gc.out['heap_total'], [[125952] * 3])
+        for actual, expected in zip(gc.out['pause'][0], [5, 15, 30]):
+            self.assertAlmostEqual(actual, expected)
+        self.assertAlmostEqual(gc.out['total_pause'][0], 50)
+        for actual, expected in zip(gc.out['percentiles'][0], [5, 15, 30]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_classic_details(self):
+        gc = self.run_filter(
+            '0.200: [GC (Allocation Failure) 0.200: [ParNew: 33280K->4864K(38400K), '
+            '0.0051000 secs] 33280K->4872K(125952K), 0.0052000 secs] '
+            '[Times: user=0.01 sys=0.00, real=0.01 secs]\n'
+            '1.234: [Full GC (Ergonomics) [PSYoungGen: 4864K->0K(38400K)] '
+            '[ParOldGen: 8K->4700K(87552K)] 4872K->4700K(125952K), '
+            '[Metaspace: 2999K->2999K(1056768K)], 0.0201000 secs] '
+            '[Times: user=0.03 sys=0.00, real=0.02 secs]\n')
+        self.assertEqual(gc.out['kind'], [['GC (Allocation Failure)',
+                                           'Full GC (Ergonomics)']])
+        self.assertEqual(gc.out['heap_before'], [[33280, 4872]])
+        self.assertEqual(gc.out['heap_after'], [[4872, 4700]])
+        self.assertEqual(gc.out['heap_total'], [[125952, 125952]])
+        for actual, expected in zip(gc.out['pause'][0], [5.2, 20.1]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_classic_g1_and_cms(self):
+        gc = self.run_filter(
+            '0.123: [GC pause (G1 Evacuation Pause) (young) 24M->4096K(256M), '
+            '0.0051234 secs]\n'
+            '0.200: [GC concurrent-mark-start]\n'
+            '0.300: [GC cleanup 10.5M->9M(256M), 0.0003000 secs]\n'
+            '1.000: [GC (CMS Initial Mark) [1 CMS-initial-mark: 0K(349568K)] '
+            '6521K(506816K), 0.0032000 secs] [Times: user=0.00 sys=0.00, real=0.00 secs]\n')
+        self.assertEqual(gc.out['kind'], [['GC pause (G1 Evacuation Pause) (young)',
+                                           'GC', 'GC (CMS Initial Mark)']])
+        self.assertEqual(gc.out['heap_before'], [[24 * 1024, 10752, 6521]])
+        self.assertEqual(gc.out['heap_after'], [[4096, 9 * 1024, 6521]])
+        self.assertEqual(gc.out['heap_total'], [[256 * 1024, 256 * 1024, 506816]])
+        for actual, expected in zip(gc.out['pause'][0], [5.1234, 0.3, 3.2]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_unknown_format(self):
+        self.assertRaises(WrongInputError, self.run_filter,
+                          '0.123: [GC (Allocation Failure)  33280B->4864B(125952B), '
+                          '0.0050000 secs]\n')
+
+    def test_unified(self):
+        gc = self.run_filter(
+            '[0.010s][info][gc] Using G1\n'
+            '[0.123s][info][gc] GC(0) Pause Young (Normal) (G1 Evacuation Pause) '
+            '24M->4M(256M) 3.456ms\n'
+            '[0.300s][info][gc] GC(1) Concurrent Cycle 12.345ms\n'
+            '[1,500s][info][gc] GC(2) Pause Full (System.gc()) 2G->512K(4G) 100,000ms\n',
+            columnar=True)
+        self.assertEqual(list(gc.out['timestamp'][0]), [0.123, 1.5])
+        self.assertEqual(gc.out['kind'], [['Pause Young (Normal) (G1 Evacuation Pause)',
+                                           'Pause Full (System.gc())']])
+        self.assertEqual(list(gc.out['pause'][0]), [3.456, 100.0])
+        self.assertEqual(list(gc.out['heap_before'][0]), [24 * 1024, 2 * 1024 ** 2])
+        self.assertEqual(list(gc.out['heap_after'][0]), [4 * 1024, 512])
+        self.assertEqual(list(gc.out['heap_total'][0]), [256 * 1024, 4 * 1024 ** 2])
+        self.assertAlmostEqual(gc.out['total_pause'][0], 103.456)
+
+    def test_no_collections(self):
+        gc = self.run_filter('')
+        self.assertEqual(gc.out['pause'], [[]])
+        self.assertEqual(gc.out['total_pause'], [0.0])
+
+
+class JITLogTest(unittest.TestCase):
+    def run_filter(self, log):
+        return run_on_tempfiles(JITLog(), 'jit_log', [log])
+
+    def test_classic(self):
+        jit = self.run_filter(
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            "<hotspot_log version='160 1' process='1234' time_ms='1328952150000'>\n"
+            "<tty>\n"
+            "     45    1       3       java.lang.String::hashCode (55 bytes)\n"
+            "     50    2     n 0       java.lang.System::arraycopy (native)   (static)\n"
+            "     51    3 %     4       foo.Bar::loop @ 12 (100 bytes)\n"
+            "<writer thread='1234'/>\n"
+            "     52    4       3       java.lang.Object::&lt;init&gt; (1 bytes)\n"
+            "     60    1       3       java.lang.String::hashCode (55 bytes)   made not entrant\n"
+            "</tty>\n</hotspot_log>\n")
+        self.assertEqual(jit.out['timestamp'], [[45, 50, 51, 52, 60]])
+        self.assertEqual(jit.out['compile_id'], [[1, 2, 3, 4, 1]])
+        self.assertEqual(jit.out['tier'], [[3, 0, 4, 3, 3]])
+        self.assertEqual(jit.out['method'], [['java.lang.String::hashCode',
+                                              'java.lang.System::arraycopy',
+                                              'foo.Bar::loop',
+                                              'java.lang.Object::<init>',
+                                              'java.lang.String::hashCode']])
+        self.assertEqual(jit.out['osr'], [[False, False, True, False, False]])
+        self.assertEqual(jit.out['event'], [['compiled'] * 4 + ['made not entrant']])
+
+    def test_not_tiered(self):
+        jit = self.run_filter(
+            "    120    7             java.util.HashMap::hash (20 bytes)\n"
+            "    130    8  s!         Foo::bar (10 bytes)   COMPILE SKIPPED: huge method\n")
+        self.assertEqual(jit.out['tier'], [[-1, -1]])
+        self.assertEqual(jit.out['method'], [['java.util.HashMap::hash', 'Foo::bar']])
+        self.assertEqual(jit.out['event'], [['compiled', 'skipped']])
+
+    def test_per_iteration(self):
+        c = CompilationsPerIteration(startup=100)
+        c.run(timestamp=[[50, 100, 150, 199, 250, 300, 400]],
+              event=[['compiled'] * 4 + ['made not entrant'] + ['compiled'] * 2],
+              times=[[100, 50, 100]])
+        self.assertEqual(c.out['compilations'], [[3, 0, 1]])
+        self.assertEqual(c.out['startup_compilations'], [1])
+
+
+class JMHTest(unittest.TestCase):
+    RESULTS = [
+        {'benchmark': 'org.sample.Hashing.md5', 'mode': 'thrpt', 'threads': 1,
+         'forks': 2, 'params': {'size': '1024', 'cached': 'true'},
+         'primaryMetric': {'score': 2.5, 'scoreError': 0.5, 'scoreUnit': 'ops/us',
+                           'rawData': [[2.0, 3.0], [2.5, 2.5]]},
+         'secondaryMetrics': {}},
+        {'benchmark': 'org.sample.Hashing.sha1', 'mode': 'avgt', 'threads': 1,
+         'forks': 1,
+         'primaryMetric': {'score': 4.0, 'scoreError': 'NaN', 'scoreUnit': 'us/op',
+                           'rawData': [[4.0]]}}]
+
+    def run_filter(self, content, jmh=None):
+        return run_on_tempfiles(jmh or JMH(), 'jmh', [content])
+
+    def test_results(self):
+        jmh = self.run_filter(json.dumps(self.RESULTS, indent=4))
+        self.assertEqual(jmh.out['benchmark'], [['org.sample.Hashing.md5:cached=true,size=1024',
+                                                 'org.sample.Hashing.sha1']])
+        self.assertEqual(jmh.out['mode'], [['thrpt', 'avgt']])
+        self.assertEqual(jmh.out['unit'], [['ops/us', 'us/op']])
+        self.assertEqual(jmh.out['score'], [[2.5, 4.0]])
+        self.assertEqual(jmh.out['error'][0][0], 0.5)
+        self.assertNotEqual(jmh.out['error'][0][1], jmh.out['error'][0][1])
+        self.assertEqual(jmh.out['samples'], [[[2.0, 3.0, 2.5, 2.5], [4.0]]])
+
+        m = Mean()
+        m.run(values=jmh.out['samples'][0][0])
+        self.assertEqual(m.out['mean'], 2.5)
+
+    def test_columnar(self):
+        jmh = self.run_filter(json.dumps(self.RESULTS), JMH(columnar=True))
+        self.assertEqual([s.tolist() for s in jmh.out['samples'][0]],
+                         [[2.0, 3.0, 2.5, 2.5], [4.0]])
+
+    def test_sample_mode(self):
+        result = {'benchmark': 'org.sample.Hashing.md5', 'mode': 'sample',
+                  'primaryMetric': {'score': 1.5, 'scoreError': 0.1,
+                                    'scoreUnit': 'us/op',
+                                    'rawDataHistogram': [[[[1.0, 2], [3.0, 1]]],
+                                                         [[[2.0, 1]]]]}}
+        jmh = self.run_filter(json.dumps([result]))
+        self.assertEqual(jmh.out['samples'], [[[1.0, 1.0, 3.0, 2.0]]])
+
+        del result['primaryMetric']['rawDataHistogram']
+        with self.assertRaises(WrongInputError):
+            self.run_filter(json.dumps([result]))
+
+    def test_empty(self):
+        jmh = self.run_filter('[ ]\n')
+        self.assertEqual(jmh.out['benchmark'], [[]])
+
+    def test_wrong_input(self):
+        for content in ('', 'no json', json.dumps(self.RESULTS)[:-10],
+                        json.dumps([{'benchmark': 'foo'}])):
+            with self.assertRaises(WrongInputError):
+                self.run_filter(content)
+
+
 class TamiflexTest(unittest.TestCase):
 
     @classmethod
@@ -137,6 +438,36 @@ class TamiflexTest(unittest.TestCase):
             with self.assertRaises(WrongInputError):
                 self.h.run(reflection_log=[ref_log])
 
+    def test_interned(self):
+        ref_log = [i.name for i in self.si]
+        self.h.run(reflection_log=ref_log)
+        h = Tamiflex(interned=True)
+        h.run(reflection_log=ref_log)
+        self.assertSetEqual(set(h.out), h._output_names)
+        for strings, name in zip(h.out['strings'], h.out['name']):
+            self.assertEqual(len(strings), len(set(strings)))
+        for k in self.h.out:
+            self.assertEqual([[strings[i] for i in codes] for strings, codes
+                              in zip(h.out['strings'], h.out[k])],
+                             self.h.out[k])
+
+    def test_call_sites(self):
+        logs = write_to_tempfiles(['Class.forName;A;B.c;1;\n'
+                                   'Class.forName;A;B.c;1;\n'
+                                   'Method.invoke;B.d();B.c;2;\n',
+                                   'Method.invoke;B.d();B.c;2;\n'])
+        h = Tamiflex(interned=True)
+        h.run(reflection_log=[f.name for f in logs])
+        for f in logs:
+            f.close()
+        sites = ReflectionCallSites()
+        sites.run(**dict((k, h.out[k]) for k in
+                         ('strings', 'kind', 'name', 'parent_name', 'line')))
+        self.assertEqual(sites.out['kind'], ['Class.forName', 'Method.invoke'])
+        self.assertEqual(sites.out['name'], ['A', 'B.d()'])
+        self.assertEqual(sites.out['line'], ['1', '2'])
+        self.assertEqual(sites.out['invocations'], [1, 2])
+
     def _assert_correct_out(self, invocations):
         self.assertSetEqual(set(self.h.out), self.h._output_names)
         for k in self.h.out.keys():
@@ -155,6 +486,20 @@ def write_to_tempfiles(data):
     return files
 
 
+def run_on_tempfiles(filter_, name, data):
+    """
+    Run ``filter_`` with the temporary files that contain ``data`` as its
+    input ``name`` and return it.
+    """
+    files = write_to_tempfiles(data)
+    try:
+        filter_.run(**{name: [f.name for f in files]})
+    finally:
+        for f in files:
+            f.close()
+    return filter_
+
+
 class HProfTest(unittest.TestCase):
     def test_wrong_outputs(self):
         with self.assertRaises(ValueError):
@@ -249,6 +594,23 @@ class MergeTest(unittest.TestCase):
             Merge(('col1', 'col2'), [(1, 'b', Value('id1'), Value('foo')), (2, 'c', Value('id2'))])
 
 
+class ReceiveTest(unittest.TestCase):
+    def test_columnar(self):
+        results = {1: {'times': [[3, 1], [2, 2]], 'valid': [True, False],
+                       'names': ['a', 'b'], 'total': [1.5, 2]}}
+        kwargs = {':environment:': {'receive': lambda: results}}
+        f = Receive()
+        f._run(**kwargs)
+        self.assertIs(f.out['results'], results)
+        f = Receive(columnar=True)
+        f._run(**kwargs)
+        result = f.out['results'][1]
+        self.assertEqual([t.tolist() for t in result['times']], [[3, 1], [2, 2]])
+        self.assertEqual(result['total'].tolist(), [1.5, 2.0])
+        self.assertEqual(result['valid'], [True, False])
+        self.assertEqual(result['names'], ['a', 'b'])
+
+
 class MergingReceiveTest(unittest.TestCase):
     def setUp(self):
         environment = {'receive': lambda: self.results}
@@ -352,6 +714,15 @@ class StatisticRuntimeEvaluationTest(unittest.TestCase):
                     self.assertAlmostEqual(actual, expected)
             f.reset()
 
+    def test_ragged(self):
+        f = StatisticRuntimeEvaluation()
+        f.run(times=[[10, 20, 30], [30, None], [20]])
+        self.assertEqual(f.out['averages'], [20, 20, 30])
+        self.assertEqual(f.out['maximals'], [30, 20, 30])
+        self.assertEqual(f.out['minimals'], [10, 20, 30])
+        self.assertEqual(f.out['positive_deviations'], [0.5, 0, 0])
+        self.assertEqual(f.out['negative_deviations'], [0.5, 0, 0])
+
 
 class EvaluationTest(unittest.TestCase):
 
@@ -528,6 +899,37 @@ class StandardDeviationTest(unittest.TestCase):
         self.assertAlmostEqual(f.out['standard_deviation'], std(rnd, ddof=1))
 
 
+class SummarizeTest(unittest.TestCase):
+    def test_summaries(self):
+        rnd = random_sample(30)
+        parts = [rnd[:10].tolist(), rnd[10:]]
+        summaries = []
+        for part in parts:
+            f = Summarize()
+            f._run(values=part)
+            summaries.append(f.out['summary'])
+        # as received from a client
+        summaries[1] = summaries[1].as_dict()
+
+        f = Summarize()
+        f._run(values=summaries)
+        summary = f.out['summary']
+        self.assertEqual(summary.count, 30)
+
+        mean = Mean()
+        mean.run(values=summary)
+        self.assertAlmostEqual(mean.out['mean'], average(rnd))
+        sd = StandardDeviation(ddof=1)
+        sd.run(values=summary)
+        self.assertAlmostEqual(sd.out['standard_deviation'], std(rnd, ddof=1))
+
+    def test_confidence_interval(self):
+        f = ConfidenceIntervalMean(significance_level=0.9)
+        f._run(values=Accumulator([1, 2, 3]))
+        for actual, expected in zip(f.out['interval'], (1.9179390061550845, 2.0820609938449155)):
+            self.assertAlmostEqual(actual, expected)
+
+
 class SumTest(unittest.TestCase):
     def test_integers(self):
         rnd = random_integers(-20, 20, 50)
@@ -626,6 +1028,11 @@ class ZipTest(unittest.TestCase):
         f._run(values=[[1, 2], [3, 4], [5, 6]])
         self.assertEqual(f.out['values'], [[1, 3, 5], [2, 4, 6]])
 
+    def test_array(self):
+        f = Zip()
+        f._run(values=array([[1, 2], [3, 4], [5, 6]]))
+        self.assertEqual(f.out['values'].tolist(), [[1, 3, 5], [2, 4, 6]])
+
 
 class SliceTest(unittest.TestCase):
     def test_slice1(self):
@@ -658,6 +1065,14 @@ class SteadyStateTest(unittest.TestCase):
                        [15, 36, 21, 1, 2, 15, 47, 7, 19, 28, 39, 29, 32, 17, 15, 18, 14, 8, 39, 0]])
         self.assertEqual(f.out['values'], [[36, 49, 32, 24, 39], [19, 28, 39, 29, 32] ])
 
+    def test_indices(self):
+        f = SteadyState(k=5, threshold=0.3, index=True)
+        f.run(values=[[30, 33, 4, 16, 29, 34, 10, 44, 12, 25, 22, 25, 36, 49, 32, 24, 39, 36, 34, 38],
+                      [1, 40, 1, 40, 1, 40, 1],
+                      [15, 36, 21, 1, 2, 15, 47, 7, 19, 28, 39, 29, 32, 17, 15, 18, 14, 8, 39, 0]])
+        self.assertEqual(f.out['values'], [[36, 49, 32, 24, 39], [19, 28, 39, 29, 32]])
+        self.assertEqual(f.out['indices'], [12, 8])
+
 
 class ConfidenceIntervalMeanTest(unittest.TestCase):
     def test_small_sample_set(self):
@@ -673,6 +1088,37 @@ class ConfidenceIntervalMeanTest(unittest.TestCase):
             self.assertAlmostEqual(actual, expected)
 
 
+class BootstrapConfidenceIntervalTest(unittest.TestCase):
+    def setUp(self):
+        self.xs = [12, 15, 11, 19, 13, 40, 14, 12, 16, 13, 25, 12]
+        self.ys = [10, 11, 9, 10, 12, 10, 30, 11, 10, 9]
+
+    def test_mean(self):
+        for method in ('percentile', 'bca'):
+            f = BootstrapConfidenceInterval(0.1, method=method,
+                                            resamples=2000, seed=42)
+            f.run(values=self.xs)
+            lower, upper = f.out['interval']
+            self.assertTrue(lower < average(self.xs) < upper)
+            # reproducible with a seed
+            f.reset()
+            f.run(values=self.xs)
+            self.assertEqual(f.out['interval'], (lower, upper))
+
+    def test_ratio(self):
+        f = BootstrapConfidenceInterval(0.1, statistic='median', ratio=True,
+                                        resamples=2000, seed=42)
+        f.run(xs=self.xs, ys=self.ys)
+        lower, upper = f.out['interval']
+        self.assertTrue(lower <= 13.5 / 10 <= upper)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            BootstrapConfidenceInterval(0.1, statistic='mode')
+        with self.assertRaises(ValueError):
+            BootstrapConfidenceInterval(0.1, method='studentized')
+
+
 class CI2AlternativesTest(unittest.TestCase):
     def test_small_sample_set(self):
         f = CI2Alternatives(significance_level=0.9)
@@ -701,6 +1147,17 @@ class SortTest(unittest.TestCase):
         self.assertEqual(f.out['b'], ['a', 'c', 'b'])
         self.assertEqual(f.out['c'], [3, 2, 1])
 
+    def test_arrays(self):
+        for reverse in (False, True):
+            columns = dict(a=[3, 1, 1, 3], b=['b', 'c', 'a', 'b'], c=[1, 2, 3, 4])
+            lists = Sort(["a", "b"], reverse)
+            lists._run(**columns)
+            columns['a'] = array(columns['a'])
+            arrays = Sort(["a", "b"], reverse)
+            arrays._run(**columns)
+            for name in columns:
+                self.assertEqual(arrays.out[name].tolist(), lists.out[name])
+
 
 class AccumulateTest(unittest.TestCase):
     def test_valid(self):
@@ -708,6 +1165,11 @@ class AccumulateTest(unittest.TestCase):
         f._run(a=[1, 2, 3])
         self.assertEqual(f.out['accum'], [1, 3, 6])
 
+    def test_array(self):
+        f = Accumulate('a')
+        f._run(a=arange(1, 4))
+        self.assertEqual(f.out['accum'].tolist(), [1.0, 3.0, 6.0])
+
 
 class NormalizeTest(unittest.TestCase):
     def test_valid(self):
@@ -715,6 +1177,11 @@ class NormalizeTest(unittest.TestCase):
         f._run(values=[67, 22, 7, 5, 3, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], norm=126)
         self.assertAlmostEqual(1.0 - sum(f.out['values']), 0.0)
 
+    def test_array(self):
+        f = Normalize()
+        f._run(values=array([2, 1, 1]), norm=4)
+        self.assertEqual(f.out['values'].tolist(), [0.5, 0.25, 0.25])
+
 
 class ComposerTest(unittest.TestCase):
     def setUp(self):
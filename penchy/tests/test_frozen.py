@@ -0,0 +1,104 @@
+import pickle
+import threading
+
+from penchy.compat import on_python3, unittest
+from penchy.jobs.frozen import FrozenDict, FrozenList, FrozenError, freeze, thaw
+from penchy.jobs.typecheck import Types
+
+
+class FreezeTest(unittest.TestCase):
+    def setUp(self):
+        self.value = {'a': [[1, 2], [3]], 'b': 'foo'}
+        self.frozen = freeze(self.value)
+
+    def test_nested(self):
+        self.assertIsInstance(self.frozen, FrozenDict)
+        self.assertIsInstance(self.frozen['a'], FrozenList)
+        self.assertIsInstance(self.frozen['a'][0], FrozenList)
+        self.assertEqual(self.frozen, self.value)
+        self.assertIs(freeze(self.frozen), self.frozen)
+
+    def test_lazy(self):
+        # the nested values are not copied before they are read
+        if on_python3:
+            self.assertIs(dict.__getitem__(self.frozen, 'a'), self.value['a'])
+        a = self.frozen['a']
+        self.assertIsNot(a, self.value['a'])
+        self.assertIs(list.__getitem__(a, 0), self.value['a'][0])
+        self.assertIs(a[0], a[0])
+        self.assertIs(self.frozen['a'], a)
+
+    def test_no_leaks(self):
+        # every way of reading a fresh frozen value freezes the nested values
+        for read in (lambda v: dict(v)['a'], lambda v: list(v.values())[0],
+                     lambda v: list(v['a'])[0], lambda v: v['a'][:][0],
+                     lambda v: (v['a'] + [])[0], lambda v: list(reversed(v['a']))[1]):
+            with self.assertRaises(FrozenError):
+                read(freeze(self.value)).append(1)
+        self.assertEqual(self.value['a'], [[1, 2], [3]])
+
+    def test_concurrent_reads(self):
+        # readers in several threads receive the same frozen items
+        frozen = freeze([[i] for i in range(10000)])
+        read = []
+
+        def reader():
+            read.append([id(item) for item in frozen])
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(read), 8)
+        for ids in read:
+            self.assertEqual(ids, read[0])
+
+    def test_read_only(self):
+        with self.assertRaises(FrozenError):
+            self.frozen['c'] = 1
+        with self.assertRaises(FrozenError):
+            self.frozen['a'].pop()
+        with self.assertRaises(FrozenError):
+            self.frozen['a'][0][0] = 2
+        with self.assertRaises(FrozenError):
+            self.frozen['a'] += [1]
+        self.assertEqual(self.value['a'], [[1, 2], [3]])
+
+    def test_thaw(self):
+        value = thaw(self.frozen)
+        value['a'][0].append(3)
+        self.assertEqual(type(value['a']), list)
+        self.assertEqual(self.frozen['a'][0], [1, 2])
+        self.assertIs(thaw(self.value), self.value)
+
+    def test_thaw_nested(self):
+        # e.g. a slice of a frozen list
+        value = ['x', self.frozen['a'][:1]]
+        thawed = thaw(value)
+        thawed[1][0].append(3)
+        self.assertEqual(type(thawed[1][0]), list)
+        self.assertEqual(self.value['a'][0], [1, 2])
+
+    def test_type_check(self):
+        Types(('a', list, list, int)).check_input(self.frozen)
+
+    def test_pickle(self):
+        value = pickle.loads(pickle.dumps(self.frozen, pickle.HIGHEST_PROTOCOL))
+        self.assertIsInstance(value['a'], FrozenList)
+        self.assertEqual(value, self.value)
+
+    def test_array(self):
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            self.skipTest('numpy is not installed')
+        array = np.arange(3)
+        frozen = freeze(array)
+        with self.assertRaises(ValueError):
+            frozen[0] = 1
+        # the view shares the data
+        array[0] = 5
+        self.assertEqual(frozen[0], 5)
+        thawed = thaw(frozen)
+        thawed[0] = 1
+        self.assertEqual(array[0], 5)
@@ -0,0 +1,149 @@
+import struct
+from tempfile import NamedTemporaryFile
+
+from penchy.compat import unittest, write
+from penchy.jobs.filters import HProfHeapDump, WrongInputError
+from penchy.jobs.heapdump import HeapDumpError, class_histogram, java_name
+
+
+class DumpWriter(object):
+    """
+    Writes binary heap dumps for the tests.
+    """
+
+    def __init__(self, id_size=8):
+        self.id_size = id_size
+        self.id_format = 'I' if id_size == 4 else 'Q'
+        self.records = [b'JAVA PROFILE 1.0.2\0', struct.pack('>III', id_size, 0, 0)]
+        self.heap = []
+
+    def id(self, value):
+        return struct.pack('>' + self.id_format, value)
+
+    def record(self, tag, body):
+        self.records.append(struct.pack('>BII', tag, 0, len(body)) + body)
+
+    def string(self, id_, value):
+        self.record(0x01, self.id(id_) + value)
+
+    def load_class(self, class_id, name_id):
+        self.record(0x02, struct.pack('>I', 1) + self.id(class_id) +
+                    struct.pack('>I', 0) + self.id(name_id))
+
+    def class_dump(self, class_id):
+        body = self.id(class_id) + struct.pack('>I', 0) + self.id(0) * 6
+        body += struct.pack('>I', 16)
+        # one constant, one static int and two instance fields
+        body += struct.pack('>H', 1) + struct.pack('>HB', 1, 10) + struct.pack('>i', 7)
+        body += struct.pack('>H', 1) + self.id(99) + struct.pack('>B', 2) + self.id(0)
+        body += struct.pack('>H', 2) + self.id(98) + struct.pack('>B', 10) + \
+            self.id(97) + struct.pack('>B', 11)
+        self.heap.append(struct.pack('>B', 0x20) + body)
+
+    def instance(self, object_id, class_id, size):
+        self.heap.append(struct.pack('>B', 0x21) + self.id(object_id) +
+                         struct.pack('>I', 0) + self.id(class_id) +
+                         struct.pack('>I', size) + b'\0' * size)
+
+    def object_array(self, object_id, class_id, count):
+        self.heap.append(struct.pack('>B', 0x22) + self.id(object_id) +
+                         struct.pack('>II', 0, count) + self.id(class_id) +
+                         self.id(0) * count)
+
+    def primitive_array(self, object_id, type_, count, size):
+        self.heap.append(struct.pack('>B', 0x23) + self.id(object_id) +
+                         struct.pack('>IIB', 0, count, type_) + b'\0' * (count * size))
+
+    def root(self, object_id):
+        self.heap.append(struct.pack('>B', 0xFF) + self.id(object_id))
+
+    def flush_heap(self):
+        self.record(0x1C, b''.join(self.heap))
+        self.heap = []
+
+    def write(self, f):
+        write(f, b''.join(self.records))
+        f.flush()
+
+
+def example_dump(id_size=8):
+    w = DumpWriter(id_size)
+    w.string(1, b'java/lang/String')
+    w.string(2, b'[Ljava/lang/Object;')
+    w.string(3, b'unused')
+    w.load_class(100, 1)
+    w.load_class(200, 2)
+    w.root(1000)
+    w.class_dump(100)
+    w.instance(1000, 100, 24)
+    w.instance(1001, 100, 24)
+    w.flush_heap()
+    w.object_array(1002, 200, 3)
+    w.primitive_array(1003, 10, 5, 4)
+    w.primitive_array(1004, 10, 1, 4)
+    w.primitive_array(1005, 5, 2, 2)
+    w.flush_heap()
+    # heap dump end
+    w.record(0x2C, b'')
+    return w
+
+
+class ClassHistogramTest(unittest.TestCase):
+    def histogram(self, writer):
+        with NamedTemporaryFile() as f:
+            writer.write(f)
+            names, counts, sizes = class_histogram(f.name)
+        return sorted(zip(names, counts, sizes))
+
+    def test_histogram(self):
+        for id_size in (4, 8):
+            self.assertEqual(self.histogram(example_dump(id_size)),
+                             [('char[]', 1, 4),
+                              ('int[]', 2, 24),
+                              ('java.lang.Object[]', 1, 3 * id_size),
+                              ('java.lang.String', 2, 48)])
+
+    def test_unknown_class(self):
+        w = DumpWriter()
+        w.instance(1, 0x42, 8)
+        w.flush_heap()
+        self.assertEqual(self.histogram(w), [('<unknown class 0x42>', 1, 8)])
+
+    def test_malformed(self):
+        w = example_dump()
+        w.records[-2] = w.records[-2][:-3]
+        self.assertRaises(HeapDumpError, self.histogram, w)
+
+        w = DumpWriter()
+        w.heap.append(b'\x42')
+        w.flush_heap()
+        self.assertRaises(HeapDumpError, self.histogram, w)
+
+        w = DumpWriter()
+        w.records[0] = b'JAVA PROFILE 1.0.2\0'.replace(b'JAVA', b'LAVA')
+        self.assertRaises(HeapDumpError, self.histogram, w)
+
+    def test_java_name(self):
+        self.assertEqual(java_name('java/lang/String'), 'java.lang.String')
+        self.assertEqual(java_name('[[Ljava/lang/String;'), 'java.lang.String[][]')
+        self.assertEqual(java_name('[I'), 'int[]')
+
+
+class HProfHeapDumpTest(unittest.TestCase):
+    def test_filter(self):
+        with NamedTemporaryFile() as f:
+            example_dump().write(f)
+            h = HProfHeapDump(columnar=True)
+            h.run(hprof=[f.name])
+        # equal sizes are ordered by name
+        self.assertEqual(h.out['class'], [['java.lang.String', 'int[]',
+                                           'java.lang.Object[]', 'char[]']])
+        self.assertEqual(list(h.out['instances'][0]), [2, 2, 1, 1])
+        self.assertEqual(list(h.out['shallow_size'][0]), [48, 24, 24, 4])
+
+    def test_invalid(self):
+        with NamedTemporaryFile() as f:
+            write(f, b'CPU TIME (ms) BEGIN\n')
+            f.flush()
+            with self.assertRaises(WrongInputError):
+                HProfHeapDump().run(hprof=[f.name])
@@ -2,12 +2,17 @@ import os
 from hashlib import sha1
 
 from penchy.compat import unittest, update_hasher
+try:
+    from xmlrpc.client import dumps
+except ImportError:  # pragma: no cover
+    from xmlrpclib import dumps
 from penchy.jobs.dependency import Edge
-from penchy.jobs.filters import Print, DacapoHarness, Receive, Send
+from penchy.jobs.filters import (Print, DacapoHarness, Receive, Send, Extract,
+                                  Mean, Slice)
 from penchy.jobs.job import Job, SystemComposition, NodeSetting
 from penchy.jobs.jvms import JVM, ValgrindJVM
 from penchy.jobs.tools import HProf
-from penchy.jobs.typecheck import Types
+from penchy.jobs.typecheck import Types, OFF
 from penchy.jobs.workloads import ScalaBench
 from penchy.tests.util import MockPipelineElement, make_system_composition
 
@@ -169,6 +174,17 @@ class BuildEnvTest(unittest.TestCase):
         self.assertEqual(env['send']('data'), 42)
 
 
+class RecordingElement(MockPipelineElement):
+    SIDE_EFFECTS = True
+
+    def __init__(self):
+        super(RecordingElement, self).__init__()
+        self.received = []
+
+    def _run(self, **kwargs):
+        self.received.append(kwargs['results'])
+
+
 class RunServerPipelineTest(unittest.TestCase):
     def setUp(self):
         self.receive = Receive()
@@ -190,6 +206,80 @@ class RunServerPipelineTest(unittest.TestCase):
         j = Job([], [])
         self.assertEqual(j.run_server_pipeline(), None)
 
+    def test_parallel(self):
+        receive = Receive()
+        sinks = [RecordingElement() for _ in range(4)]
+        j = Job([], [receive >> sink for sink in sinks], server_workers=4)
+        j.receive = lambda: self.data
+        j.run_server_pipeline()
+        self.assertDictEqual(receive.out, {'results' : self.data})
+        for sink in sinks:
+            self.assertEqual(sink.received, [self.data])
+
+    def test_dead_branch(self):
+        receive = Receive()
+        live = RecordingElement()
+        dead = RecordingElement()
+        dead.SIDE_EFFECTS = False
+        j = Job([], [receive >> live, receive >> dead])
+        j.receive = lambda: self.data
+        j.run_server_pipeline()
+        self.assertEqual(live.received, [self.data])
+        self.assertEqual(dead.received, [])
+
+        j = Job([], [receive >> dead], prune_dead=False)
+        j.receive = lambda: self.data
+        j.run_server_pipeline()
+        self.assertEqual(dead.received, [self.data])
+
+
+    def test_shared_results(self):
+        receive = Receive()
+        first = RecordingElement()
+        second = RecordingElement()
+        second.MUTATES_INPUT = True
+        j = Job([], [receive >> first, receive >> second])
+        j.receive = lambda: self.data
+        j.run_server_pipeline()
+        self.assertEqual(first.received, [self.data])
+        self.assertIsNot(first.received[0], self.data)
+        # the mutating element got a copy
+        second.received[0]['c'] = 3
+        self.assertNotIn('c', first.received[0])
+        with self.assertRaises(TypeError):
+            first.received[0]['c'] = 3
+
+    def test_shared_send(self):
+        # a slice of a shared value contains frozen values
+        receive = Receive()
+        extract = Extract('times')
+        sink = RecordingElement()
+        send = Send()
+        sent = []
+        j = Job([], [receive >> extract,
+                     extract >> ('times', 'values') >> Slice(0, 1) >>
+                     ('values', 'times') >> send,
+                     extract >> ('times', 'results') >> sink])
+        j.receive = lambda: {'composition': {'times': [[1, 2], [3]]}}
+        j.send = sent.append
+        j.run_server_pipeline()
+        self.assertEqual(sent, [{'times': [[1, 2]]}])
+        dumps((sent[0],))
+
+    def test_static_typecheck(self):
+        receive = Receive()
+        extract = Extract('values')
+        mean = Mean()
+        sink = RecordingElement()
+        sink.inputs = Types(('results', dict))
+        j = Job([], [receive >> extract >> mean >> ('mean', 'x') >> Print(),
+                     receive >> sink])
+        j._plan([receive], j.server_flow)
+        # Extract is dynamically typed and its outputs are of type object
+        self.assertEqual(extract.check_policy, None)
+        self.assertEqual(mean.check_policy, None)
+        self.assertEqual(sink.check_policy, OFF)
+
 
 class JobCheckTest(unittest.TestCase):
     def test_valid_job(self):
@@ -1,5 +1,8 @@
 from penchy.compat import unittest
-from penchy.jobs.dependency import edgesort, build_keys, Edge
+from penchy.jobs import dependency
+from penchy.jobs.dependency import (edgesort, build_keys, Edge, flow_fingerprint,
+                                    prune, shared_outputs)
+from penchy.jobs.frozen import FrozenList
 from penchy.tests.util import make_edge, MockPipelineElement
 
 
@@ -26,6 +29,85 @@ class EdgeSortTest(unittest.TestCase):
         self.assertIn(edge_order, (edges[::-1],
                                    [edges[2], edges[0], edges[1]]))
 
+    def test_sink_edges_together(self):
+        starts = [0]
+        edges = [Edge(0, 1), Edge(0, 2), Edge(2, 3), Edge(0, 3), Edge(1, 3)]
+        order, edge_order = edgesort(starts, edges)
+        self.assertEqual(order, [1, 2, 3])
+        self.assertEqual(edge_order, [edges[0], edges[1],
+                                      edges[2], edges[3], edges[4]])
+
+    def test_cycle_reported(self):
+        starts = [0]
+        edges = [Edge(0, 1), Edge(1, 2), Edge(2, 3), Edge(3, 2)]
+        with self.assertRaises(ValueError) as cm:
+            edgesort(starts, edges)
+        msg = str(cm.exception)
+        self.assertTrue('cycle: 2 >> 3 >> 2' in msg or 'cycle: 3 >> 2 >> 3' in msg)
+
+    def test_unresolvable_reported(self):
+        starts = [0]
+        edges = [Edge(0, 1), Edge(4, 1)]
+        with self.assertRaises(ValueError) as cm:
+            edgesort(starts, edges)
+        self.assertIn('not resolvable: 4', str(cm.exception))
+
+    def test_long_chain(self):
+        elements = [MockPipelineElement() for _ in range(5000)]
+        edges = [Edge(a, b) for a, b in zip(elements, elements[1:])]
+        order, edge_order = edgesort(elements[:1], edges)
+        self.assertEqual(len(order), len(elements) - 1)
+        self.assertTrue(all(a is b for a, b in zip(order, elements[1:])))
+        self.assertEqual(edge_order, edges)
+
+    def test_cached_plan(self):
+        elements = [MockPipelineElement() for _ in range(3)]
+        edges = [Edge(elements[0], elements[1]), Edge(elements[1], elements[2])]
+        first = edgesort(elements[:1], edges)
+        self.assertIn(flow_fingerprint(elements[:1], edges),
+                      dependency._plan_cache)
+        # returned plans are copies and may be modified by the caller
+        first[0].pop()
+        second = edgesort(elements[:1], list(edges))
+        self.assertEqual(len(second[0]), 2)
+
+    def test_fingerprint_ignores_unused_starts(self):
+        edges = [Edge(0, 1)]
+        self.assertEqual(flow_fingerprint([0, 5], edges),
+                         flow_fingerprint([0], edges))
+        self.assertNotEqual(flow_fingerprint([0], edges),
+                            flow_fingerprint([0], [Edge(0, 1, [('a', 'b')])]))
+
+
+class Effect(object):
+    SIDE_EFFECTS = True
+
+
+class PruneTest(unittest.TestCase):
+    def test_dead_branch(self):
+        effect = Effect()
+        edges = [Edge(0, 1), Edge(1, effect), Edge(0, 2), Edge(2, 3)]
+        live, pruned = prune(edges)
+        self.assertEqual(live, edges[:2])
+        self.assertEqual(pruned, [2, 3])
+
+    def test_shared_source(self):
+        effect = Effect()
+        edges = [Edge(0, 1), Edge(1, 2), Edge(1, effect), Edge(2, 3)]
+        live, pruned = prune(edges)
+        self.assertEqual(live, [edges[0], edges[2]])
+        self.assertEqual(pruned, [2, 3])
+
+    def test_hooks_are_effects(self):
+        element = MockPipelineElement()
+        element.hooks.append(object())
+        edges = [Edge(0, element)]
+        self.assertEqual(prune(edges), (edges, []))
+
+    def test_no_effects(self):
+        edges = [Edge(0, 1)]
+        self.assertEqual(prune(edges), ([], [1]))
+
 
 class BuildKeysTest(unittest.TestCase):
     def test_multi_sinks(self):
@@ -70,6 +152,21 @@ class BuildKeysTest(unittest.TestCase):
                               'boz' : 42})
 
 
+    def test_shared_outputs(self):
+        source = MockPipelineElement(['foo', 'bar'])
+        source.out['foo'] = [1, 2]
+        source.out['bar'] = [3]
+        edges = [Edge(source, 1, [('foo', 'x')]),
+                 Edge(source, 2, [('foo', 'y'), ('bar', 'z')])]
+        shared = shared_outputs(edges)
+        self.assertEqual(shared, set([(id(source), 'foo')]))
+
+        keys = build_keys(edges[1:], shared)
+        self.assertIsInstance(keys['y'], FrozenList)
+        self.assertNotIsInstance(keys['z'], FrozenList)
+        self.assertIs(build_keys(edges[:1], shared)['x'], keys['y'])
+
+
 class SugaredPipelineTest(unittest.TestCase):
     def setUp(self):
         self.elem1 = MockPipelineElement('a')
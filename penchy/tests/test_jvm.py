@@ -4,7 +4,7 @@ import os
 from penchy.compat import unittest, update_hasher
 from penchy.jobs.jvms import JVM, JVMNotConfiguredError, JVMExecutionError, _extract_classpath
 from penchy.jobs.hooks import Hook
-from penchy.jobs.tools import HProf
+from penchy.jobs.tools import GCLog, HProf, JITLog
 from penchy.jobs.workloads import ScalaBench
 from penchy.util import tempdir
 from penchy.tests.util import MockPipelineElement
@@ -76,6 +76,43 @@ class JVMCmdlineTest(unittest.TestCase):
                              ['-classpath', 'foo'] + self.w.arguments)
 
 
+    def test_cmdline_gc_log(self):
+        self.jvm.tool = GCLog()
+        self.jvm._version = 8
+        self.assertIn('-Xloggc:penchy-gc.log', self.jvm.cmdline)
+        self.jvm._version = 11
+        self.assertIn('-Xlog:gc:file=penchy-gc.log:uptime,level,tags',
+                      self.jvm.cmdline)
+        self.jvm.tool = GCLog(unified=False)
+        self.assertIn('-Xloggc:penchy-gc.log', self.jvm.cmdline)
+
+    def test_cmdline_jit_log(self):
+        self.jvm.tool = JITLog()
+        self.jvm._version = 7
+        self.assertIn('-XX:LogFile=penchy-jit.log', self.jvm.cmdline)
+        self.jvm._version = 9
+        self.assertIn('-Xlog:jit+compilation=debug:file=penchy-jit.log:none',
+                      self.jvm.cmdline)
+
+
+class JVMVersionTest(unittest.TestCase):
+    def version(self, output):
+        with tempdir(delete=True):
+            with open('java', 'w') as f:
+                f.write('#!/bin/sh\necho \'{0}\' >&2\n'.format(output))
+            os.chmod('java', 0o755)
+            return JVM(os.path.abspath('java')).version
+
+    def test_version(self):
+        self.assertEqual(self.version('java version "1.8.0_292"'), 8)
+        self.assertEqual(self.version('openjdk version "11.0.2" 2019-01-15'), 11)
+        self.assertEqual(self.version('openjdk version "17" 2021-09-14'), 17)
+
+    def test_unknown_version(self):
+        self.assertIsNone(self.version('no java'))
+        self.assertIsNone(JVM('/nonexistent/java').version)
+
+
 class JVMHooksTest(unittest.TestCase):
     setUp = setup_jvm
 
@@ -0,0 +1,86 @@
+import os
+import re
+from tempfile import NamedTemporaryFile
+
+from penchy.compat import unittest, write
+from penchy.jobs.parsing import (InvalidJSON, InvalidLine, MarkerNotFound,
+                                 compile_lines, converter, count_lines,
+                                 find_line, find_section, json_items, mapped,
+                                 match_lines, native)
+
+
+class ParsingTest(unittest.TestCase):
+    def setUp(self):
+        self.buf = (b'header\n'
+                    b'xSTART not at the start of the line\n'
+                    b'START (total = 3)\n'
+                    b'a b\n'
+                    b' 1 x\n'
+                    b' 2 y\n'
+                    b'END\n')
+        self.pattern = compile_lines(re.compile(r"""
+            \s*(?P<number>\d+)   # a comment
+            \s+(?P<name>\w+)
+            """, re.VERBOSE))
+
+    def test_find_line(self):
+        self.assertEqual(find_line(self.buf, b'START'), (43, 61))
+        self.assertEqual(find_line(self.buf, b'missing'), None)
+
+    def test_find_section(self):
+        first_line, start, end = find_section(self.buf, 'START', 'END', 1)
+        self.assertEqual(first_line, b'START (total = 3)\n')
+        self.assertEqual(self.buf[start:end], b' 1 x\n 2 y\n')
+
+        self.assertRaises(MarkerNotFound, find_section, self.buf, 'BEGIN', 'END')
+        self.assertRaises(MarkerNotFound, find_section, self.buf, 'START', 'STOP')
+
+    def test_match_lines(self):
+        _, start, end = find_section(self.buf, 'START', 'END', 1)
+        columns = match_lines(self.pattern, self.buf, start, end)
+        self.assertEqual(columns, {'number': [b'1', b'2'], 'name': [b'x', b'y']})
+        self.assertEqual(converter(int)(columns['number']), [1, 2])
+        self.assertEqual(converter(str)(columns['name']), ['x', 'y'])
+        self.assertEqual(match_lines(self.pattern, b''), {'number': [], 'name': []})
+
+    def test_invalid_lines(self):
+        for buf, line in ((b' 1 x\nx 2 y\n', b'x 2 y'),
+                          (b' 1 x\n\n 2 y\n', b''),
+                          (b' 1 x\n 2', b' 2')):
+            with self.assertRaises(InvalidLine) as cm:
+                match_lines(self.pattern, buf)
+            self.assertEqual(cm.exception.line, line)
+
+    def test_count_lines(self):
+        self.assertEqual(count_lines(b''), 0)
+        self.assertEqual(count_lines(b'a\nb'), 2)
+        self.assertEqual(count_lines(b'a\nb\n', 2), 1)
+
+    def test_mapped(self):
+        with NamedTemporaryFile(delete=False) as f:
+            write(f, self.buf)
+        try:
+            with mapped(f.name) as buf:
+                self.assertEqual(native(buf[:6]), 'header')
+            with open(f.name, 'w'):
+                pass
+            with mapped(f.name) as buf:
+                self.assertEqual(len(buf), 0)
+        finally:
+            os.remove(f.name)
+
+    def test_json_items(self):
+        with NamedTemporaryFile(delete=False) as f:
+            write(f, b' [{"a": [1, 2]}, 123456,\n "x" , {}]\n')
+        try:
+            for chunk in (1, 3, 1024):
+                self.assertEqual(list(json_items(f.name, chunk)),
+                                 [{'a': [1, 2]}, 123456, 'x', {}])
+            for content in (b'', b'{}', b'[1, 2', b'[1, {]', b'[1 2,,3]',
+                            b'[1,]', b'[,1]', b'[1,,2]'):
+                with open(f.name, 'wb') as g:
+                    write(g, content)
+                with self.assertRaises(InvalidJSON):
+                    list(json_items(f.name, 2))
+        finally:
+            os.remove(f.name)
@@ -0,0 +1,63 @@
+import json
+import os
+
+from penchy.compat import unittest
+from penchy.jobs.filters import Receive, Dump
+from penchy.jobs.job import Job, SystemComposition, NodeSetting
+from penchy.jobs.jvms import JVM
+from penchy.jobs.workloads import ScalaBench
+from penchy.replay import ResultJournal, load_results, read_archive, replay
+from penchy.util import tempdir
+from penchy.tests.util import MockPipelineElement
+
+
+def make_composition(benchmark):
+    jvm = JVM('java')
+    jvm.workload = ScalaBench(benchmark)
+    return SystemComposition(jvm, NodeSetting('localhost', 22, 'dummy', '/', '/'),
+                             name=benchmark)
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.c1 = make_composition('fop')
+        self.c2 = make_composition('batik')
+
+    def test_journal(self):
+        with tempdir(delete=True):
+            journal = ResultJournal('journal')
+            journal.write(self.c1, {'times': [1, 2]})
+            journal.write(self.c2, {'times': [3]})
+            journal.write(self.c1, {'times': [4]})
+            self.assertEqual(len(list(read_archive('journal'))), 3)
+            results = load_results('journal', [self.c1, self.c2])
+        self.assertDictEqual(results, {self.c1: {'times': [4]},
+                                       self.c2: {'times': [3]}})
+
+    def test_dumps(self):
+        env = {'job': 'no file', 'current_composition': None}
+        with tempdir(delete=True):
+            os.mkdir('dumps')
+            for i, c in enumerate((self.c1, self.c2)):
+                d = Dump(indent=i or None)
+                d._run(times=[i], **{':environment:': env})
+                dump = json.loads(d.out['dump'])
+                dump['system']['composition'] = str(c),
+                with open(os.path.join('dumps', str(i)), 'w') as f:
+                    json.dump(dump, f, indent=i or None)
+            results = load_results('dumps', [self.c1, self.c2])
+        self.assertDictEqual(results, {self.c1: {'times': [0]},
+                                       self.c2: {'times': [1]}})
+
+    def test_unknown_composition(self):
+        with tempdir(delete=True):
+            ResultJournal('journal').write(self.c1, {'times': [1]})
+            self.assertDictEqual(load_results('journal', [self.c2]), {})
+
+    def test_replay(self):
+        receive = Receive()
+        job = Job([self.c1], [receive >> MockPipelineElement()])
+        with tempdir(delete=True):
+            ResultJournal('journal').write(self.c1, {'times': [1]})
+            replay(job, 'journal')
+        self.assertDictEqual(receive.out['results'], {self.c1: {'times': [1]}})
@@ -1,5 +1,6 @@
 from penchy.compat import unittest
 from penchy.statistics import *
+from penchy.statistics import _column_statistics, _jackknife
 from numpy.random import random_integers, random_sample
 import numpy as np
 
@@ -24,3 +25,209 @@ class StatisticsTest(unittest.TestCase):
                                np.std(self.ints, ddof=1) / np.average(self.ints))
         self.assertAlmostEqual(coefficient_of_variation(self.floats),
                                np.std(self.floats, ddof=1) / np.average(self.floats))
+
+    def test_percentiles(self):
+        qs = [0, 25, 50, 90, 99.9, 100]
+        for xs in (self.ints, self.floats):
+            expected = np.percentile(xs, qs).tolist()
+            for actual, e in zip(percentiles(xs.tolist(), qs), expected):
+                self.assertAlmostEqual(actual, e)
+            self.assertEqual(percentiles(xs, qs), expected)
+        self.assertEqual(percentiles([3], [50, 100]), [3.0, 3.0])
+
+    def test_variance_lists(self):
+        self.assertAlmostEqual(variance(self.ints.tolist(), ddof=1),
+                               np.var(self.ints, ddof=1))
+        self.assertAlmostEqual(variance(iter(self.floats.tolist()), ddof=0),
+                               np.var(self.floats))
+
+    def test_variance_large_offset(self):
+        xs = [1e9 + x % 10 for x in range(1000)]
+        self.assertAlmostEqual(variance(xs, ddof=0), 8.25)
+
+    def test_batched(self):
+        xss = random_sample((10, 20))
+        for xs_ in (xss, xss.tolist()):
+            for batched, single in ((averages(xs_), average),
+                                    (coefficients_of_variation(xs_),
+                                     coefficient_of_variation)):
+                self.assertEqual(len(batched), 10)
+                for result, xs in zip(batched, xss.tolist()):
+                    self.assertAlmostEqual(result, single(xs))
+            for result, xs in zip(standard_deviations(xs_, ddof=1),
+                                  xss.tolist()):
+                self.assertAlmostEqual(result, standard_deviation(xs, ddof=1))
+
+    def test_batched_ragged(self):
+        xss = [[1, 2, 3], [4, 6]]
+        self.assertEqual(averages(xss), [2, 5])
+        self.assertEqual(standard_deviations(xss, ddof=0),
+                         [standard_deviation([1, 2, 3], ddof=0), 1])
+
+
+class AccumulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.floats = random_sample(100) * 100
+
+    def test_add(self):
+        acc = Accumulator(self.floats.tolist())
+        self.assertEqual(len(acc), 100)
+        self.assertAlmostEqual(acc.mean, np.mean(self.floats))
+        self.assertAlmostEqual(acc.variance(ddof=1), np.var(self.floats, ddof=1))
+        self.assertEqual(acc.min, self.floats.min())
+        self.assertEqual(acc.max, self.floats.max())
+
+    def test_merge(self):
+        whole = Accumulator(self.floats.tolist())
+        merged = Accumulator()
+        for part in (self.floats[:7], [], self.floats[7:50].tolist(),
+                     self.floats[50:]):
+            merged.merge(Accumulator(part))
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.m2, whole.m2)
+        self.assertEqual(merged.min, whole.min)
+        self.assertEqual(merged.max, whole.max)
+
+        added = Accumulator(self.floats[:50]) + Accumulator(self.floats[50:])
+        self.assertAlmostEqual(added.mean, whole.mean)
+
+    def test_functions(self):
+        acc = Accumulator(self.floats)
+        self.assertAlmostEqual(average(acc), np.mean(self.floats))
+        self.assertAlmostEqual(standard_deviation(acc, ddof=1),
+                               np.std(self.floats, ddof=1))
+        self.assertAlmostEqual(coefficient_of_variation(acc),
+                               np.std(self.floats, ddof=1) / np.mean(self.floats))
+        self.assertEqual(averages([acc, acc]), [acc.mean, acc.mean])
+
+    def test_dict(self):
+        acc = Accumulator([1, 2, 4])
+        self.assertEqual(Accumulator.from_dict(acc.as_dict()), acc)
+        self.assertEqual(summarize([acc.as_dict(), 3, Accumulator([5])]),
+                         Accumulator([1, 2, 4, 3, 5]))
+
+
+class QuantileTest(unittest.TestCase):
+    # values of scipy.stats.norm.ppf and scipy.stats.t.ppf
+    def test_normal_quantile(self):
+        for p, expected in ((0.5, 0.0),
+                            (0.95, 1.6448536269514722),
+                            (0.975, 1.959963984540054),
+                            (0.001, -3.090232306167813),
+                            (1e-12, -7.034483825301131)):
+            self.assertAlmostEqual(normal_quantile(p), expected, places=12)
+
+    def test_t_quantile(self):
+        for p, df, expected in ((0.95, 1, 6.313751514675037),
+                                (0.95, 2, 2.9199855803537242),
+                                (0.975, 5, 2.5705818356363146),
+                                (0.05, 29, -1.6991270265334977),
+                                (0.995, 2.5, 7.163728138948783),
+                                (0.975, 1e5, 1.9599877075346095)):
+            self.assertAlmostEqual(t_quantile(p, df), expected, places=10)
+
+    def test_t_quantile_centre(self):
+        # quantiles next to the median keep their relative precision (the
+        # references are integrals of the density, scipy is off here)
+        for p, df, expected in ((0.5000001, 5000, 2.506753607857816e-07),
+                                (0.50001, 4, 2.6666666670495923e-05),
+                                (0.55, 8710, 0.12566501067805283),
+                                (0.4999999999, 1, -3.1415929135263347e-10),
+                                (0.4999999999, 7.3, -2.59368688394243e-10)):
+            self.assertAlmostEqual(t_quantile(p, df) / expected, 1,
+                                   places=12)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, normal_quantile, 1)
+        self.assertRaises(ValueError, t_quantile, 0, 3)
+        self.assertRaises(ValueError, t_quantile, 0.5, 0)
+
+    def test_critical_value(self):
+        self.assertAlmostEqual(critical_value(0.05), 1.959963984540054)
+        self.assertAlmostEqual(critical_value(0.05, 5), 2.5705818356363146)
+        self.assertEqual(critical_value(0.05, 5), critical_value(0.05, 5))
+
+
+class RollingTest(unittest.TestCase):
+    def test_rolling_coefficients_of_variation(self):
+        xs = (random_sample(50) + 1000).tolist()
+        rolling = list(rolling_coefficients_of_variation(xs, 7))
+        self.assertEqual(len(rolling), 44)
+        for i, cv in enumerate(rolling):
+            self.assertAlmostEqual(cv, coefficient_of_variation(xs[i:i + 7]))
+        self.assertEqual(list(rolling_coefficients_of_variation(xs, 51)), [])
+
+    def test_steady_states(self):
+        xss = [[5, 1, 5, 1, 2, 2, 2, 9], [1, 2, 3, 3, 3, 3, 3, 3]]
+        self.assertEqual(steady_states(xss, 3, 0.01), [4, 2])
+        self.assertEqual(steady_states(np.array(xss), 3, 0.01), [4, 2])
+        # only windows that start before the last k values count
+        self.assertEqual(steady_states([xss[0][:7]], 3, 0.01), [None])
+        self.assertEqual(steady_states([xss[0][:7], xss[1]], 3, 0.01),
+                         [None, 2])
+
+
+class ColumnStatisticsTest(unittest.TestCase):
+    def test_rectangular(self):
+        xss = random_integers(0, 50, (20, 10))
+        mins, maxs, avgs = column_statistics(xss.tolist())
+        self.assertEqual(mins, xss.min(axis=0).tolist())
+        self.assertEqual(maxs, xss.max(axis=0).tolist())
+        for avg, expected in zip(avgs, xss.mean(axis=0)):
+            self.assertAlmostEqual(avg, expected)
+        self.assertTrue(all(isinstance(x, int) for x in mins + maxs))
+        self.assertEqual(column_statistics(xss), (mins, maxs, avgs))
+
+    def test_masked(self):
+        xss = [[1, 2, 3], [3, None], [5, 6, 7, 8], []]
+        expected = ([1, 2, 3, 8], [5, 6, 7, 8], [3, 4, 5, 8])
+        for f in (column_statistics, _column_statistics):
+            self.assertEqual(f(xss), expected)
+        masked = np.ma.masked_array([[1, 2], [3, 4]], [[False, True],
+                                                        [False, False]])
+        self.assertEqual(column_statistics(masked), ([1, 4], [3, 4], [2, 4]))
+
+    def test_missing_column(self):
+        xss = [[1.0, None, 2.0], [3.0, float('nan')]]
+        for f in (column_statistics, _column_statistics):
+            mins, maxs, avgs = f(xss)
+            self.assertEqual((mins[0], maxs[0], avgs[0]), (1, 3, 2))
+            self.assertTrue(all(np.isnan(x[1]) for x in (mins, maxs, avgs)))
+            self.assertEqual((mins[2], maxs[2], avgs[2]), (2, 2, 2))
+
+
+class BootstrapTest(unittest.TestCase):
+    def setUp(self):
+        self.xs = np.random.RandomState(0).lognormal(0, 1, 200)
+
+    def test_interval(self):
+        # scipy.stats.bootstrap yields (1.54, 2.10) for the mean
+        for method in BOOTSTRAP_METHODS:
+            lower, upper = bootstrap_interval([self.xs], 0.05, method=method,
+                                              resamples=5000, seed=1)
+            self.assertAlmostEqual(lower, 1.54, places=1)
+            self.assertAlmostEqual(upper, 2.09, places=1)
+
+    def test_jackknife(self):
+        for n in (5, 6):
+            xs = random_sample(n)
+            for statistic, f in (('mean', np.mean), ('median', np.median)):
+                expected = [f(np.delete(xs, i)) for i in range(n)]
+                for actual, e in zip(_jackknife(statistic, xs), expected):
+                    self.assertAlmostEqual(actual, e)
+
+    def test_seed(self):
+        # several batches, independent of the count of processes
+        replicates = bootstrap_replicates([self.xs, self.xs[:50]], 'mean',
+                                          resamples=10000, seed=3)
+        self.assertEqual(len(replicates), 10000)
+        self.assertTrue((replicates == bootstrap_replicates(
+            [self.xs, self.xs[:50]], 'mean', resamples=10000, seed=3,
+            processes=2)).all())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, bootstrap_replicates, [self.xs], 'mode')
+        self.assertRaises(ValueError, bootstrap_replicates, [self.xs] * 3)
+        self.assertRaises(ValueError, bootstrap_interval, [self.xs], 0.05,
+                          method='studentized')
@@ -0,0 +1,37 @@
+import json
+import random
+
+import numpy as np
+
+from penchy.compat import unittest
+from penchy.jobs.table import column, encode, sort_order, tocolumns
+
+
+class ColumnTest(unittest.TestCase):
+    def test_column(self):
+        values = column([1, 2], float)
+        self.assertIsInstance(values, np.ndarray)
+        self.assertEqual(values.tolist(), [1.0, 2.0])
+
+    def test_tocolumns(self):
+        value = tocolumns({'a': [[1, 2], []], 'b': [True], 'c': 'foo'})
+        self.assertIsInstance(value['a'][0], np.ndarray)
+        self.assertEqual(value['a'][0].tolist(), [1, 2])
+        self.assertEqual(value['a'][1], [])
+        self.assertEqual(value['b'], [True])
+        self.assertEqual(value['c'], 'foo')
+
+    def test_stable_sort(self):
+        rows = [(random.randint(0, 3), random.randint(0, 3), i)
+                for i in range(100)]
+        keys = [column([r[0] for r in rows]), column([r[1] for r in rows])]
+        for reverse in (False, True):
+            expected = sorted(rows, key=lambda r: (r[0], r[1]), reverse=reverse)
+            self.assertEqual(list(sort_order(keys, len(rows), reverse)),
+                             [r[2] for r in expected])
+
+    def test_encode(self):
+        self.assertEqual(json.loads(json.dumps({'t': column([3, 1])}, default=encode)),
+                         {'t': [3, 1]})
+        with self.assertRaises(TypeError):
+            json.dumps(object(), default=encode)
@@ -1,5 +1,7 @@
 from penchy.compat import unittest
-from penchy.jobs.typecheck import Types, TypeCheckError
+from penchy.jobs.dependency import Edge
+from penchy.jobs.typecheck import (Types, TypeCheckError, FULL, SAMPLED, OFF,
+                                   set_policy, subsumes, infer)
 from penchy.tests.util import MockPipelineElement
 
 
@@ -62,6 +64,57 @@ class CheckArgsTest(unittest.TestCase):
             self.inputs.check_input({'foo' : dict(a=1, b=2),
                                      'bar' : dict(a=1, b=2)})
 
+    def test_sum_type_container(self):
+        inputs = Types(('foo', list, (int, list), int))
+        self.assertEqual(inputs.check_input({'foo': [1, [2, 3], []]}), 0)
+        with self.assertRaises(TypeCheckError):
+            inputs.check_input({'foo': [1, [2, '3']]})
+
+    def test_empty_nested(self):
+        inputs = Types(('foo', list, list, list, int))
+        self.assertEqual(inputs.check_input({'foo': [[]]}), 0)
+        self.assertEqual(inputs.check_input({'foo': []}), 0)
+
+    def test_arrays(self):
+        import numpy as np
+        self.assertEqual(self.inputs.check_input({'foo': '23',
+                                                  'bar': np.arange(5)}), 0)
+        inputs = Types(('foo', list, list, (int, float)),
+                       ('bar', list, object))
+        self.assertEqual(inputs.check_input({'foo': np.zeros((2, 3)),
+                                             'bar': np.zeros((2, 3))}), 0)
+        self.assertEqual(inputs.check_input({'foo': [np.arange(2)],
+                                             'bar': np.array([1, 'a'],
+                                                             dtype=object)}), 0)
+        for foo in (np.zeros(3), np.zeros((2, 2), dtype=bool).astype(str),
+                    [np.array(['a'])], np.array([[1], 'a'], dtype=object)):
+            with self.assertRaises(TypeCheckError):
+                inputs.check_input({'foo': foo, 'bar': []})
+
+    def test_sampled_policy(self):
+        values = list(range(100))
+        inputs = Types(('foo', list, int))
+        self.assertEqual(inputs.check_input({'foo': values}, SAMPLED), 0)
+        with self.assertRaises(TypeCheckError):
+            inputs.check_input({'foo': ['1'] + values}, SAMPLED)
+        # all elements are checked for short lists
+        with self.assertRaises(TypeCheckError):
+            inputs.check_input({'foo': [1, 2, '3']}, SAMPLED)
+
+    def test_off_policy(self):
+        self.assertEqual(self.inputs.check_input({'foo': 1, 'bar': 2}, OFF), 0)
+        with self.assertRaises(TypeCheckError):
+            self.inputs.check_input({'foo': 1}, OFF)
+
+    def test_default_policy(self):
+        try:
+            set_policy(OFF)
+            self.assertEqual(self.inputs.check_input({'foo': 1, 'bar': 2}), 0)
+        finally:
+            set_policy(FULL)
+        with self.assertRaises(ValueError):
+            set_policy('none')
+
     def _raising_error_on_deletion(self, error, deletions):
         for del_ in deletions:
             with self.assertRaises(error):
@@ -80,6 +133,38 @@ class CheckArgsTest(unittest.TestCase):
                 self.inputs.check_input(d)
 
 
+class InferenceTest(unittest.TestCase):
+    def test_subsumes(self):
+        self.assertTrue(subsumes((list, int), (list, int)))
+        self.assertTrue(subsumes((list, (int, float)), (list, int)))
+        self.assertTrue(subsumes((list,), (list, list, int)))
+        self.assertTrue(subsumes((object,), ((int, str),)))
+        self.assertFalse(subsumes((list, int), (list,)))
+        self.assertFalse(subsumes((list, int), (list, (int, float))))
+        self.assertFalse(subsumes((list, int), (dict, int)))
+
+    def test_infer_mapping(self):
+        source = MockPipelineElement(['a', 'b'])
+        sink = MockPipelineElement()
+        types = infer([Edge(source, sink, [('a', 'x')])])
+        self.assertDictEqual(types, {'x': (int,)})
+        types = infer([Edge(source, sink)])
+        self.assertDictEqual(types, {'a': (int,), 'b': (int,)})
+
+    def test_infer_dynamic(self):
+        source = MockPipelineElement(['a'])
+        source.DYNAMIC_TYPES = True
+        types = infer([Edge(source, MockPipelineElement())])
+        self.assertDictEqual(types, {'a': None})
+
+    def test_satisfied_by(self):
+        inputs = Types(('x', list, (int, float)), ('y', int))
+        self.assertTrue(inputs.satisfied_by({'x': (list, int), 'y': (int,)}))
+        self.assertFalse(inputs.satisfied_by({'x': (list, int)}))
+        self.assertFalse(inputs.satisfied_by({'x': None, 'y': (int,)}))
+        self.assertTrue(Types().satisfied_by({}))
+
+
 class SinkCheckTest(unittest.TestCase):
     def test_valid_input(self):
         sink = Types()
@@ -0,0 +1,304 @@
+from tempfile import NamedTemporaryFile
+
+from penchy.compat import unittest, write
+from penchy.jobs.filters import (Cachegrind, Callgrind, Massif, Memcheck,
+                                 WrongInputError)
+from penchy.jobs.jvms import CacheGrindJVM, CallGrindJVM, MassifJVM, MemcheckJVM
+from penchy.util import tempdir
+from penchy.jobs.valgrind import (ProfileError, function_costs, massif_snapshots,
+                                  memcheck_leaks)
+
+
+CACHEGRIND = """\
+desc: I1 cache: 32768 B, 64 B, 8-way associative
+cmd: java -Dfoo=bar -jar dacapo.jar avrora
+events: Ir I1mr ILmr
+fl=/usr/include/bits/string3.h
+fn=memcpy
+52 3 1 1
+53 2
+fl=???
+fn=(below main)
+0 10 0 0
+fl=/usr/include/bits/string3.h
+fn=memcpy
+54 1 1 0
+summary: 16 2 1
+"""
+
+CALLGRIND = """\
+# callgrind format
+version: 1
+creator: callgrind-3.7.0
+positions: instr line
+events: Ir Dr
+summary: 100 20
+
+ob=(1) /usr/lib/libc.so
+fl=(1) main.c
+fn=(1) main
+0x10 15 10 2
++2 * 5
+cfl=(2) util.c
+cfn=(2) work
+calls=3 0x40 30
++1 16 80 15
+-1 17 1 1
+
+fl=(2)
+fn=(2)
+0x40 30 80 15
+fi=(3) inline.h
++4 2 4
+"""
+
+MASSIF = """\
+desc: (none)
+cmd: java -jar dacapo.jar avrora
+time_unit: ms
+#-----------
+snapshot=0
+#-----------
+time=0
+mem_heap_B=0
+mem_heap_extra_B=0
+mem_stacks_B=0
+heap_tree=empty
+#-----------
+snapshot=1
+#-----------
+time=10
+mem_heap_B=1000
+mem_heap_extra_B=24
+mem_stacks_B=0
+heap_tree=peak
+n2: 1000 (heap allocation functions) malloc/new/new[], --alloc-fns, etc.
+ n0: 600 0x4005A6: main (a.c:5)
+ n0: 400 0x4005B2: main (a.c:6)
+#-----------
+snapshot=2
+#-----------
+time=20
+mem_heap_B=400
+mem_heap_extra_B=16
+mem_stacks_B=0
+heap_tree=detailed
+n0: 400 (heap allocation functions) malloc/new/new[], --alloc-fns, etc.
+"""
+
+LEAK = """\
+<error>
+  <unique>0x{0:x}</unique>
+  <tid>1</tid>
+  <kind>{1}</kind>
+  <xwhat>
+    <text>{2} bytes in 1 blocks are lost in loss record {0} of 3</text>
+    <leakedbytes>{2}</leakedbytes>
+    <leakedblocks>1</leakedblocks>
+  </xwhat>
+  <stack>
+    <frame><ip>0x4C2AB80</ip><obj>/usr/lib/valgrind/vgpreload_memcheck.so</obj>
+      <fn>malloc</fn></frame>
+    <frame><ip>0x4005A6</ip><obj>/tmp/a.out</obj><fn>main</fn>
+      <dir>/tmp</dir><file>a.c</file><line>5</line></frame>
+    <frame><ip>0x4005FF</ip></frame>
+  </stack>
+</error>
+"""
+
+MEMCHECK = """\
+<?xml version="1.0"?>
+<valgrindoutput>
+<protocolversion>4</protocolversion>
+<tool>memcheck</tool>
+<error>
+  <unique>0x0</unique>
+  <tid>1</tid>
+  <kind>InvalidRead</kind>
+  <what>Invalid read of size 4</what>
+  <stack><frame><ip>0x4005A6</ip></frame></stack>
+</error>
+""" + LEAK.format(1, 'Leak_DefinitelyLost', 8) + \
+    LEAK.format(2, 'Leak_DefinitelyLost', 16) + \
+    LEAK.format(3, 'Leak_PossiblyLost', 4) + """\
+<errorcounts></errorcounts>
+</valgrindoutput>
+"""
+
+
+def write_profile(content):
+    f = NamedTemporaryFile(prefix='penchy')
+    write(f, content)
+    f.flush()
+    return f
+
+
+class FunctionCostsTest(unittest.TestCase):
+    def costs(self, content):
+        f = write_profile(content)
+        try:
+            return function_costs(f.name)
+        finally:
+            f.close()
+
+    def test_cachegrind(self):
+        events, totals, functions = self.costs(CACHEGRIND)
+        self.assertEqual(events, ['Ir', 'I1mr', 'ILmr'])
+        self.assertEqual(totals, [16, 2, 1])
+        self.assertEqual(functions,
+                         {('/usr/include/bits/string3.h', 'memcpy'): [6, 2, 1],
+                          ('???', '(below main)'): [10, 0, 0]})
+
+    def test_callgrind(self):
+        events, totals, functions = self.costs(CALLGRIND)
+        self.assertEqual(events, ['Ir', 'Dr'])
+        self.assertEqual(totals, [100, 20])
+        # the inclusive cost of the call is not added to main
+        self.assertEqual(functions, {('main.c', 'main'): [16, 3],
+                                     ('util.c', 'work'): [84, 15]})
+
+    def test_totals(self):
+        events, totals, functions = self.costs(CACHEGRIND.replace(
+            'summary: 16 2 1\n', ''))
+        self.assertEqual(totals, [16, 2, 1])
+
+    def test_malformed(self):
+        for content in ('', CALLGRIND.replace('fn=(1) main', 'fn=(1)'),
+                        CACHEGRIND.replace('53 2', '53 2 1 1 1'),
+                        CACHEGRIND.replace('53 2', '53 x'),
+                        CACHEGRIND.replace('events: Ir I1mr ILmr', ''),
+                        CACHEGRIND + 'invalid\n'):
+            with self.assertRaises(ProfileError):
+                self.costs(content)
+
+
+class MassifTest(unittest.TestCase):
+    def test_snapshots(self):
+        f = write_profile(MASSIF)
+        time_unit, series, peak = massif_snapshots(f.name)
+        self.assertEqual(time_unit, 'ms')
+        self.assertEqual(series, {'time': [0, 10, 20], 'heap': [0, 1000, 400],
+                                  'heap_extra': [0, 24, 16], 'stacks': [0, 0, 0]})
+        self.assertEqual(peak, 1)
+        f.close()
+
+    def test_unmarked_peak(self):
+        f = write_profile(MASSIF.replace('heap_tree=peak', 'heap_tree=detailed')
+                          .replace('mem_heap_B=400', 'mem_heap_B=2000'))
+        self.assertEqual(massif_snapshots(f.name)[2], 2)
+        f.close()
+
+    def test_malformed(self):
+        for content in ('', MASSIF.replace('time=20\n', '')):
+            f = write_profile(content)
+            with self.assertRaises(ProfileError):
+                massif_snapshots(f.name)
+            f.close()
+
+
+class MemcheckTest(unittest.TestCase):
+    def test_leaks(self):
+        f = write_profile(MEMCHECK)
+        leaks, errors = memcheck_leaks(f.name)
+        f.close()
+        stack = ('malloc (/usr/lib/valgrind/vgpreload_memcheck.so)',
+                 'main (a.c:5)', '0x4005FF')
+        self.assertEqual(leaks, {('Leak_DefinitelyLost', stack): [24, 2, 2],
+                                 ('Leak_PossiblyLost', stack): [4, 1, 1]})
+        self.assertEqual(errors, 1)
+
+    def test_malformed(self):
+        for content in ('', '<foo/>', MEMCHECK[:-30]):
+            f = write_profile(content)
+            with self.assertRaises(ProfileError):
+                memcheck_leaks(f.name)
+            f.close()
+
+
+class ValgrindFilterTest(unittest.TestCase):
+    def test_cachegrind(self):
+        f = write_profile(CACHEGRIND)
+        c = Cachegrind()
+        c.run(cachegrind=[f.name])
+        f.close()
+        self.assertEqual(c.out['events'], [['Ir', 'I1mr', 'ILmr']])
+        self.assertEqual(c.out['function'], [['(below main)', 'memcpy']])
+        self.assertEqual(c.out['costs'], [[[10, 6], [0, 2], [0, 1]]])
+
+    def test_callgrind_columnar(self):
+        f = write_profile(CALLGRIND)
+        c = Callgrind(columnar=True)
+        c.run(callgrind=[f.name])
+        f.close()
+        self.assertEqual(c.out['file'], [['util.c', 'main.c']])
+        self.assertEqual([list(col) for col in c.out['costs'][0]],
+                         [[84, 16], [15, 3]])
+        self.assertEqual(c.out['totals'], [[100, 20]])
+
+    def test_wrong_input(self):
+        f = write_profile('no profile\n')
+        with self.assertRaises(WrongInputError):
+            Callgrind().run(callgrind=[f.name])
+        f.close()
+
+    def test_massif(self):
+        f = write_profile(MASSIF)
+        m = Massif(columnar=True)
+        m.run(massif=[f.name])
+        f.close()
+        self.assertEqual(list(m.out['heap'][0]), [0, 1000, 400])
+        self.assertEqual(m.out['peak'], [1])
+        self.assertEqual(m.out['time_unit'], ['ms'])
+
+    def test_memcheck(self):
+        f = write_profile(MEMCHECK)
+        m = Memcheck()
+        m.run(memcheck=[f.name])
+        f.close()
+        self.assertEqual(m.out['kind'], [['Leak_DefinitelyLost', 'Leak_PossiblyLost']])
+        self.assertEqual(m.out['bytes'], [[24, 4]])
+        self.assertEqual(m.out['records'], [[2, 1]])
+        self.assertEqual(m.out['stack'][0][0][1], 'main (a.c:5)')
+        self.assertEqual(m.out['errors'], [1])
+
+
+class ValgrindJVMTest(unittest.TestCase):
+    def run_filter(self, jvm, filter_, output, content):
+        # the hooks of the jvm find the profile written by valgrind
+        with tempdir(delete=True):
+            filename = getattr(jvm, '_{0}_file'.format(output))
+            with open(filename.replace('%p', '4242'), 'w') as f:
+                f.write(content)
+            if '%p' in filename:
+                # the (smaller) output of another process
+                with open(filename.replace('%p', '4241'), 'w') as f:
+                    f.write('invalid')
+            for hook in jvm.hooks:
+                hook.teardown()
+            self.assertEqual(len(jvm.out[output]), 1)
+            filter_.run(**{output: jvm.out[output]})
+        return filter_
+
+    def test_cachegrind(self):
+        c = self.run_filter(CacheGrindJVM('java'), Cachegrind(), 'cachegrind',
+                            CACHEGRIND)
+        self.assertEqual(c.out['totals'], [[16, 2, 1]])
+
+    def test_callgrind(self):
+        c = self.run_filter(CallGrindJVM('java'), Callgrind(), 'callgrind',
+                            CALLGRIND)
+        self.assertEqual(c.out['totals'], [[100, 20]])
+
+    def test_massif(self):
+        m = self.run_filter(MassifJVM('java'), Massif(), 'massif', MASSIF)
+        self.assertEqual(m.out['peak'], [1])
+
+    def test_massif_without_snapshots(self):
+        m = self.run_filter(MassifJVM('java'), Massif(), 'massif',
+                            MASSIF[:MASSIF.index('#')])
+        self.assertEqual(m.out['heap'], [[]])
+        self.assertEqual(m.out['peak'], [-1])
+
+    def test_memcheck(self):
+        m = self.run_filter(MemcheckJVM('java'), Memcheck(), 'memcheck', MEMCHECK)
+        self.assertEqual(m.out['errors'], [1])
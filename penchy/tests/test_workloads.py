@@ -1,5 +1,5 @@
 from penchy.compat import unittest
-from penchy.jobs.workloads import Dacapo
+from penchy.jobs.workloads import Dacapo, JMH
 
 
 class DacapoWorkloadTest(unittest.TestCase):
@@ -13,3 +13,17 @@ class DacapoWorkloadTest(unittest.TestCase):
         w = Dacapo('jython', args='--callback foo')
         self.assertListEqual(w.arguments,
                              'Harness -n 1 --callback foo jython'.split())
+
+
+class JMHWorkloadTest(unittest.TestCase):
+    def test_arguments(self):
+        w = JMH()
+        self.assertListEqual(w.arguments,
+                             'org.openjdk.jmh.Main -f 1 '
+                             '-rf json -rff penchy-jmh.json .*'.split())
+        w = JMH('Hashing', forks=0, warmup_iterations=5, iterations=10,
+                warmup_time='500ms', time='1s', mode='avgt', args='-t 2')
+        self.assertListEqual(w.arguments,
+                             'org.openjdk.jmh.Main -f 0 -wi 5 -i 10 -w 500ms '
+                             '-r 1s -bm avgt -t 2 '
+                             '-rf json -rff penchy-jmh.json Hashing'.split())